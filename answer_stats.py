@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+答题统计（按题目、按科目增量汇总）
+
+每道题按首次出现顺序分配一个连续序号，统计量存放在按序号下标的 array 中，
+每次作答只更新对应下标，O(1)；统计面板直接读取，不需要扫描答题历史。
+
+持久化由 answer_store 负责：question_stats 表与作答事件在同一事务中更新，
+启动时按题目读取一次（与历史长度无关）。
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+UNCATEGORIZED = '未分类'
+
+# question_stats 表的一行: (题目 ID, 科目, 作答次数, 答对次数, 当前连对, 最长连对, 累计用时)
+StatsRow = Tuple[str, str, int, int, int, int, float]
+
+
+class AnswerStats:
+    """按题目和科目汇总的作答统计"""
+
+    def __init__(self):
+        # 题目 ID -> 序号
+        self._ordinals: Dict[str, int] = {}
+        self.attempts = array('I')
+        self.correct = array('I')
+        self.streak = array('I')          # 当前连续答对次数
+        self.best_streak = array('I')
+        self.total_time = array('d')      # 累计作答用时（秒）
+        self.subject_of = array('H')      # 题目所属科目序号
+
+        # 科目名 -> 序号
+        self._subjects: Dict[str, int] = {}
+        self.subject_names: List[str] = []
+        self.subject_attempts = array('I')
+        self.subject_correct = array('I')
+        self.subject_time = array('d')
+
+        self.total_attempts = 0
+        self.total_correct = 0
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def _subject_ordinal(self, subject: str) -> int:
+        subject = subject or UNCATEGORIZED
+        ordinal = self._subjects.get(subject)
+        if ordinal is None:
+            ordinal = self._subjects[subject] = len(self.subject_names)
+            self.subject_names.append(subject)
+            self.subject_attempts.append(0)
+            self.subject_correct.append(0)
+            self.subject_time.append(0.0)
+        return ordinal
+
+    def _ordinal(self, question_id: str, subject: str) -> int:
+        ordinal = self._ordinals.get(question_id)
+        if ordinal is None:
+            ordinal = self._ordinals[question_id] = len(self.attempts)
+            self.attempts.append(0)
+            self.correct.append(0)
+            self.streak.append(0)
+            self.best_streak.append(0)
+            self.total_time.append(0.0)
+            self.subject_of.append(self._subject_ordinal(subject))
+        return ordinal
+
+    def record(self, question_id: str, subject: str, correct: bool, elapsed: float = 0.0):
+        """计入一次作答"""
+        i = self._ordinal(question_id, subject)
+        self.attempts[i] += 1
+        self.total_time[i] += elapsed
+        if correct:
+            self.correct[i] += 1
+            self.streak[i] += 1
+            if self.streak[i] > self.best_streak[i]:
+                self.best_streak[i] = self.streak[i]
+        else:
+            self.streak[i] = 0
+
+        s = self.subject_of[i]
+        self.subject_attempts[s] += 1
+        self.subject_time[s] += elapsed
+        self.total_attempts += 1
+        if correct:
+            self.subject_correct[s] += 1
+            self.total_correct += 1
+
+    def load_rows(self, rows: Iterable[StatsRow]):
+        """载入持久化的按题统计，同时汇总出科目统计"""
+        for question_id, subject, attempts, correct, streak, best_streak, total_time in rows:
+            i = self._ordinal(question_id, subject)
+            self.attempts[i] += attempts
+            self.correct[i] += correct
+            self.streak[i] = streak
+            self.best_streak[i] = max(self.best_streak[i], best_streak)
+            self.total_time[i] += total_time
+            s = self.subject_of[i]
+            self.subject_attempts[s] += attempts
+            self.subject_correct[s] += correct
+            self.subject_time[s] += total_time
+            self.total_attempts += attempts
+            self.total_correct += correct
+
+    # ---- 查询 ----
+
+    def question(self, question_id: str) -> Optional[Dict]:
+        """单题统计，没有作答过时返回 None"""
+        i = self._ordinals.get(question_id)
+        if i is None or not self.attempts[i]:
+            return None
+        return {
+            'attempts': self.attempts[i],
+            'correct': self.correct[i],
+            'accuracy': self.correct[i] / self.attempts[i],
+            'streak': self.streak[i],
+            'best_streak': self.best_streak[i],
+            'avg_time': self.total_time[i] / self.attempts[i],
+        }
+
+    def subjects(self) -> List[Dict]:
+        """各科目统计（按作答次数从多到少）"""
+        result = []
+        for s, name in enumerate(self.subject_names):
+            attempts = self.subject_attempts[s]
+            if attempts:
+                result.append({
+                    'subject': name,
+                    'attempts': attempts,
+                    'correct': self.subject_correct[s],
+                    'accuracy': self.subject_correct[s] / attempts,
+                    'avg_time': self.subject_time[s] / attempts,
+                })
+        result.sort(key=lambda item: -item['attempts'])
+        return result
+
+    def summary_lines(self, question_id: Optional[str] = None) -> List[str]:
+        """统计面板显示的文本行"""
+        if not self.total_attempts:
+            return ["还没有作答记录"]
+        lines = [f"总计：作答 {self.total_attempts} 次，正确率 "
+                 f"{self.total_correct / self.total_attempts:.0%}"]
+        if question_id is not None:
+            stats = self.question(question_id)
+            if stats:
+                lines.append(f"本题：作答 {stats['attempts']} 次，正确率 {stats['accuracy']:.0%}，"
+                             f"连对 {stats['streak']}（最长 {stats['best_streak']}），"
+                             f"平均用时 {stats['avg_time']:.1f} 秒")
+            else:
+                lines.append("本题：还没有作答")
+        for item in self.subjects():
+            lines.append(f"{item['subject']}：作答 {item['attempts']} 次，正确率 {item['accuracy']:.0%}，"
+                         f"平均用时 {item['avg_time']:.1f} 秒")
+        return lines
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+答题记录持久化（SQLite，WAL 模式）
+
+每次作答是一条事件（题目 ID、选项、是否正确、时间、用时），界面线程只把事件放进队列，
+由后台线程按批写入，点击选项永远不会等待磁盘。
+
+表结构:
+    answers          全部作答事件（只追加）
+    latest           每道题最近一次的选择
+    question_stats   每道题的累计统计（见 answer_stats），只计入 graded 事件
+后两张表和事件在同一事务中更新，启动时只需读这两张表，与历史长度无关。
+
+WAL + synchronous=NORMAL：提交只写 WAL 文件，不逐条 fsync，
+异常退出最多丢失最后一批尚未写入的事件。
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+ANSWER_DB_NAME = 'answers.db'
+
+# 每批最多写入的事件数 / 队列空闲多久后写入已积累的事件（秒）
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.5
+
+SCHEMA_VERSION = 2
+
+# 建表和升级语句逐条执行（executescript() 会先隐式提交，不能放在事务中）
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS answers (
+        seq INTEGER PRIMARY KEY,
+        question_id TEXT NOT NULL,
+        option TEXT NOT NULL,
+        correct INTEGER,
+        answered_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS answers_by_question ON answers (question_id, seq)",
+    """CREATE TABLE IF NOT EXISTS latest (
+        question_id TEXT PRIMARY KEY,
+        option TEXT NOT NULL,
+        answered_at REAL NOT NULL
+    ) WITHOUT ROWID""",
+)
+
+# 版本 2：事件增加用时和是否计入统计，新增按题统计表
+_SCHEMA_V2 = (
+    "ALTER TABLE answers ADD COLUMN elapsed REAL",
+    "ALTER TABLE answers ADD COLUMN graded INTEGER NOT NULL DEFAULT 1",
+    """CREATE TABLE question_stats (
+        question_id TEXT PRIMARY KEY,
+        subject TEXT NOT NULL DEFAULT '',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        correct INTEGER NOT NULL DEFAULT 0,
+        streak INTEGER NOT NULL DEFAULT 0,
+        best_streak INTEGER NOT NULL DEFAULT 0,
+        total_time REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+)
+
+_UPDATE_STATS = """
+INSERT INTO question_stats (question_id, subject, attempts, correct, streak, best_streak, total_time)
+VALUES (?1, ?2, 1, ?3, ?3, ?3, ?4)
+ON CONFLICT(question_id) DO UPDATE SET
+    subject = CASE WHEN excluded.subject != '' THEN excluded.subject ELSE subject END,
+    attempts = attempts + 1,
+    correct = correct + ?3,
+    streak = CASE WHEN ?3 THEN streak + 1 ELSE 0 END,
+    best_streak = MAX(best_streak, CASE WHEN ?3 THEN streak + 1 ELSE 0 END),
+    total_time = total_time + ?4
+"""
+
+# (题目 ID, 选项, 是否正确, 时间, 用时, 是否计入统计, 科目)
+Event = Tuple[str, str, Optional[int], float, Optional[float], int, str]
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """打开数据库（WAL 模式），不存在时建表，旧版本时升级"""
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return conn
+    # 建表、升级和版本号在同一个事务中提交，中途失败时全部回滚；
+    # 取得写锁后重新读取版本号（另一个连接可能刚完成升级）
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            if version < 2:
+                for statement in _SCHEMA_V2:
+                    conn.execute(statement)
+                # 一次性由已有事件补出按题统计（旧事件没有科目和用时）
+                rows = conn.execute(
+                    "SELECT question_id, correct FROM answers WHERE correct IS NOT NULL ORDER BY seq")
+                conn.executemany(_UPDATE_STATS, [(qid, '', correct, 0.0) for qid, correct in rows])
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return conn
+
+
+class AnswerStore:
+    """答题记录：界面线程调用 record()，后台线程批量写入"""
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._queue: queue.Queue = queue.Queue()
+        # 读取用的连接（WAL 下读写互不阻塞）
+        self._reader = connect(self.path)
+        self._reader_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, question_id: str, option: str, correct: Optional[bool] = None,
+               answered_at: Optional[float] = None, elapsed: Optional[float] = None,
+               graded: bool = True, subject: str = ''):
+        """记录一次作答（只入队，不等待写入）
+
+        graded=False 的事件（例如同一次显示中改选）只记入历史，不计入统计。
+        """
+        at = time.time() if answered_at is None else answered_at
+        self._queue.put((str(question_id), option, None if correct is None else int(correct),
+                         at, elapsed, int(graded), subject))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已入队的事件全部写入，返回是否在超时前完成"""
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """写入剩余事件并停止后台线程"""
+        if self._thread.is_alive():
+            self._queue.put((self._STOP, None))
+            self._thread.join(timeout)
+        with self._reader_lock:
+            self._reader.close()
+
+    # ---- 后台写入 ----
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while True:
+                batch: List[Event] = []
+                waiters = []
+                stop = False
+                item = self._queue.get()
+                while True:
+                    if item[0] is self._FLUSH:
+                        waiters.append(item[1])
+                    elif item[0] is self._STOP:
+                        stop = True
+                    else:
+                        batch.append(item)
+                    if stop or len(batch) >= BATCH_SIZE:
+                        break
+                    try:
+                        # 连续点击时继续攒批，空闲一段时间后再写入
+                        item = self._queue.get(timeout=FLUSH_INTERVAL if batch and not waiters else 0)
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write(conn, batch)
+                for done in waiters:
+                    done.set()
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, batch: List[Event]):
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO answers (question_id, option, correct, answered_at, elapsed, graded) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [event[:6] for event in batch])
+                conn.executemany(
+                    "INSERT INTO latest (question_id, option, answered_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(question_id) DO UPDATE SET option = excluded.option, "
+                    "answered_at = excluded.answered_at WHERE excluded.answered_at >= latest.answered_at",
+                    [(qid, option, at) for qid, option, _, at, _, _, _ in batch])
+                conn.executemany(
+                    _UPDATE_STATS,
+                    [(qid, subject, correct, elapsed or 0.0)
+                     for qid, _, correct, _, elapsed, graded, subject in batch
+                     if graded and correct is not None])
+        except sqlite3.Error as e:
+            print(f"写入答题记录失败（{len(batch)} 条）: {e}")
+
+    # ---- 查询 ----
+
+    def latest_answers(self) -> Dict[str, str]:
+        """每道题最近一次的选择（题目 ID -> 选项）"""
+        with self._reader_lock:
+            return dict(self._reader.execute("SELECT question_id, option FROM latest"))
+
+    def question_stats(self) -> List[Tuple]:
+        """按题统计（answer_stats.StatsRow 格式）"""
+        with self._reader_lock:
+            return self._reader.execute(
+                "SELECT question_id, subject, attempts, correct, streak, best_streak, total_time "
+                "FROM question_stats").fetchall()
+
+    def history(self, question_id: str) -> List[Tuple]:
+        """某道题的全部作答事件（按时间顺序）：(题目 ID, 选项, 是否正确, 时间, 用时, 是否计入统计)"""
+        with self._reader_lock:
+            rows = self._reader.execute(
+                "SELECT question_id, option, correct, answered_at, elapsed, graded FROM answers "
+                "WHERE question_id = ? ORDER BY seq", (str(question_id),))
+            return rows.fetchall()
+
+    def event_count(self) -> int:
+        """已写入的作答事件数"""
+        with self._reader_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+def open_store(path: Optional[Path] = None) -> Optional[AnswerStore]:
+    """打开答题记录（默认在用户数据目录），失败时返回 None，界面照常使用"""
+    try:
+        if path is None:
+            from question_bank import user_data_path
+            path = user_data_path(ANSWER_DB_NAME)
+        return AnswerStore(path)
+    except Exception as e:
+        print(f"答题记录不可用: {e}")
+        return None
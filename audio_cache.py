@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+朗读音频磁盘缓存（不依赖任何界面框架）
+
+用本机命令行语音引擎（带中文语音的 espeak-ng / espeak）把朗读片段合成为 WAV 文件，
+文件名是 (引擎, 语音, 语速, 文本) 的哈希，题库不变时每个片段只合成一次。
+缓存目录有总大小上限，超出时按最近使用时间（文件 mtime）淘汰最久未用的文件。
+
+合成在后台线程进行：SpeechQueue 准备片段时调用 request() 排队，
+朗读一道题时 lookup_all() 全部片段都命中才播放文件，否则整题交给实时语音引擎。
+
+预先生成整个题库的音频:
+    python3 audio_cache.py [题库]
+"""
+
+import hashlib
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+AUDIO_CACHE_DIR_NAME = 'audio_cache'
+# 缓存总大小上限（字节）
+DEFAULT_BUDGET = 256 * 1024 * 1024
+# 合成单个片段的超时（秒）
+SYNTH_TIMEOUT = 30
+
+# 引擎 -> 中文语音（espeak-ng 的普通话为 cmn；pico2wave 没有中文语音，不使用）
+DEFAULT_VOICES = {'espeak-ng': 'cmn', 'espeak': 'zh'}
+# espeak 的默认语速（每分钟词数），rate 为 -1.0～1.0（与 QTextToSpeech.setRate 一致）
+ESPEAK_WPM = 175
+
+
+def has_voice(engine: str, voice: str) -> bool:
+    """引擎是否装有该语音（--voices=语言 列出匹配的语音，第一行是表头）"""
+    try:
+        result = subprocess.run([engine, f'--voices={voice}'], capture_output=True,
+                                text=True, timeout=SYNTH_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0 and len(result.stdout.strip().splitlines()) > 1
+
+
+def find_synthesizer() -> Optional[str]:
+    """本机装有中文语音的命令行语音引擎，没有时返回 None"""
+    for name, voice in DEFAULT_VOICES.items():
+        if shutil.which(name) and has_voice(name, voice):
+            return name
+    return None
+
+
+def synth_command(engine: str, voice: str, rate: float, text: str, output: str) -> List[str]:
+    """合成一个片段到 WAV 文件的命令行"""
+    wpm = int(ESPEAK_WPM * (1 + rate * 0.5))
+    return [engine, '-v', voice, '-s', str(wpm), '-w', output, text]
+
+
+class AudioCache:
+    """朗读音频的磁盘 LRU 缓存，后台线程合成"""
+
+    def __init__(self, directory: Path, engine: str, voice: Optional[str] = None,
+                 rate: float = 0.0, budget: int = DEFAULT_BUDGET):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.engine = engine
+        self.voice = voice or DEFAULT_VOICES.get(engine, '')
+        self.rate = rate
+        self.budget = budget
+        self._lock = threading.Lock()
+        # 文件名 -> 大小，按最近使用顺序排列（最久未用的在前）
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._scan()
+        self._pending: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._queued = set()
+        self.hits = 0
+        self.misses = 0
+        self._thread = threading.Thread(target=self._run, name='audio-cache', daemon=True)
+        self._thread.start()
+
+    def _scan(self):
+        """按 mtime 重建索引（上次运行留下的文件）"""
+        entries = []
+        for path in self.directory.glob('*.wav'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.name, stat.st_size))
+        entries.sort()
+        for _, name, size in entries:
+            self._files[name] = size
+            self._size += size
+
+    def key(self, text: str) -> str:
+        """片段对应的文件名"""
+        digest = hashlib.sha1(f"{self.engine}\0{self.voice}\0{self.rate}\0{text}".encode('utf-8'))
+        return digest.hexdigest() + '.wav'
+
+    def lookup(self, text: str) -> Optional[Path]:
+        """命中时返回音频文件路径（并标记为最近使用），否则返回 None"""
+        name = self.key(text)
+        with self._lock:
+            if name not in self._files:
+                self.misses += 1
+                return None
+            self._files.move_to_end(name)
+            self.hits += 1
+        path = self.directory / name
+        try:
+            os.utime(path)
+        except OSError:
+            # 文件被外部删除
+            with self._lock:
+                self._size -= self._files.pop(name, 0)
+            return None
+        return path
+
+    def lookup_all(self, texts: List[str]) -> Optional[List[Path]]:
+        """全部片段都已缓存时返回各自的文件路径，否则返回 None
+        （同一道题不混用缓存音频和实时语音引擎，两者的声音不同）"""
+        with self._lock:
+            missing = sum(self.key(text) not in self._files for text in texts)
+            if missing:
+                self.misses += missing
+                return None
+        paths = [self.lookup(text) for text in texts]
+        return None if None in paths else paths
+
+    def request(self, texts: Iterable[str]):
+        """把尚未缓存的片段加入后台合成队列"""
+        for text in texts:
+            name = self.key(text)
+            with self._lock:
+                if name in self._files or name in self._queued:
+                    continue
+                self._queued.add(name)
+            self._pending.put(text)
+
+    def _run(self):
+        while True:
+            text = self._pending.get()
+            if text is None:
+                return
+            name = self.key(text)
+            try:
+                self._synthesize(text, name)
+            except Exception as e:
+                print(f"合成朗读音频失败: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(name)
+
+    def _synthesize(self, text: str, name: str):
+        path = self.directory / name
+        tmp_path = path.with_name(name + '.tmp')
+        try:
+            subprocess.run(synth_command(self.engine, self.voice, self.rate, text, str(tmp_path)),
+                           check=True, timeout=SYNTH_TIMEOUT,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            os.replace(tmp_path, path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        size = path.stat().st_size
+        with self._lock:
+            self._size += size - self._files.pop(name, 0)
+            self._files[name] = size
+            evicted = self._evict()
+        for old in evicted:
+            try:
+                (self.directory / old).unlink()
+            except OSError:
+                pass
+
+    def _evict(self) -> List[str]:
+        """超出预算时移出最久未用的文件（调用方持有锁）"""
+        evicted = []
+        while self._size > self.budget and len(self._files) > 1:
+            old, size = self._files.popitem(last=False)
+            self._size -= size
+            evicted.append(old)
+        return evicted
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待合成队列清空"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._queued:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+
+    def close(self):
+        """停止后台线程（丢弃尚未合成的片段）"""
+        self._pending.put(None)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+def open_audio_cache(voice: Optional[str] = None, rate: float = 0.0,
+                     budget: int = DEFAULT_BUDGET) -> Optional[AudioCache]:
+    """在用户数据目录打开音频缓存；本机没有命令行语音引擎时返回 None"""
+    engine = find_synthesizer()
+    if engine is None:
+        return None
+    from question_bank import user_data_path
+    try:
+        return AudioCache(user_data_path(AUDIO_CACHE_DIR_NAME), engine, voice, rate, budget)
+    except OSError as e:
+        print(f"打开朗读音频缓存失败: {e}")
+        return None
+
+
+def main():
+    from question_bank import DEFAULT_BANK_PATH, iter_questions
+    from speech import question_segments
+
+    cache = open_audio_cache()
+    if cache is None:
+        print("没有找到带中文语音的 espeak-ng / espeak，无法生成朗读音频")
+        return 1
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BANK_PATH
+    texts = [text for q in iter_questions(path) for text in question_segments(q)]
+    start = time.perf_counter()
+    cache.request(texts)
+    cache.wait_idle()
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = sum(cache.lookup(text) is not None for text in texts)
+    lookup = (time.perf_counter() - start) / max(len(texts), 1)
+    print(f"引擎 {cache.engine}（语音 {cache.voice}）: {len(texts)} 个片段，合成用时 {elapsed:.1f} 秒")
+    print(f"缓存 {len(cache)} 个文件，{cache.size / 1048576:.1f} MB；"
+          f"命中 {hits}/{len(texts)}，每次查找 {lookup * 1e6:.0f} 微秒")
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
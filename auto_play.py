@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自动轮播状态机（不依赖任何界面框架）
+
+    idle → showing → speaking → gap → advancing → showing → ...
+
+showing    显示题目和答案
+speaking   朗读中（朗读不可用时直接进入 gap）
+gap        读完后的停顿，由界面唯一的轮播定时器计时
+advancing  切换到下一题
+
+每次状态变化都会递增 generation；定时器和朗读回调在发出时记下当时的
+generation，回调到来时若已不是当前值（期间手动翻页、关闭轮播等）就直接丢弃，
+不会重复翻页或叠加朗读。
+
+每种状态转换的耗时（在前一状态停留的时间）都会累计，可在统计面板中查看。
+"""
+
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+import tracing
+from question_bank import user_data_path
+
+
+IDLE = 'idle'
+SHOWING = 'showing'
+SPEAKING = 'speaking'
+GAP = 'gap'
+ADVANCING = 'advancing'
+
+# 按轮播流程排列，统计面板按此顺序显示
+STATE_NAMES = {IDLE: '停止', SHOWING: '显示', SPEAKING: '朗读', GAP: '停顿', ADVANCING: '翻页'}
+_STATE_ORDER = {state: i for i, state in enumerate(STATE_NAMES)}
+
+# 允许的状态转换（任何状态都可以回到 idle，手动翻页时可以直接进入 showing）
+TRANSITIONS = {
+    IDLE: {SHOWING},
+    SHOWING: {SPEAKING, GAP, SHOWING, IDLE},
+    SPEAKING: {GAP, SHOWING, IDLE},
+    GAP: {ADVANCING, SHOWING, IDLE},
+    ADVANCING: {SHOWING, IDLE},
+}
+
+AUTO_PLAY_CONFIG_NAME = 'auto_play.json'
+# 停顿时长（秒）：读完后到翻页；朗读不可用时每题停留的时间
+DEFAULT_GAPS = {'after_speech': 0.5, 'no_speech': 3.0}
+
+
+def load_gaps() -> Dict[str, float]:
+    """读取停顿配置（用户数据目录下的 auto_play.json），缺省项使用默认值"""
+    gaps = dict(DEFAULT_GAPS)
+    try:
+        with open(user_data_path(AUTO_PLAY_CONFIG_NAME), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return gaps
+    except Exception as e:
+        print(f"读取轮播配置失败: {e}")
+        return gaps
+    for name in gaps:
+        value = data.get(name) if isinstance(data, dict) else None
+        if isinstance(value, (int, float)) and value >= 0:
+            gaps[name] = float(value)
+    return gaps
+
+
+class AutoPlayMachine:
+    """自动轮播状态机：当前状态、generation 和各转换的耗时统计"""
+
+    def __init__(self, gaps: Optional[Dict[str, float]] = None):
+        self.gaps = dict(DEFAULT_GAPS)
+        if gaps:
+            self.gaps.update(gaps)
+        self.state = IDLE
+        self.generation = 0
+        self._entered_at = time.monotonic()
+        # (前一状态, 新状态) -> [次数, 总耗时, 最大耗时]
+        self._latency: Dict[Tuple[str, str], List[float]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self.state != IDLE
+
+    def enter(self, state: str) -> int:
+        """进入新状态，返回新的 generation"""
+        if state not in TRANSITIONS[self.state]:
+            raise ValueError(f"自动轮播不能从 {self.state} 转到 {state}")
+        now = time.monotonic()
+        if self.state != IDLE:
+            elapsed = now - self._entered_at
+            entry = self._latency.setdefault((self.state, state), [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+        tracing.instant('auto_play', old=self.state, new=state)
+        self.state = state
+        self._entered_at = now
+        self.generation += 1
+        return self.generation
+
+    def stop(self) -> int:
+        """回到 idle（使所有未到的回调失效）"""
+        return self.enter(IDLE) if self.state != IDLE else self.generation
+
+    def is_current(self, token: int) -> bool:
+        """回调发出时记下的 generation 是否仍然有效"""
+        return token == self.generation
+
+    def gap(self, name: str) -> float:
+        return self.gaps.get(name, 0.0)
+
+    def latency(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """各状态转换的次数、平均和最大耗时（秒）"""
+        return {
+            key: {'count': count, 'mean': total / count, 'max': worst}
+            for key, (count, total, worst) in self._latency.items() if count
+        }
+
+    def summary_lines(self) -> List[str]:
+        """统计面板显示的文本行"""
+        lines = []
+        items = sorted(self.latency().items(),
+                       key=lambda kv: (_STATE_ORDER[kv[0][0]], _STATE_ORDER[kv[0][1]]))
+        for (old, new), item in items:
+            lines.append(f"轮播 {STATE_NAMES[old]}→{STATE_NAMES[new]}：{item['count']:.0f} 次，"
+                         f"平均 {item['mean'] * 1000:.0f} 毫秒，最长 {item['max'] * 1000:.0f} 毫秒")
+        return lines
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+题库校验工具
+
+对整个题库做完整检查，并行处理，输出结构化报告:
+    - JSONL 文件按字节范围切分，由各工作进程各自读取、解析、检查
+    - JSON 数组在主进程中流式解析，按块交给工作进程检查
+    - 重复 ID 在汇总阶段统一检查（跨文件、跨分片）
+
+报告为 JSON（--json 指定文件，"-" 表示标准输出），并打印汇总；
+存在错误时退出码为 1。
+
+用法:
+    python3 bank_lint.py [题库文件/分片目录/清单] [--json report.json] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from question_bank import DEFAULT_BANK_PATH, JSONL_SUFFIXES, OPTION_KEYS, iter_raw_questions
+
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# 每个检查块的题目数 / 每个 JSONL 字节范围的大小
+CHUNK_SIZE = 5000
+RANGE_BYTES = 4 << 20
+
+# (题目在文件中的序号, 严重程度, 代码, 说明)
+Issue = Tuple[int, str, str, str]
+
+
+def check_record(raw) -> List[Tuple[str, str, str]]:
+    """检查单条原始题目，返回 (严重程度, 代码, 说明) 列表"""
+    if not isinstance(raw, dict):
+        return [(ERROR, 'not-an-object', f"题目不是对象，而是 {type(raw).__name__}")]
+
+    problems = []
+    if raw.get('id') in (None, ''):
+        problems.append((ERROR, 'missing-id', "缺少 id"))
+
+    title = raw.get('title')
+    if not isinstance(title, str):
+        problems.append((ERROR, 'invalid-title', "title 缺失或不是字符串"))
+    elif not title.strip():
+        problems.append((ERROR, 'empty-title', "title 为空"))
+
+    options = raw.get('options')
+    if options is None:
+        problems.append((ERROR, 'missing-options', "缺少 options"))
+        options = {}
+    elif not isinstance(options, dict):
+        problems.append((ERROR, 'invalid-options', f"options 不是对象，而是 {type(options).__name__}"))
+        options = {}
+    else:
+        for key, value in options.items():
+            if key not in OPTION_KEYS:
+                problems.append((WARNING, 'unknown-option-key', f"未知选项键 {key!r}（只显示 A-D）"))
+            if not isinstance(value, str):
+                problems.append((ERROR, 'non-string-option', f"选项 {key} 不是字符串"))
+            elif not value.strip():
+                problems.append((ERROR, 'empty-option', f"选项 {key} 为空"))
+        if len([k for k in OPTION_KEYS if k in options]) < 2:
+            problems.append((ERROR, 'too-few-options', "有效选项少于 2 个"))
+
+    answer = raw.get('answer')
+    if not isinstance(answer, str) or not answer:
+        problems.append((ERROR, 'missing-answer', "缺少 answer"))
+    elif options and answer not in options:
+        problems.append((ERROR, 'answer-not-in-options', f"答案 {answer!r} 不在选项中"))
+
+    analysis = raw.get('analysis')
+    if analysis is not None and not isinstance(analysis, str):
+        problems.append((ERROR, 'invalid-analysis', "analysis 不是字符串"))
+    elif not analysis:
+        problems.append((WARNING, 'missing-analysis', "缺少解析"))
+    return problems
+
+
+def check_chunk(start: int, records: list) -> Tuple[int, List[Issue], List[Tuple[int, str]]]:
+    """检查一块题目，返回 (题目数, 问题列表, (序号, ID) 列表)"""
+    issues: List[Issue] = []
+    ids: List[Tuple[int, str]] = []
+    for offset, raw in enumerate(records):
+        index = start + offset
+        for severity, code, message in check_record(raw):
+            issues.append((index, severity, code, message))
+        if isinstance(raw, dict) and raw.get('id') not in (None, ''):
+            ids.append((index, str(raw['id'])))
+    return len(records), issues, ids
+
+
+def check_jsonl_range(path: str, begin: int, end: int) -> Tuple[int, List[Issue], List[Tuple[int, str]]]:
+    """在工作进程中读取并检查 JSONL 文件 [begin, end) 字节范围内开始的行
+
+    序号是范围内的相对序号，由汇总阶段加上前面各范围的题目数。
+    """
+    records = []
+    issues: List[Issue] = []
+    with open(path, 'rb') as f:
+        if begin > 0:
+            # 从 begin 前一个字节读到行尾：begin 恰好是行首时该行归本范围
+            f.seek(begin - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                issues.append((len(records), ERROR, 'invalid-json', f"JSON 解析失败: {e}"))
+                records.append(None)
+    count, chunk_issues, ids = check_chunk(0, records)
+    # None 占位的行已报 invalid-json，去掉重复的 not-an-object
+    bad_lines = {index for index, _, code, _ in issues}
+    chunk_issues = [i for i in chunk_issues if not (i[0] in bad_lines and i[2] == 'not-an-object')]
+    return count, issues + chunk_issues, ids
+
+
+def resolve_files(path: Path) -> List[Path]:
+    """题库来源对应的文件列表（单文件、分片目录或清单）"""
+    from sharded_bank import is_sharded_source, resolve_shards
+    if is_sharded_source(path):
+        return [shard_path for shard_path, _ in resolve_shards(path)]
+    return [path]
+
+
+def lint(path: Path, jobs: Optional[int] = None) -> Dict:
+    """检查题库，返回报告字典"""
+    files = resolve_files(Path(path))
+    issues: List[Dict] = []
+    records = 0
+    id_locations: Dict[str, List[Tuple[str, int]]] = {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for file_path in files:
+            futures = []
+            try:
+                if file_path.suffix in JSONL_SUFFIXES:
+                    size = file_path.stat().st_size
+                    for begin in range(0, max(size, 1), RANGE_BYTES):
+                        futures.append(executor.submit(
+                            check_jsonl_range, str(file_path), begin, min(begin + RANGE_BYTES, size)))
+                else:
+                    chunk, start = [], 0
+                    for raw in iter_raw_questions(file_path):
+                        chunk.append(raw)
+                        if len(chunk) >= CHUNK_SIZE:
+                            futures.append(executor.submit(check_chunk, start, chunk))
+                            start += len(chunk)
+                            chunk = []
+                    futures.append(executor.submit(check_chunk, start, chunk))
+            except Exception as e:
+                issues.append({'file': str(file_path), 'index': None, 'id': None,
+                               'severity': ERROR, 'code': 'unreadable-file', 'message': str(e)})
+
+            # JSON 数组的序号已经是全局的；JSONL 范围内的序号需要加上偏移
+            base = 0
+            for future in futures:
+                count, chunk_issues, ids = future.result()
+                offset = base if file_path.suffix in JSONL_SUFFIXES else 0
+                id_by_index = dict(ids)
+                for index, severity, code, message in chunk_issues:
+                    issues.append({'file': str(file_path), 'index': index + offset,
+                                   'id': id_by_index.get(index), 'severity': severity,
+                                   'code': code, 'message': message})
+                for index, question_id in ids:
+                    id_locations.setdefault(question_id, []).append((str(file_path), index + offset))
+                base += count
+                records += count
+
+    for question_id, locations in id_locations.items():
+        for file_name, index in locations[1:]:
+            first_file, first_index = locations[0]
+            issues.append({'file': file_name, 'index': index, 'id': question_id,
+                           'severity': ERROR, 'code': 'duplicate-id',
+                           'message': f"ID 与 {Path(first_file).name} 第 {first_index} 题重复"})
+
+    issues.sort(key=lambda i: (i['file'], i['index'] if i['index'] is not None else -1))
+    counts = Counter(i['severity'] for i in issues)
+    return {
+        'source': str(path),
+        'files': [str(f) for f in files],
+        'records': records,
+        'errors': counts.get(ERROR, 0),
+        'warnings': counts.get(WARNING, 0),
+        'by_code': dict(Counter(i['code'] for i in issues).most_common()),
+        'issues': issues,
+    }
+
+
+def print_summary(report: Dict, out=sys.stdout):
+    """打印汇总"""
+    print(f"检查 {report['records']} 道题目（{len(report['files'])} 个文件）: "
+          f"{report['errors']} 个错误，{report['warnings']} 个警告", file=out)
+    for code, count in report['by_code'].items():
+        print(f"  {code}: {count}", file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="检查题库格式")
+    parser.add_argument('path', nargs='?', default=str(DEFAULT_BANK_PATH),
+                        help="题库文件、分片目录或清单文件")
+    parser.add_argument('--json', dest='json_path', help="写入 JSON 报告的文件（- 表示标准输出）")
+    parser.add_argument('--jobs', type=int, default=None, help="工作进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    report = lint(Path(args.path), args.jobs or os.cpu_count())
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        print_summary(report, sys.stderr)
+    else:
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        print_summary(report)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
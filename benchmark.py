@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+题库与调度路径的基准测试
+
+按 questions.json 中题干、选项、解析的长度分布和用字频率生成合成题库（JSONL，
+1k / 10k / 100k / 1M 道），对每种规模测量:
+    load            解析 JSON、去近似重复（计算全部签名）、转为列式存储
+    compile         写入编译题库（连同去重签名）
+    reload          再次解析 JSON，复用编译题库中保存的签名
+    open_compiled   打开编译题库（mmap）并读取第一题
+    validate        bank_lint 完整校验
+    shuffle         打乱出题顺序
+    navigate        随机跳题并读取题目（编译题库按需解码）
+    lookup          按 ID 查找位置
+    answer_record   写入答题记录（SQLite 后台批量写入，含最后一次刷盘）
+    stats           增量答题统计
+    schedule        复习调度（评分 + 取下一张卡）
+    speech_text     生成朗读片段
+    search_index    建立全文检索索引（最多前 SEARCH_MAX_RECORDS 道题）
+    search          全文检索（模拟逐字输入题干片段，每个字查询一次）
+
+每项给出吞吐量（次/秒）、p50 / p99 延迟（微秒）和之后的进程峰值内存（MB）。
+每种规模在单独的子进程中运行，峰值内存互不影响。
+结果写入 JSON 文件；与提交在仓库中的预算文件（benchmark_budget.json）比较，
+超出预算时列出每一项并以退出码 1 结束。
+
+用法:
+    python3 benchmark.py [--sizes 1k,10k,100k] [--full] [--json 结果.json]
+                         [--budget benchmark_budget.json] [--no-budget] [--data-dir 目录]
+
+--full 额外运行 1M 道题（生成的题库约 1 GB，生成一次后复用）。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from question_bank import DEFAULT_BANK_PATH, OPTION_KEYS, iter_questions
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+FULL_SIZES = DEFAULT_SIZES + (1_000_000,)
+BUDGET_PATH = Path(__file__).parent / 'benchmark_budget.json'
+DEFAULT_RESULTS = 'benchmark_results.json'
+SEED = 20240501
+
+# 逐次计时的操作最多执行的次数
+MAX_SAMPLES = 100_000
+SHUFFLE_REPEATS = 5
+# 全文检索索引最多包含的题目数量（1M 道题全部建索引太慢）
+SEARCH_MAX_RECORDS = 100_000
+# 模拟输入的搜索词数量，每个词依次查询 1～SEARCH_MAX_CHARS 个字的前缀
+SEARCH_QUERIES = 200
+SEARCH_MAX_CHARS = 6
+
+
+# ---- 合成题库 ----
+
+class TextModel:
+    """真实题库的长度分布和用字片段"""
+
+    def __init__(self, questions: Iterable):
+        self.title_lengths: List[int] = []
+        self.option_lengths: List[int] = []
+        self.analysis_lengths: List[int] = []
+        self.option_counts: List[int] = []
+        self.subjects: List[str] = []
+        corpus = []
+        for q in questions:
+            self.title_lengths.append(len(q.title))
+            options = [text for _, text in q.option_items()]
+            self.option_counts.append(len(options))
+            self.option_lengths.extend(len(text) for text in options)
+            self.analysis_lengths.append(len(q.analysis))
+            if q.subject:
+                self.subjects.append(q.subject)
+            corpus.extend((q.title, *options, q.analysis))
+        if not self.title_lengths:
+            raise ValueError("样本题库为空")
+        # 2～4 个字的片段（保留原文的标点和字频），随机拼接成新的文本
+        text = ''.join(corpus)
+        rng = random.Random(SEED)
+        self.pieces = []
+        pos = 0
+        while pos < len(text):
+            size = rng.randint(2, 4)
+            self.pieces.append(text[pos:pos + size])
+            pos += size
+        self.subjects = self.subjects or ['法律法规', '证券投资基金', '私募股权投资基金']
+
+    def text(self, rng: random.Random, length: int) -> str:
+        if length <= 0:
+            return ''
+        parts = []
+        total = 0
+        pieces = self.pieces
+        while total < length:
+            piece = pieces[int(rng.random() * len(pieces))]
+            parts.append(piece)
+            total += len(piece)
+        return ''.join(parts)[:length]
+
+    def question(self, rng: random.Random, index: int) -> Dict:
+        count = rng.choice(self.option_counts) or 4
+        keys = OPTION_KEYS[:max(2, min(count, len(OPTION_KEYS)))]
+        options = {key: self.text(rng, rng.choice(self.option_lengths)) for key in keys}
+        return {
+            'id': f"bench-{index}",
+            'title': self.text(rng, rng.choice(self.title_lengths)),
+            'options': options,
+            'answer': rng.choice(keys),
+            'analysis': self.text(rng, rng.choice(self.analysis_lengths)),
+            'subject': rng.choice(self.subjects),
+        }
+
+
+def generate_bank(path: Path, size: int, model: TextModel, seed: int = SEED):
+    """生成 size 道题的 JSONL 题库"""
+    rng = random.Random(seed + size)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for i in range(size):
+            f.write(json.dumps(model.question(rng, i), ensure_ascii=False))
+            f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def ensure_bank(data_dir: Path, size: int) -> Path:
+    """取得（必要时生成）指定规模的合成题库"""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"bench_{size}_{SEED}.jsonl"
+    if not path.exists():
+        model = TextModel(iter_questions(DEFAULT_BANK_PATH))
+        started = time.perf_counter()
+        generate_bank(path, size, model)
+        print(f"生成 {size} 道题: {path}（{time.perf_counter() - started:.1f} 秒）", file=sys.stderr)
+    return path
+
+
+# ---- 计时 ----
+
+def peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(samples_ns: List[int], total_s: Optional[float] = None, items: Optional[int] = None) -> Dict:
+    """计时结果：次数、总时间、吞吐量、p50/p99 延迟和峰值内存"""
+    samples = sorted(samples_ns)
+    count = items if items is not None else len(samples)
+    total = total_s if total_s is not None else sum(samples) / 1e9
+    return {
+        'count': count,
+        'total_s': round(total, 6),
+        'throughput': round(count / total, 1) if total > 0 else None,
+        'p50_us': round(samples[len(samples) // 2] / 1e3, 3),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1e3, 3),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def time_each(func: Callable, args: Iterable) -> List[int]:
+    """逐次计时"""
+    clock = time.perf_counter_ns
+    samples = []
+    for arg in args:
+        start = clock()
+        func(arg)
+        samples.append(clock() - start)
+    return samples
+
+
+def time_once(func: Callable):
+    start = time.perf_counter_ns()
+    result = func()
+    return result, time.perf_counter_ns() - start
+
+
+# ---- 单个规模（子进程） ----
+
+def run_size(size: int, data_dir: Path) -> Dict:
+    """在当前进程中测量一种规模"""
+    import io
+    from contextlib import redirect_stdout
+
+    from answer_stats import AnswerStats
+    from answer_store import AnswerStore
+    from bank_lint import lint
+    from columnar_bank import ColumnarBank
+    from compiled_bank import CompiledBank, compiled_path_for, pack_signatures, write_compiled
+    from near_duplicates import NearDuplicateFilter
+    from question_bank import QuestionBank, load_questions_json
+    from scheduler import ReviewScheduler
+    from search_index import SearchIndex
+    from speech import question_segments
+
+    path = ensure_bank(data_dir, size)
+    ops: Dict[str, Dict] = {}
+    rng = random.Random(SEED)
+    quiet = io.StringIO()
+
+    def load():
+        # 与 BankLoader 一样签名打包后先释放去重索引，再构建列式存储
+        dedup = NearDuplicateFilter()
+        parsed = load_questions_json(path, dedup)
+        signatures = pack_signatures(dedup.signatures)
+        del dedup
+        return ColumnarBank(parsed), signatures
+    with redirect_stdout(quiet):
+        (questions, signatures), elapsed = time_once(load)
+    ops['load'] = summarize([elapsed], items=len(questions))
+
+    compiled_path = compiled_path_for(path)
+    _, elapsed = time_once(lambda sigs=signatures: write_compiled(
+        questions, compiled_path, path.stat().st_mtime_ns, b'\0' * 32, sigs))
+    ops['compile'] = summarize([elapsed], items=len(questions))
+    del signatures
+
+    with redirect_stdout(quiet):
+        _, elapsed = time_once(lambda: load_questions_json(path))
+    ops['reload'] = summarize([elapsed], items=len(questions))
+
+    def open_bank():
+        bank = QuestionBank(CompiledBank(compiled_path))
+        bank.current
+        return bank
+    bank, elapsed = time_once(open_bank)
+    ops['open_compiled'] = summarize([elapsed], items=1)
+
+    with redirect_stdout(quiet):
+        report, elapsed = time_once(lambda: lint(path))
+    ops['validate'] = summarize([elapsed], items=report.get('records', size))
+
+    ops['shuffle'] = summarize(time_each(lambda _: bank.shuffle(rng), range(SHUFFLE_REPEATS)))
+
+    count = len(bank)
+    samples = min(MAX_SAMPLES, count * 10)
+    positions = [rng.randrange(count) for _ in range(samples)]
+    ops['navigate'] = summarize(time_each(lambda pos: bank.go_to(pos).title, positions))
+
+    ids = [bank[pos].id for pos in positions[:min(samples, count)]]
+    ops['lookup'] = summarize(time_each(bank.position_of, ids))
+
+    records = [bank[pos] for pos in positions[:min(samples, count)]]
+    options = [rng.choice(OPTION_KEYS) for _ in records]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AnswerStore(Path(tmp) / 'answers.db')
+        started = time.perf_counter()
+        record_samples = time_each(
+            lambda i: store.record(records[i].id, options[i], options[i] == records[i].answer,
+                                   elapsed=1.0, subject=records[i].subject),
+            range(len(records)))
+        store.flush(600)
+        total = time.perf_counter() - started
+        store.close()
+    ops['answer_record'] = summarize(record_samples, total_s=total)
+
+    stats = AnswerStats()
+    ops['stats'] = summarize(time_each(
+        lambda i: stats.record(records[i].id, records[i].subject, options[i] == records[i].answer, 1.0),
+        range(len(records))))
+
+    scheduler = ReviewScheduler()
+    scheduler.attach(bank.ids())
+    now = time.time()
+
+    def review(i):
+        scheduler.review(records[i].id, options[i] == records[i].answer, now + i)
+        scheduler.next_card(now + i)
+    ops['schedule'] = summarize(time_each(review, range(len(records))))
+
+    speech_questions = records[:20_000]
+    ops['speech_text'] = summarize(time_each(question_segments, speech_questions))
+
+    # 放在最后，索引占用的内存不计入前面各项的峰值
+    indexed = min(count, SEARCH_MAX_RECORDS)
+    index, elapsed = time_once(lambda: SearchIndex(islice(bank.records, indexed)))
+    ops['search_index'] = summarize([elapsed], items=len(index))
+    queries = []
+    for _ in range(SEARCH_QUERIES):
+        title = bank.records[rng.randrange(indexed)].title
+        start = rng.randrange(max(1, len(title) - SEARCH_MAX_CHARS))
+        word = title[start:start + SEARCH_MAX_CHARS]
+        queries.extend(word[:n] for n in range(1, len(word) + 1))
+    ops['search'] = summarize(time_each(index.search, queries))
+
+    return {'size': size, 'questions': count, 'ops': ops, 'peak_rss_mb': peak_rss_mb()}
+
+
+# ---- 汇总 ----
+
+def check_budget(results: List[Dict], budget: Dict) -> List[str]:
+    """与预算比较，返回超标项的说明"""
+    failures = []
+    for result in results:
+        limits = budget.get(str(result['size']), {})
+        for op, limit in limits.items():
+            measured = result['ops'].get(op)
+            if measured is None:
+                continue
+            for key, bound in limit.items():
+                if key == 'min_throughput':
+                    value = measured.get('throughput')
+                    if value is not None and value < bound:
+                        failures.append(f"{result['size']} 道题 {op}: 吞吐量 {value:.0f}/秒 低于预算 {bound}")
+                elif key in ('p50_us', 'p99_us', 'peak_rss_mb', 'total_s'):
+                    value = measured.get(key)
+                    if value is not None and value > bound:
+                        failures.append(f"{result['size']} 道题 {op}: {key} {value} 超出预算 {bound}")
+    return failures
+
+
+def print_table(result: Dict):
+    print(f"\n{result['size']} 道题（有效 {result['questions']} 道），峰值内存 {result['peak_rss_mb']:.0f} MB")
+    print(f"  {'操作':<14}{'次数':>9}{'吞吐量/秒':>14}{'p50 微秒':>12}{'p99 微秒':>12}{'内存 MB':>9}")
+    for op, item in result['ops'].items():
+        throughput = f"{item['throughput']:.0f}" if item['throughput'] else '-'
+        rss = f"{item['peak_rss_mb']:.0f}" if item['peak_rss_mb'] is not None else '-'
+        print(f"  {op:<14}{item['count']:>9}{throughput:>14}{item['p50_us']:>12.1f}{item['p99_us']:>12.1f}{rss:>9}")
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    for suffix, factor in (('k', 1_000), ('m', 1_000_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="题库与调度路径的基准测试")
+    parser.add_argument('--sizes', help="题库规模，逗号分隔（如 1k,10k,100k）")
+    parser.add_argument('--full', action='store_true', help="包含 1M 道题")
+    parser.add_argument('--json', default=DEFAULT_RESULTS, help="结果文件（- 表示标准输出）")
+    parser.add_argument('--budget', default=str(BUDGET_PATH), help="预算文件")
+    parser.add_argument('--no-budget', action='store_true', help="不检查预算")
+    parser.add_argument('--data-dir', default=str(Path(tempfile.gettempdir()) / 'fund_exam_bench'),
+                        help="合成题库目录（生成一次后复用）")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    data_dir = Path(args.data_dir)
+
+    if args.child is not None:
+        result = run_size(args.child, data_dir)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return 0
+
+    if args.sizes:
+        sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    else:
+        sizes = list(FULL_SIZES if args.full else DEFAULT_SIZES)
+
+    results = []
+    for size in sizes:
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+            result_path = tmp.name
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(size),
+                            '--result', result_path, '--data-dir', str(data_dir)], check=True)
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        finally:
+            os.unlink(result_path)
+        results.append(result)
+        print_table(result)
+
+    output = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    failures = []
+    if not args.no_budget:
+        try:
+            with open(args.budget, 'r', encoding='utf-8') as f:
+                budget = json.load(f)
+        except FileNotFoundError:
+            print(f"\n预算文件不存在: {args.budget}")
+            budget = {}
+        failures = check_budget(results, budget)
+        output['budget_failures'] = failures
+
+    if args.json == '-':
+        json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+    if failures:
+        print("\n" + "!" * 60)
+        print(f"性能预算超标 {len(failures)} 项:")
+        for line in failures:
+            print(f"  ✗ {line}")
+        print("!" * 60)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式题库（内存常驻版）
+
+所有文本放在一个连续字符串里，每个字段只保存偏移量:
+    文本区    [ID, 题干, 解析] * N  +  去重后的选项文本
+    记录偏移  3N + 1 个起始位置，第 i 题字段 f 为 [off[3i+f], off[3i+f+1])
+    选项引用  4N 个选项池下标（A-D，-1 表示没有该选项）
+    答案编码  N 个字节，存放答案字母的 ASCII 码
+    科目编码  N 个 2 字节科目表下标（科目只有少数几个）
+
+"以上都是"、"3"、"5" 这类重复选项在选项池中只存一份。
+与 compiled_bank.CompiledBank 一样，按下标访问时才生成 Question 对象，
+可直接传给 QuestionBank。
+"""
+
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, List
+
+from question_bank import Question, OPTION_KEYS
+
+
+# 记录字段顺序
+_ID, _TITLE, _ANALYSIS = 0, 1, 2
+_FIELDS = 3
+
+# 答案编码：0 表示无答案，0xFF 表示不是单个 ASCII 字母（原文保存在旁表中）
+_NO_ANSWER = 0
+_ODD_ANSWER = 0xFF
+
+
+class ColumnarBank(Sequence):
+    """只读的列式题目序列"""
+
+    def __init__(self, questions: Iterable[Question] = ()):
+        record_parts = []
+        pool_parts = []
+        pool_index: Dict[str, int] = {}
+
+        self._option_refs = array('i')
+        self._answers = array('B')
+        self._odd_answers: Dict[int, str] = {}
+        self._subject_codes = array('H')
+        self._subjects: List[str] = []
+        subject_index: Dict[str, int] = {}
+
+        for i, question in enumerate(questions):
+            record_parts.append(question.id)
+            record_parts.append(question.title)
+            record_parts.append(question.analysis)
+
+            options = question.options
+            for opt in OPTION_KEYS:
+                text = options.get(opt)
+                if not isinstance(text, str):
+                    self._option_refs.append(-1)
+                    continue
+                ref = pool_index.get(text)
+                if ref is None:
+                    ref = pool_index[text] = len(pool_parts)
+                    pool_parts.append(text)
+                self._option_refs.append(ref)
+
+            code = subject_index.get(question.subject)
+            if code is None:
+                code = subject_index[question.subject] = len(self._subjects)
+                self._subjects.append(question.subject)
+            self._subject_codes.append(code)
+
+            answer = question.answer
+            if not answer:
+                self._answers.append(_NO_ANSWER)
+            elif len(answer) == 1 and ord(answer) < _ODD_ANSWER:
+                self._answers.append(ord(answer))
+            else:
+                self._answers.append(_ODD_ANSWER)
+                self._odd_answers[i] = answer
+
+        self._count = len(self._answers)
+
+        # 记录字段在前，选项池在后，共用同一段文本
+        self._offsets = array('I', [0])
+        position = 0
+        for part in record_parts:
+            position += len(part)
+            self._offsets.append(position)
+        self._pool_offsets = array('I', [position])
+        for part in pool_parts:
+            position += len(part)
+            self._pool_offsets.append(position)
+        self._text = ''.join(record_parts) + ''.join(pool_parts)
+
+    # ---- 按字段读取（不生成 Question 对象） ----
+
+    def _field(self, index: int, field: int) -> str:
+        base = index * _FIELDS + field
+        return self._text[self._offsets[base]:self._offsets[base + 1]]
+
+    def _check(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return index
+
+    def id_at(self, index: int) -> str:
+        """第 index 题的 ID"""
+        return self._field(self._check(index), _ID)
+
+    def title_at(self, index: int) -> str:
+        """第 index 题的题干"""
+        return self._field(self._check(index), _TITLE)
+
+    def analysis_at(self, index: int) -> str:
+        """第 index 题的解析"""
+        return self._field(self._check(index), _ANALYSIS)
+
+    def answer_at(self, index: int) -> str:
+        """第 index 题的答案"""
+        index = self._check(index)
+        code = self._answers[index]
+        if code == _NO_ANSWER:
+            return ''
+        if code == _ODD_ANSWER:
+            return self._odd_answers[index]
+        return chr(code)
+
+    def subject_at(self, index: int) -> str:
+        """第 index 题的科目"""
+        return self._subjects[self._subject_codes[self._check(index)]]
+
+    def options_at(self, index: int) -> Dict[str, str]:
+        """第 index 题的选项（只包含存在的 A-D）"""
+        base = self._check(index) * len(OPTION_KEYS)
+        pool = self._pool_offsets
+        options = {}
+        for k, opt in enumerate(OPTION_KEYS):
+            ref = self._option_refs[base + k]
+            if ref >= 0:
+                options[opt] = self._text[pool[ref]:pool[ref + 1]]
+        return options
+
+    # ---- 序列接口 ----
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Question:
+        index = self._check(index)
+        return Question(
+            self._field(index, _ID),
+            self._field(index, _TITLE),
+            self.options_at(index),
+            self.answer_at(index),
+            self._field(index, _ANALYSIS),
+            self._subjects[self._subject_codes[index]],
+        )
+
+    @property
+    def option_pool_size(self) -> int:
+        """去重后的选项文本数"""
+        return len(self._pool_offsets) - 1
+
+    def nbytes(self) -> int:
+        """估算占用内存（字节）"""
+        total = sys.getsizeof(self._text)
+        for arr in (self._offsets, self._pool_offsets, self._option_refs, self._answers,
+                    self._subject_codes):
+            total += arr.buffer_info()[1] * arr.itemsize
+        total += sys.getsizeof(self._odd_answers)
+        return total
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+编译题库（二进制格式 + mmap 按需解码）
+
+文件布局:
+    文件头    魔数、版本、题目数、源 JSON 的 mtime 和 SHA-256
+    偏移表    (题目数 + 1) 个 8 字节小端偏移量，第 i 条记录为 [off[i], off[i+1])
+    数据区    UTF-8 记录，每条为 "ID" + 0x1F + JSON [title, options, answer, analysis, subject]
+    签名区    每条记录的近似去重签名（64 个 4 字节小端整数，文本为空时全为 0xFF），从 off[题目数] 开始
+
+加载时只映射文件、读取文件头，显示某道题时才解码对应记录。
+题库中只有去重后保留的题目；重新编译时，内容与旧文件中某条记录完全相同的题目
+直接取用保存的签名，只有新增和修改的题目需要重新计算。
+
+用法:
+    python3 compiled_bank.py [questions.json] [输出文件]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from near_duplicates import NUM_BINS, NearDuplicateFilter, question_signature
+from question_bank import Question, DEFAULT_BANK_PATH, load_questions_json
+
+
+MAGIC = b'FQB1'
+VERSION = 3
+# 魔数, 版本, 保留, 题目数, 源文件 mtime_ns, 源文件 SHA-256
+HEADER = struct.Struct('<4sHHIQ32s')
+OFFSET = struct.Struct('<Q')
+ID_SEPARATOR = b'\x1f'
+SIGNATURE_SIZE = NUM_BINS * 4
+NO_SIGNATURE = b'\xff' * SIGNATURE_SIZE
+
+# 编译题库默认扩展名（与 JSON 放在同一目录）
+COMPILED_SUFFIX = '.qbank'
+
+
+def compiled_path_for(json_path: Path) -> Path:
+    """JSON 题库对应的编译题库路径"""
+    return Path(json_path).with_suffix(COMPILED_SUFFIX)
+
+
+def file_digest(path: Path) -> bytes:
+    """计算文件 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def encode_question(question: Question) -> bytes:
+    """编码单条记录"""
+    body = json.dumps(
+        [question.title, question.options, question.answer, question.analysis,
+         question.subject],
+        ensure_ascii=False, separators=(',', ':'),
+    )
+    return question.id.encode('utf-8') + ID_SEPARATOR + body.encode('utf-8')
+
+
+def record_key(record: bytes) -> bytes:
+    """记录内容哈希（查找已保存的签名用）"""
+    return hashlib.blake2b(record, digest_size=16).digest()
+
+
+def encode_signature(sig: Optional[array]) -> bytes:
+    if sig is None:
+        return NO_SIGNATURE
+    if sys.byteorder == 'big':
+        sig = array('I', sig)
+        sig.byteswap()
+    return sig.tobytes()
+
+
+def pack_signatures(signatures: Iterable[Optional[array]]) -> bytearray:
+    """把签名依次编码为签名区的内容（一块连续内存，之后可以释放各个签名对象）"""
+    packed = bytearray()
+    for sig in signatures:
+        packed += encode_signature(sig)
+    return packed
+
+
+def decode_signature(raw: bytes) -> Optional[array]:
+    if raw == NO_SIGNATURE:
+        return None
+    sig = array('I', raw)
+    if sys.byteorder == 'big':
+        sig.byteswap()
+    return sig
+
+
+def write_compiled(questions: Iterable[Question], out_path: Path,
+                   source_mtime_ns: int = 0, source_digest: bytes = b'',
+                   signatures: Union[List[Optional[array]], bytearray, None] = None) -> int:
+    """写入编译题库（先写临时文件再原子替换），返回题目数
+
+    signatures 为各题的近似去重签名（与 questions 一一对应，或 pack_signatures() 的结果），
+    未给出时现算。
+    """
+    questions = list(questions)
+    records = [encode_question(q) for q in questions]
+    count = len(records)
+    if signatures is None:
+        signatures = (question_signature(q) for q in questions)
+    if not isinstance(signatures, (bytes, bytearray)):
+        signatures = pack_signatures(signatures)
+    if len(signatures) != SIGNATURE_SIZE * count:
+        raise ValueError(f"签名数 {len(signatures) // SIGNATURE_SIZE} 与题目数 {count} 不一致")
+
+    offsets = []
+    position = HEADER.size + OFFSET.size * (count + 1)
+    for record in records:
+        offsets.append(position)
+        position += len(record)
+    offsets.append(position)
+
+    out_path = Path(out_path)
+    tmp_path = out_path.with_name(out_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, count, source_mtime_ns,
+                            source_digest.ljust(32, b'\0')))
+        f.write(b''.join(OFFSET.pack(off) for off in offsets))
+        f.write(b''.join(records))
+        f.write(signatures)
+    os.replace(tmp_path, out_path)
+    return count
+
+
+def load_signatures(path: Path) -> Dict[bytes, Optional[array]]:
+    """编译题库中保存的签名：记录内容哈希 -> 签名（文件不存在或格式不符时为空）
+
+    不检查是否过期：只要记录内容相同，签名就相同。
+    """
+    try:
+        bank = CompiledBank(path)
+    except (OSError, ValueError):
+        return {}
+    try:
+        return {bank.record_key_at(i): bank.signature_at(i) for i in range(len(bank))}
+    except (IndexError, ValueError, struct.error):
+        return {}
+    finally:
+        bank.close()
+
+
+class StoredSignatures:
+    """近似去重签名：题目内容与编译题库中某条记录完全相同时取保存的签名，否则现算
+
+    保存的签名在第二次查找时才读取：第一道题直接现算，流式加载时不必等读完签名就能显示。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._known: Optional[Dict[bytes, Optional[array]]] = None
+        self._first_key: Optional[bytes] = None
+        self.reused = 0
+
+    def _load(self) -> Dict[bytes, Optional[array]]:
+        if self._known is None:
+            self._known = load_signatures(self.path)
+            # 第一道题是现算的，内容与保存的记录相同时同样算作复用
+            if self._first_key is not None and self._first_key in self._known:
+                self.reused += 1
+        return self._known
+
+    def __call__(self, question: Question) -> Optional[array]:
+        if self._known is None and self._first_key is None:
+            self._first_key = record_key(encode_question(question))
+            return question_signature(question)
+        known = self._load()
+        if known:
+            key = record_key(encode_question(question))
+            if key in known:
+                self.reused += 1
+                return known[key]
+        return question_signature(question)
+
+    def covers(self, count: int) -> bool:
+        """count 道题的签名是否全部取自保存的签名，且没有多余的（无需重新写入）"""
+        known = self._load()
+        return self.reused == count == len(known)
+
+
+def near_duplicate_filter(source_path: Path) -> NearDuplicateFilter:
+    """题库来源对应的近似去重过滤器（复用其编译题库中保存的签名）"""
+    try:
+        compiled_path = compiled_path_for(source_path)
+    except ValueError:
+        return NearDuplicateFilter()
+    return NearDuplicateFilter(signature_of=StoredSignatures(compiled_path))
+
+
+def compile_bank(json_path: Path = DEFAULT_BANK_PATH,
+                 out_path: Optional[Path] = None) -> Path:
+    """把 JSON 题库编译为二进制题库（题目校验规则与 JSON 加载一致）"""
+    json_path = Path(json_path)
+    out_path = Path(out_path) if out_path else compiled_path_for(json_path)
+    stat = json_path.stat()
+    dedup = NearDuplicateFilter(signature_of=StoredSignatures(out_path))
+    questions = load_questions_json(json_path, dedup)
+    write_compiled(questions, out_path, stat.st_mtime_ns, file_digest(json_path), dedup.signatures)
+    return out_path
+
+
+def read_header(path: Path) -> Optional[Tuple[int, int, bytes]]:
+    """读取文件头，返回 (题目数, 源 mtime_ns, 源 SHA-256)，格式不符时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, version, _, count, mtime_ns, digest = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return count, mtime_ns, digest
+
+
+def is_up_to_date(json_path: Path, compiled_path: Path) -> bool:
+    """编译题库是否与 JSON 一致：mtime 相同直接认可，否则比较内容哈希"""
+    header = read_header(compiled_path)
+    if header is None:
+        return False
+    _, mtime_ns, digest = header
+    source_mtime_ns = Path(json_path).stat().st_mtime_ns
+    if mtime_ns == source_mtime_ns:
+        return True
+    if digest != file_digest(json_path):
+        return False
+    # 内容未变（例如只是 touch 过），更新记录的 mtime，下次免去哈希计算
+    try:
+        with open(compiled_path, 'r+b') as f:
+            f.seek(HEADER.size - 32 - 8)
+            f.write(struct.pack('<Q', source_mtime_ns))
+    except OSError:
+        pass
+    return True
+
+
+class CompiledBank(Sequence):
+    """只读、按需解码的题目序列（可直接传给 QuestionBank）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        magic, version, _, count, _, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"不是有效的编译题库: {self.path}")
+        self._count = count
+        # 签名区紧接在数据区之后
+        self._signature_base, = OFFSET.unpack_from(self._mm, HEADER.size + OFFSET.size * count)
+
+    def _span(self, index: int) -> Tuple[int, int]:
+        """第 index 条记录在文件中的 [起, 止) 位置"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        base = HEADER.size + OFFSET.size * index
+        start, = OFFSET.unpack_from(self._mm, base)
+        end, = OFFSET.unpack_from(self._mm, base + OFFSET.size)
+        return start, end
+
+    def id_at(self, index: int) -> str:
+        """只解码记录的 ID"""
+        start, end = self._span(index)
+        sep = self._mm.find(ID_SEPARATOR, start, end)
+        return self._mm[start:sep].decode('utf-8')
+
+    def record_key_at(self, index: int) -> bytes:
+        """第 index 条记录的内容哈希（与 record_key(encode_question(q)) 相同）"""
+        start, end = self._span(index)
+        return record_key(self._mm[start:end])
+
+    def signature_at(self, index: int) -> Optional[array]:
+        """第 index 条记录保存的近似去重签名"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start = self._signature_base + SIGNATURE_SIZE * index
+        raw = self._mm[start:start + SIGNATURE_SIZE]
+        if len(raw) != SIGNATURE_SIZE:
+            raise ValueError(f"编译题库签名区不完整: {self.path}")
+        return decode_signature(raw)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Question:
+        start, end = self._span(index)
+        raw = self._mm[start:end]
+        sep = raw.index(ID_SEPARATOR)
+        title, options, answer, analysis, subject = json.loads(raw[sep + 1:].decode('utf-8'))
+        return Question(raw[:sep].decode('utf-8'), title, options, answer, analysis, subject)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self):
+        """关闭映射和文件（可重复调用，之后不能再读取）"""
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except AttributeError:
+            # 构造时打开映射失败
+            pass
+
+
+def open_compiled(json_path: Path = DEFAULT_BANK_PATH) -> CompiledBank:
+    """打开 JSON 对应的编译题库，不存在或已过期时先重新编译"""
+    json_path = Path(json_path)
+    compiled_path = compiled_path_for(json_path)
+    if not is_up_to_date(json_path, compiled_path):
+        print(f"编译题库: {json_path} -> {compiled_path}")
+        compile_bank(json_path, compiled_path)
+    return CompiledBank(compiled_path)
+
+
+def main():
+    json_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BANK_PATH
+    out_path = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+    out_path = compile_bank(json_path, out_path)
+    header = read_header(out_path)
+    print(f"已写入 {out_path}（{header[0]} 道题目，{out_path.stat().st_size} 字节）")
+
+
+if __name__ == "__main__":
+    main()
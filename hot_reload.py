@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+题库热重载（不依赖任何界面框架）
+
+修改 questions.json（或分片题库）后不用重启程序:
+
+    1. 界面发现文件变化（桌面版 QFileSystemWatcher，Android / 终端版轮询 changed()）
+    2. 后台线程调用 build()：重新读取文件，按 ID + 内容哈希与当前题库比较，
+       只对新增或修改的题目做近似去重（计算签名并与其余题目比较；未变的题目
+       沿用缓存的签名，彼此之间不再比较；第一次重新加载时取编译题库中保存的签名），
+       构建新的列式存储、出题顺序和 ID 索引，组成不可变的快照
+    3. 界面线程调用 apply() 一次换入快照，停留在同一 ID 的题目上
+
+用户答案按 ID 记录，换入后自动保留；朗读和自动轮播不受影响。
+文件保存到一半（JSON 不完整）或变为空时保留当前题库，等下一次修改。
+"""
+
+import random
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from question_bank import QuestionBank, Question, iter_questions
+from near_duplicates import NearDuplicateFilter, answer_text, question_signature
+
+
+def question_digest(question: Question) -> int:
+    """题目内容哈希（只含显示和判分用到的字段，与存储格式无关；只在本进程内比较）"""
+    return hash((question.id, question.title, question.answer, question.analysis,
+                 question.subject, tuple(question.option_items())))
+
+
+def source_stamp(path: Path) -> Tuple:
+    """题库来源的修改标记（各文件的 mtime 和大小），用于轮询是否变化"""
+    from sharded_bank import is_sharded_source, resolve_shards
+    paths = [Path(path)]
+    if is_sharded_source(path):
+        try:
+            paths += [shard_path for shard_path, _ in resolve_shards(path)]
+        except (OSError, ValueError):
+            pass
+    stamp = []
+    for p in paths:
+        try:
+            st = p.stat()
+            stamp.append((str(p), st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((str(p), None, None))
+    return tuple(stamp)
+
+
+class BankSnapshot:
+    """重新加载得到的题库快照（构建后不再修改）"""
+
+    __slots__ = ('base', 'records', 'order', 'positions', 'added', 'changed', 'removed')
+
+    def __init__(self, base: Sequence[Question], records: Sequence[Question], order: array,
+                 positions: Dict[str, int], added: Set[str], changed: Set[str], removed: Set[str]):
+        # 构建时所基于的旧记录（换入前题库已被替换时放弃本快照）
+        self.base = base
+        self.records = records
+        self.order = order
+        # ID -> 位置（按出题顺序排列，可直接作为题目 ID 序列）
+        self.positions = positions
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+
+    def summary(self) -> str:
+        return (f"题库已更新：新增 {len(self.added)} 道，修改 {len(self.changed)} 道，"
+                f"删除 {len(self.removed)} 道，共 {len(self.order)} 道")
+
+
+class BankReloader:
+    """增量重新加载器
+
+    build() 在后台线程运行，apply() 在界面线程运行；同一时间只能有一个 build()。
+    """
+
+    def __init__(self, path: Path, shuffle: bool = True):
+        self.path = Path(path)
+        self.shuffle = shuffle
+        self.stamp = source_stamp(self.path)
+        # 当前题库各题 ID -> 内容哈希（第一次重新加载时由旧题库计算）
+        self._digests: Dict[str, int] = {}
+        # 内容哈希 -> (近似去重签名, 答案文本)
+        self._fingerprints: Dict[int, Tuple[Optional[array], str]] = {}
+
+    def changed(self) -> bool:
+        """文件是否在上次加载之后被修改（只做 stat）"""
+        return source_stamp(self.path) != self.stamp
+
+    def watch_paths(self) -> List[Path]:
+        """需要监视的路径：题库文件及其所在目录（编辑器常用 "写临时文件再改名" 的方式保存）"""
+        from sharded_bank import is_sharded_source, resolve_shards
+        paths = [self.path]
+        if is_sharded_source(self.path):
+            try:
+                paths += [shard_path for shard_path, _ in resolve_shards(self.path)]
+            except (OSError, ValueError):
+                pass
+        if not self.path.is_dir():
+            paths.append(self.path.parent)
+        return [p for p in paths if p.exists()]
+
+    # ---- 后台线程 ----
+
+    def _parse(self) -> List[Question]:
+        from sharded_bank import is_sharded_source, merge_by_id, parse_shards, resolve_shards
+        if is_sharded_source(self.path):
+            return merge_by_id(parse_shards(resolve_shards(self.path)))
+        return list(iter_questions(self.path))
+
+    def build(self, records: Sequence[Question], order: array) -> Optional[BankSnapshot]:
+        """读取文件并与当前题库（records + 出题顺序 order 的副本）比较，没有变化或出错时返回 None"""
+        self.stamp = source_stamp(self.path)
+        try:
+            questions = self._parse()
+        except Exception as e:
+            print(f"重新加载题库失败，保留当前题库: {e}")
+            return None
+        if not questions:
+            print("重新加载得到的题库为空，保留当前题库")
+            return None
+
+        if not self._digests:
+            for question in records:
+                self._digests.setdefault(question.id, question_digest(question))
+
+        # 近似去重（规则与启动时加载一致）：上次保留且内容未变的题目彼此不重复，直接登记；
+        # 其余题目（新增、修改、上次被判为重复的）再与全部题目比较
+        kept_digests = set(self._digests.values())
+        digest_list = [question_digest(question) for question in questions]
+        signature_of = question_signature
+        if not self._fingerprints:
+            from compiled_bank import StoredSignatures, compiled_path_for
+            signature_of = StoredSignatures(compiled_path_for(self.path))
+        fingerprints: Dict[int, Tuple[Optional[array], str]] = {}
+        for question, digest in zip(questions, digest_list):
+            if digest not in fingerprints:
+                fingerprint = self._fingerprints.get(digest)
+                if fingerprint is None:
+                    fingerprint = (signature_of(question), answer_text(question))
+                fingerprints[digest] = fingerprint
+        self._fingerprints = fingerprints
+
+        dedup = NearDuplicateFilter()
+        keep = [False] * len(questions)
+        for i, digest in enumerate(digest_list):
+            if digest in kept_digests:
+                kept_digests.discard(digest)
+                dedup.register(questions[i].id, *fingerprints[digest])
+                keep[i] = True
+        for i, digest in enumerate(digest_list):
+            if not keep[i]:
+                keep[i] = dedup.check_signature(questions[i].id, *fingerprints[digest]) is None
+        if dedup.clusters:
+            print(f"跳过 {dedup.duplicate_count} 道近似重复题目（{len(dedup.clusters)} 组）")
+
+        kept: List[Question] = []
+        kept_signatures: List[Optional[array]] = []
+        digests: Dict[str, int] = {}
+        for question, digest, keep_it in zip(questions, digest_list, keep):
+            if keep_it:
+                kept.append(question)
+                kept_signatures.append(fingerprints[digest][0])
+                digests.setdefault(question.id, digest)
+
+        old = self._digests
+        added = {qid for qid in digests if qid not in old}
+        removed = {qid for qid in old if qid not in digests}
+        changed = {qid for qid, digest in digests.items() if qid in old and old[qid] != digest}
+        self._digests = digests
+        if not (added or removed or changed):
+            return None
+
+        # 出题顺序：原有题目保持原来的相对顺序，新题目排在最后
+        index: Dict[str, int] = {}
+        for i, question in enumerate(kept):
+            index.setdefault(question.id, i)
+        id_at = getattr(records, 'id_at', None) or (lambda i: records[i].id)
+        new_order = array('I')
+        used = set()
+        for record in order:
+            i = index.get(id_at(record))
+            if i is not None and i not in used:
+                used.add(i)
+                new_order.append(i)
+        rest = [i for i in range(len(kept)) if i not in used]
+        if self.shuffle:
+            random.shuffle(rest)
+        new_order.extend(rest)
+        positions: Dict[str, int] = {}
+        for position, i in enumerate(new_order):
+            positions.setdefault(kept[i].id, position)
+
+        from columnar_bank import ColumnarBank
+        snapshot = BankSnapshot(records, ColumnarBank(kept), new_order, positions, added, changed, removed)
+        self._write_compiled(kept, kept_signatures)
+        return snapshot
+
+    def _write_compiled(self, questions: List[Question], signatures: List[Optional[array]]):
+        """更新编译题库（连同去重签名），下次启动时直接打开（加载期间文件又被修改时不写）"""
+        from sharded_bank import is_sharded_source, save_signatures
+        if is_sharded_source(self.path):
+            save_signatures(self.path, questions, signatures)
+            return
+        try:
+            source_mtime_ns = self.stamp[0][1]
+            if self.path.stat().st_mtime_ns != source_mtime_ns:
+                return
+            from compiled_bank import compiled_path_for, file_digest, write_compiled
+            write_compiled(questions, compiled_path_for(self.path),
+                           source_mtime_ns, file_digest(self.path), signatures)
+        except Exception as e:
+            print(f"写入编译题库失败: {e}")
+
+    # ---- 界面线程 ----
+
+    def apply(self, bank: QuestionBank, snapshot: BankSnapshot) -> bool:
+        """换入快照，停留在同一 ID 的题目上（该题已删除时停在原来的位置）
+
+        构建期间题库已被替换时放弃快照，下次检查时重新加载。
+        """
+        if bank.records is not snapshot.base:
+            self.stamp = None
+            self._digests = {}
+            return False
+        current = bank.current
+        index = snapshot.positions.get(current.id) if current is not None else None
+        if index is None:
+            index = min(bank.current_index, max(len(snapshot.order) - 1, 0))
+        bank.replace_records(snapshot.records, snapshot.order, index, snapshot.positions)
+        print(snapshot.summary())
+        return True
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主线程事件循环延迟监控（不依赖任何界面框架）
+
+界面用高频定时器（Qt 的 QTimer、Kivy 的 Clock）调用 beat()，每次心跳比预期晚到的
+时间记入对数分桶直方图（类似 HdrHistogram，相对误差约 3%），给出 p50/p99/最大值。
+另有一个看门狗线程：主线程超过阈值没有心跳时，用 sys._current_frames() 采样主线程的
+调用栈并打印，便于找出卡住拖动和按钮响应的代码（JSON 解析、排版、语音引擎调用等）。
+
+统计结果在隐藏的诊断视图中显示（桌面版 Ctrl+Shift+L，Android 长按“统计”），
+并在退出时写入用户数据目录的 lag_monitor.json。默认关闭，设置 FUND_EXAM_LAG_MONITOR=1 开启
+（心跳定时器会不停唤醒主线程，只在诊断卡顿时使用）。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ENABLED = os.environ.get('FUND_EXAM_LAG_MONITOR', '0') not in ('', '0')
+
+LAG_REPORT_NAME = 'lag_monitor.json'
+# 超过该时长没有心跳视为卡顿（秒）
+STALL_THRESHOLD = 0.2
+# 每次卡顿最多采样几次调用栈、保留最近几次卡顿、每个调用栈保留几层
+MAX_SAMPLES_PER_STALL = 5
+MAX_STALLS = 20
+STACK_DEPTH = 12
+
+# 直方图：每个 2 的幂区间分成 32 个子桶，单位微秒
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# 最大可记录约 2^36 微秒（约 19 小时），更大的值计入最后一个桶
+BUCKET_COUNT = (36 - SUB_BUCKET_BITS) * SUB_BUCKETS
+
+
+def _bucket_index(value: int) -> int:
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS - 1)
+    return min(shift * SUB_BUCKETS + (value >> shift), BUCKET_COUNT - 1)
+
+
+def _bucket_upper(index: int) -> int:
+    """桶内可能的最大值（微秒）"""
+    shift = max(0, index // SUB_BUCKETS - 1)
+    return ((index - shift * SUB_BUCKETS + 1) << shift) - 1
+
+
+class LagHistogram:
+    """对数分桶直方图（微秒）"""
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, micros: int):
+        micros = max(0, int(micros))
+        self.counts[_bucket_index(micros)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, p: float) -> int:
+        """第 p 百分位（0-100）的上界，没有数据时为 0"""
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * p / 100 + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def buckets(self) -> List[List[int]]:
+        """非空的桶：[[上界微秒, 次数], ...]"""
+        return [[_bucket_upper(i), n] for i, n in enumerate(self.counts) if n]
+
+
+class LagMonitor:
+    """心跳延迟统计 + 卡顿时采样主线程调用栈的看门狗"""
+
+    def __init__(self, interval: float, stall_threshold: float = STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.histogram = LagHistogram()
+        self.stalls: List[Dict] = []
+        self.stall_count = 0
+        self._main_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._paused = False
+        self._open_stall: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """开始监控（在主线程调用）"""
+        self._main_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._watchdog = threading.Thread(target=self._watch, name='lag-watchdog', daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def pause(self):
+        """应用切到后台（心跳停止）时暂停，避免误报卡顿"""
+        self._paused = True
+
+    def resume(self):
+        self._last_beat = time.monotonic()
+        self._paused = False
+
+    def beat(self, *args):
+        """心跳（主线程上的定时器回调）"""
+        now = time.monotonic()
+        lag = now - self._last_beat - self.interval
+        self._last_beat = now
+        if self._paused:
+            return
+        self.histogram.record(lag * 1_000_000)
+        if self._open_stall is not None:
+            with self._lock:
+                stall, self._open_stall = self._open_stall, None
+            stall['duration'] = lag + self.interval
+            print(f"主线程卡顿 {stall['duration'] * 1000:.0f} 毫秒")
+
+    def _watch(self):
+        """看门狗线程：心跳超时时采样主线程调用栈"""
+        while not self._stop.wait(self.stall_threshold / 2):
+            if self._paused:
+                continue
+            last = self._last_beat
+            silent = time.monotonic() - last
+            if silent < self.stall_threshold:
+                continue
+            with self._lock:
+                stall = self._open_stall
+                if stall is None or stall['beat'] != last:
+                    stall = {'beat': last, 'time': time.time() - silent, 'duration': None, 'samples': []}
+                    self._open_stall = stall
+                    self.stall_count += 1
+                    self.stalls.append(stall)
+                    del self.stalls[:-MAX_STALLS]
+                if len(stall['samples']) >= MAX_SAMPLES_PER_STALL:
+                    continue
+                stack = self._sample()
+                stall['samples'].append({'after': round(silent, 3), 'stack': stack})
+            if len(stall['samples']) == 1:
+                print(f"主线程已 {silent * 1000:.0f} 毫秒没有响应，调用栈:\n" + ''.join(stack), end='')
+
+    def _sample(self) -> List[str]:
+        frame = sys._current_frames().get(self._main_thread)
+        if frame is None:
+            return []
+        return traceback.format_stack(frame)[-STACK_DEPTH:]
+
+    def summary_lines(self) -> List[str]:
+        """诊断视图显示的文本行"""
+        h = self.histogram
+        if not h.count:
+            return ["事件循环延迟：暂无数据"]
+        lines = [f"事件循环延迟（{h.count} 次心跳，间隔 {self.interval * 1000:.0f} 毫秒）："
+                 f"p50 {h.percentile(50) / 1000:.1f}，p99 {h.percentile(99) / 1000:.1f}，"
+                 f"最大 {h.max / 1000:.1f} 毫秒"]
+        if self.stall_count:
+            worst = max((s['duration'] or 0 for s in self.stalls), default=0)
+            lines.append(f"卡顿（超过 {self.stall_threshold * 1000:.0f} 毫秒）：{self.stall_count} 次，"
+                         f"最近 {len(self.stalls)} 次中最长 {worst * 1000:.0f} 毫秒")
+            top = next((s['samples'][0]['stack'][-1] for s in reversed(self.stalls)
+                        if s['samples'] and s['samples'][0]['stack']), None)
+            if top:
+                lines.append("最近一次卡在：" + top.strip().splitlines()[0])
+        return lines
+
+    def report(self) -> Dict:
+        h = self.histogram
+        with self._lock:
+            stalls = [{key: value for key, value in stall.items() if key != 'beat'} for stall in self.stalls]
+        return {
+            'interval_ms': self.interval * 1000,
+            'stall_threshold_ms': self.stall_threshold * 1000,
+            'beats': h.count,
+            'p50_ms': h.percentile(50) / 1000,
+            'p90_ms': h.percentile(90) / 1000,
+            'p99_ms': h.percentile(99) / 1000,
+            'p999_ms': h.percentile(99.9) / 1000,
+            'max_ms': h.max / 1000,
+            'mean_ms': h.mean / 1000,
+            'stall_count': self.stall_count,
+            'stalls': stalls,
+            'histogram_us': h.buckets(),
+        }
+
+    def dump(self, path: Optional[Path] = None) -> Optional[Path]:
+        """写入用户数据目录的 lag_monitor.json"""
+        if path is None:
+            from question_bank import user_data_path
+            path = user_data_path(LAG_REPORT_NAME)
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            print(f"保存延迟统计失败: {e}")
+            return None
+        return Path(path)
+
+
+def start_monitor(interval: float) -> Optional[LagMonitor]:
+    """创建并启动监控（在主线程调用），未设置 FUND_EXAM_LAG_MONITOR=1 时返回 None"""
+    if not ENABLED:
+        return None
+    monitor = LagMonitor(interval)
+    monitor.start()
+    return monitor
+
+
+def main():
+    """查看上次保存的延迟统计"""
+    from question_bank import user_data_path
+    try:
+        with open(user_data_path(LAG_REPORT_NAME), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        print("还没有延迟统计（设置 FUND_EXAM_LAG_MONITOR=1 运行桌面版或 Android 版，退出后生成）")
+        return 1
+    print(f"心跳 {report['beats']} 次（间隔 {report['interval_ms']:.0f} 毫秒）")
+    for name in ('p50', 'p90', 'p99', 'p999', 'max'):
+        print(f"  {name:<5} {report[name + '_ms']:8.1f} 毫秒")
+    print(f"卡顿 {report['stall_count']} 次（超过 {report['stall_threshold_ms']:.0f} 毫秒）")
+    for stall in report['stalls']:
+        duration = f"{stall['duration'] * 1000:.0f} 毫秒" if stall['duration'] else "未恢复"
+        print(f"\n{time.strftime('%H:%M:%S', time.localtime(stall['time']))}  {duration}")
+        if stall['samples']:
+            print(''.join(stall['samples'][0]['stack']), end='')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,20 +4,40 @@
 基金从业从业资格证答题悬浮软件（修复语音引擎调用错误）
 """
 
+# 最先导入：以此为起点记录各启动阶段的耗时
+import startup_profile
+import tracing
+
 import sys
-import json
 import os
-import random
-from pathlib import Path
-from typing import List, Dict
+import threading
+import time
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, 
-    QHBoxLayout, QRadioButton, QButtonGroup, QTextEdit, QScrollArea
+    QHBoxLayout, QRadioButton, QButtonGroup, QTextEdit, QScrollArea, QLineEdit
 )
-from PyQt6.QtCore import Qt, QTimer, QPoint
-from PyQt6.QtGui import QFont, QColor, QPainter, QPen, QBrush
-from PyQt6.QtTextToSpeech import QTextToSpeech
+from PyQt6.QtCore import Qt, QTimer, QPoint, QObject, QThread, QUrl, QFileSystemWatcher, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QPainter, QPen, QBrush, QKeySequence, QShortcut
+
+from question_bank import BankLoader, QuestionBank, OPTION_KEYS, user_data_path
+from answer_stats import AnswerStats
+from answer_store import open_store
+from lag_monitor import start_monitor
+from auto_play import ADVANCING, GAP, SHOWING, SPEAKING, AutoPlayMachine, load_gaps
+from render_cache import RenderCache
+from speech import SpeechQueue, load_tts_choice, question_segments, save_tts_choice
+from theme import apply_theme, load_theme_name, next_theme, save_theme_name, set_state
+from scheduler import REVIEW_STATE_NAME, ReviewScheduler
+
+startup_profile.mark('imports')
+
+# 事件循环心跳间隔（秒）
+LAG_HEARTBEAT_INTERVAL = 0.01
+# 题库文件变化后等待多久再重新加载（毫秒），编辑器保存时可能连续写入多次
+RELOAD_DEBOUNCE_MS = 300
+# 搜索框停止输入多久后再检索（毫秒），连续输入时只检索最后一次
+SEARCH_DEBOUNCE_MS = 150
 
 
 class ScrollableOptionWidget(QWidget):
@@ -38,23 +58,12 @@ class ScrollableOptionWidget(QWidget):
         
         # 单选按钮
         self.radio_button = QRadioButton()
-        self.radio_button.setStyleSheet("""
-            QRadioButton::indicator {
-                width: 15px;
-                height: 15px;
-            }
-        """)
+        self.radio_button.setObjectName("optionRadio")
         layout.addWidget(self.radio_button, 0)  # 不拉伸
         
         # 文本标签（自动换行，不滚动）
         self.text_label = QLabel()
-        self.text_label.setStyleSheet("""
-            QLabel {
-                font-size: 12px;
-                padding: 5px;
-                background: transparent;
-            }
-        """)
+        self.text_label.setObjectName("optionText")
         self.text_label.setWordWrap(True)  # 自动换行
         self.text_label.setTextFormat(Qt.TextFormat.PlainText)
         self.text_label.setMinimumHeight(25)  # 设置最小高度
@@ -68,6 +77,12 @@ class ScrollableOptionWidget(QWidget):
             # 自动调整大小以适应换行后的文本
             self.text_label.adjustSize()
     
+    def set_prepared_text(self, text: str, height: int):
+        """设置文本并使用预先测得的高度（不再调用 adjustSize 重新测量）"""
+        if self.text_label:
+            self.text_label.setText(text)
+            self.text_label.setMinimumHeight(height)
+    
     def isChecked(self) -> bool:
         """是否选中"""
         return self.radio_button.isChecked() if self.radio_button else False
@@ -82,104 +97,263 @@ class ScrollableOptionWidget(QWidget):
         return self.radio_button.clicked if self.radio_button else None
 
 
+class BankLoadWorker(QObject):
+    """后台加载题库（只负责解析，题库在界面线程中更新）"""
+    
+    batch_ready = pyqtSignal(object)   # 一批新解析的题目
+    finished = pyqtSignal(object)      # 编译题库（直接打开时）或 None
+    
+    def __init__(self, loader: BankLoader):
+        super().__init__()
+        self.loader = loader
+    
+    @tracing.traced('load_questions.worker')
+    def run(self):
+        bank = self.loader.open_compiled()
+        if bank is None:
+            for batch in self.loader.iter_batches():
+                tracing.instant('load_questions.batch', count=len(batch))
+                self.batch_ready.emit(batch)
+        self.finished.emit(bank)
+
+
 class FloatingWindow(QWidget):
     """悬浮窗主窗口"""
     
+    bank_reloaded = pyqtSignal(object)  # 后台重新加载题库完成（快照或 None）
+    
     def __init__(self):
         super().__init__()
-        self.questions: List[Dict] = []
-        self.current_index = 0
-        self.user_answers: Dict[int, str] = {}
+        self.bank = QuestionBank()
+        self.loader = None
+        self.load_thread = None
+        self.load_worker = None
         
-        # 自动轮播属性
-        self.auto_play_enabled = False
-        self.auto_play_timer = QTimer()
-        self.auto_play_timer.timeout.connect(self.next_question)
+        # 题库热重载：监视题库文件，修改后在后台重新加载并换入（见 hot_reload）
+        self.reloader = None
+        self.reload_watcher = None
+        self.reloading = False
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DEBOUNCE_MS)
+        self.reload_timer.timeout.connect(self.reload_bank)
+        self.bank_reloaded.connect(self.on_bank_reloaded)
         
-        # 语音引擎修复核心部分
-        self.tts = None
-        try:
-            # 强制使用macOS原生引擎
-            os.environ["QT_TTS_USE_NATIVE_SPEECHSYNTHESIZER"] = "1"
-            
-            # 获取可用引擎
-            engines = QTextToSpeech.availableEngines()
-            print(f"检测到的语音引擎列表: {engines}")
-            
-            # 优先选择darwin引擎（macOS原生）
-            selected_engine = "darwin" if "darwin" in engines else engines[0]
-            self.tts = QTextToSpeech(selected_engine, self)
-            print(f"成功加载语音引擎: {selected_engine}")
-            
-            # 修复语音选择逻辑（避免调用不存在的方法）
-            voices = self.tts.availableVoices()
-            if voices:
-                # 直接使用索引选择语音（避开可能的属性调用问题）
-                # 优先选择中文语音（通常索引1或2为中文）
-                chinese_voice_index = next(
-                    (i for i, v in enumerate(voices) if "chinese" in v.name().lower()),
-                    0  # 默认第一个语音
-                )
-                self.tts.setVoice(voices[chinese_voice_index])
-                print(f"使用语音: {voices[chinese_voice_index].name()}")
-            
-            # 语音参数（中文适配）
-            self.tts.setRate(-0.1)  # 稍慢语速
-            self.tts.setPitch(0.0)
-            self.tts.setVolume(1.0)
-            
-            # 状态监听
-            self.tts.stateChanged.connect(self.on_tts_state_changed)
-
-        except Exception as e:
-            print(f"语音引擎初始化失败: {str(e)}")
-            print("将无法使用语音朗读功能，但其他功能正常")
-            self.tts = None
+        # 全文检索
+        self.search_index = None
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        
+        # 间隔重复复习（review_mode 为 True 时由调度器决定下一题）
+        self.scheduler = None
+        self.review_mode = False
+        self.restoring_selection = False
+        self.answer_graded = False
+        
+        # 答题记录（SQLite，后台线程批量写入）和增量统计
+        self.answer_store = None
+        self.stats = AnswerStats()
+        self.question_shown_at = time.monotonic()
         
+        # 自动轮播：状态机 + 唯一的轮播定时器（停顿结束后翻页）
+        self.auto_play = AutoPlayMachine(load_gaps())
+        self.auto_play_token = 0
+        self.auto_play_timer = QTimer(self)
+        self.auto_play_timer.setSingleShot(True)
+        self.auto_play_timer.timeout.connect(self.on_auto_play_timer)
+        
+        # 事件循环延迟监控：高频心跳 + 卡顿时采样调用栈（Ctrl+Shift+L 显示诊断信息）
+        self.diagnostics_visible = False
+        self.lag_monitor = start_monitor(LAG_HEARTBEAT_INTERVAL)
+        if self.lag_monitor is not None:
+            self.lag_timer = QTimer(self)
+            self.lag_timer.setTimerType(Qt.TimerType.PreciseTimer)
+            self.lag_timer.timeout.connect(self.lag_monitor.beat)
+            self.lag_timer.start(int(LAG_HEARTBEAT_INTERVAL * 1000))
+        
+        # 语音引擎在第一次朗读时才创建（见 ensure_tts），不拖慢启动
+        self.tts = None
+        self.tts_initialized = False
         self.is_speaking = False
+        # 朗读音频缓存（命中时直接播放合成好的文件），与语音引擎一起创建
+        self.audio_cache = None
+        self.player = None
+        # 当前题目各片段 -> 缓存音频（整题都已缓存时才使用，否则为 None）
+        self.cached_audio = None
+        # 朗读队列：桌面版只读题干和正确答案，按句分段送入语音引擎
+        self.speech_queue = SpeechQueue(
+            lambda q: question_segments(q, all_options=False, with_analysis=False))
         
-        # 加载题目
-        self.load_questions()
+        # 主题：整个应用一份样式表，在创建控件之前安装，避免重复 polish
+        self.theme_name = load_theme_name()
+        self.theme = apply_theme(QApplication.instance(), self.theme_name)
+        
+        # 先显示窗口（加载状态），题目在后台线程加载
         self.init_ui()
         self.setup_window()
+        self.load_questions()
+        startup_profile.mark('window')
     
+    @tracing.traced('load_questions')
     def load_questions(self):
-        """加载题目数据"""
-        json_path = Path(__file__).parent / "questions.json"
-        if json_path.exists():
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # 如果有将question随机排序
-                    if isinstance(data, list):
-                        raw_questions = data
-                    else:
-                        raw_questions = data.get('questions', [])
-                    
-                    # 过滤掉格式错误的题目
-                    self.questions = []
-                    for i, q in enumerate(raw_questions):
-                        if not isinstance(q, dict):
-                            print(f"警告: 跳过题目 {i}，数据格式错误（不是字典）")
-                            continue
-                        if 'options' not in q:
-                            print(f"警告: 跳过题目 {i} (ID: {q.get('id', 'N/A')})，缺少 options 字段")
-                            continue
-                        if not isinstance(q.get('options'), dict):
-                            print(f"警告: 跳过题目 {i} (ID: {q.get('id', 'N/A')})，options 不是字典类型")
-                            continue
-                        self.questions.append(q)
-                    
-                    print(f"成功加载 {len(self.questions)} 道有效题目（共 {len(raw_questions)} 道）")
-                    
-                    # 随机打乱题目顺序
-                    random.shuffle(self.questions)
-            except Exception as e:
-                print(f"加载题目失败: {e}")
-                self.questions = []
+        """在后台线程加载题目数据，解析出的题目通过信号交给界面线程"""
+        self.loader = BankLoader()
+        self.bank = self.loader.bank
+        self.scheduler = ReviewScheduler.load(user_data_path(REVIEW_STATE_NAME))
+        self.answer_store = open_store()
+        if self.answer_store is not None:
+            # 恢复上次的答案（按题目 ID，与出题顺序无关）
+            self.bank.user_answers.update(self.answer_store.latest_answers())
+            self.stats.load_rows(self.answer_store.question_stats())
+        
+        self.load_thread = QThread(self)
+        self.load_worker = BankLoadWorker(self.loader)
+        self.load_worker.moveToThread(self.load_thread)
+        self.load_thread.started.connect(self.load_worker.run)
+        self.load_worker.batch_ready.connect(self.on_questions_batch)
+        self.load_worker.finished.connect(self.on_questions_loaded)
+        self.load_worker.finished.connect(self.load_thread.quit)
+        self.load_thread.start()
+    
+    def on_questions_batch(self, batch):
+        """收到一批题目（第一批到达时立即显示第一题）"""
+        first = not self.bank
+        self.loader.apply(batch)
+        if first and self.bank:
+            self.show_question(0)
         else:
-            print(f"题目文件不存在: {json_path}")
-            self.questions = []
+            self.update_counter()
+    
+    @tracing.traced('load_questions.finish')
+    def on_questions_loaded(self, bank):
+        """题目加载完成"""
+        self.loader.finish(bank)
+        if self.loader.bank is not self.bank:
+            self.bank = self.loader.bank
+            if self.bank:
+                self.show_question(0)
+        if not self.bank:
+            self.counter_label.setText("没有可用的题目")
+            self.question_label.setText("")
+        self.update_counter()
+        self.scheduler.attach(self.bank.ids())
+        self.build_search_index()
+        self.watch_bank()
+        startup_profile.mark('bank_loaded')
+        startup_profile.report('desktop')
+    
+    def build_search_index(self):
+        """在后台线程建立全文检索索引（题目记录只读，可跨线程访问）"""
+        self.search_index = None
+        records = self.bank.records
+        
+        def build():
+            from search_index import SearchIndex
+            try:
+                index = SearchIndex(records)
+            except ValueError:
+                # 建立期间题库已重新加载，旧的编译题库已关闭
+                return
+            # 建立期间题库已重新加载时丢弃（由新的建立任务替换）
+            if self.bank.records is records:
+                self.search_index = index
+        
+        threading.Thread(target=build, daemon=True).start()
+    
+    def watch_bank(self):
+        """开始监视题库文件"""
+        from hot_reload import BankReloader
+        self.reloader = BankReloader(self.loader.path, shuffle=self.loader.shuffle)
+        self.reload_watcher = QFileSystemWatcher(self)
+        self.reload_watcher.fileChanged.connect(self.reload_timer.start)
+        self.reload_watcher.directoryChanged.connect(self.reload_timer.start)
+        self.rewatch_bank()
+    
+    def rewatch_bank(self):
+        """补上失效的监视（文件被替换后监视会丢失）"""
+        watched = set(self.reload_watcher.files()) | set(self.reload_watcher.directories())
+        missing = [str(p) for p in self.reloader.watch_paths() if str(p) not in watched]
+        if missing:
+            self.reload_watcher.addPaths(missing)
+    
+    def reload_bank(self):
+        """题库文件有变化时在后台线程构建新快照"""
+        if self.reloading or not self.reloader.changed():
+            return
+        self.reloading = True
+        records = self.bank.records
+        order = self.bank.snapshot_order()
+        
+        def build():
+            snapshot = None
+            try:
+                snapshot = self.reloader.build(records, order)
+            finally:
+                self.bank_reloaded.emit(snapshot)
+        
+        threading.Thread(target=build, daemon=True).start()
+    
+    @tracing.traced('reload_bank.apply')
+    def on_bank_reloaded(self, snapshot):
+        """换入新快照，留在同一道题上（不打断朗读和自动轮播）"""
+        self.reloading = False
+        self.rewatch_bank()
+        if snapshot is not None:
+            current = self.bank.current
+            previous_id = current.id if current is not None else None
+            if self.reloader.apply(self.bank, snapshot):
+                self.render_cache.clear()
+                self.speech_queue.clear()
+                self.search_hits = []
+                self.search_hit_cursor = -1
+                self.scheduler.attach(snapshot.positions)
+                self.build_search_index()
+                current = self.bank.current
+                if current is None:
+                    self.counter_label.setText("没有可用的题目")
+                elif current.id != previous_id:
+                    self.show_question(self.bank.current_index)
+                elif current.id in snapshot.changed:
+                    self.render_question(current, self.bank.current_index)
+                    if self.answer_label.isVisible():
+                        self.show_answer()
+                else:
+                    self.update_counter()
+                # 替换掉排队中的预排任务（其中可能是修改前的题目）
+                self.prefetch_neighbours()
+        # 构建期间文件又被修改
+        if self.reloader.changed():
+            self.reload_timer.start()
+    
+    def closeEvent(self, event):
+        """关闭窗口时停止后台加载，保存复习进度"""
+        if self.load_thread is not None and self.load_thread.isRunning():
+            self.loader.cancel()
+            self.load_thread.quit()
+            self.load_thread.wait()
+        self.save_review_state()
+        if self.answer_store is not None:
+            self.answer_store.close()
+        if self.audio_cache is not None:
+            self.audio_cache.close()
+        if self.lag_monitor is not None:
+            self.lag_monitor.stop()
+            self.lag_monitor.dump()
+        tracing.dump()
+        super().closeEvent(event)
+    
+    def save_review_state(self):
+        """保存复习进度"""
+        if self.scheduler is None:
+            return
+        try:
+            self.scheduler.save(user_data_path(REVIEW_STATE_NAME))
+        except Exception as e:
+            print(f"保存复习进度失败: {e}")
     
     def init_ui(self):
         """初始化界面"""
@@ -188,12 +362,7 @@ class FloatingWindow(QWidget):
         scroll_area.setWidgetResizable(True)
         scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background: transparent;
-            }
-        """)
+        scroll_area.setObjectName("contentScroll")
         
         # 内容容器（不定高度）
         content_widget = QWidget()
@@ -204,36 +373,34 @@ class FloatingWindow(QWidget):
         # 标题栏（可拖拽）
         self.title_bar = QLabel("基金从业资格证答题")
         self.title_bar.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-        self.title_bar.setStyleSheet("""
-            QLabel {
-                background-color: rgba(70, 130, 180, 0.9);
-                color: white;
-                padding: 8px;
-                border-radius: 5px;
-            }
-        """)
+        self.title_bar.setObjectName("titleBar")
         main_layout.addWidget(self.title_bar)
         
         # 题目计数器
         self.counter_label = QLabel()
-        self.counter_label.setStyleSheet("color: #666; font-size: 11px;")
+        self.counter_label.setObjectName("counterLabel")
         main_layout.addWidget(self.counter_label)
         
+        # 搜索框（输入时实时跳到最相关的题目，回车跳到下一个结果）
+        search_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索题目、选项或解析")
+        self.search_input.setObjectName("searchInput")
+        self.search_input.textChanged.connect(self.on_search_changed)
+        self.search_input.returnPressed.connect(self.next_search_hit)
+        self.search_status = QLabel()
+        self.search_status.setObjectName("searchStatus")
+        search_layout.addWidget(self.search_input, 1)
+        search_layout.addWidget(self.search_status)
+        main_layout.addLayout(search_layout)
+        
         # 题目内容（自动换行，不限制高度）
         self.question_label = QTextEdit()
         self.question_label.setReadOnly(True)
         # 移除最大高度限制，让内容自动换行
         self.question_label.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.question_label.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.question_label.setStyleSheet("""
-            QTextEdit {
-                background-color: rgba(255, 255, 255, 0.95);
-                border: 1px solid #ddd;
-                border-radius: 5px;
-                padding: 10px;
-                font-size: 13px;
-            }
-        """)
+        self.question_label.setObjectName("questionView")
         main_layout.addWidget(self.question_label)
         
         # 选项组（使用支持水平滚动的自定义组件）
@@ -242,7 +409,7 @@ class FloatingWindow(QWidget):
         options_layout = QVBoxLayout()
         options_layout.setSpacing(5)
         
-        for opt in ['A', 'B', 'C', 'D']:
+        for opt in OPTION_KEYS:
             option_widget = ScrollableOptionWidget(opt)
             self.option_buttons[opt] = option_widget
             self.option_group.addButton(option_widget.radio_button)
@@ -254,15 +421,7 @@ class FloatingWindow(QWidget):
         # 答案区域
         self.answer_label = QLabel()
         self.answer_label.setWordWrap(True)
-        self.answer_label.setStyleSheet("""
-            QLabel {
-                background-color: rgba(255, 250, 205, 0.9);
-                border: 1px solid #ddd;
-                border-radius: 5px;
-                padding: 10px;
-                font-size: 12px;
-            }
-        """)
+        self.answer_label.setObjectName("answerPanel")
         self.answer_label.hide()
         main_layout.addWidget(self.answer_label)
         
@@ -270,93 +429,60 @@ class FloatingWindow(QWidget):
         control_layout = QHBoxLayout()
         
         self.prev_btn = QPushButton("上一题")
-        self.prev_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 5px;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
+        self.prev_btn.setObjectName("prevButton")
         self.prev_btn.clicked.connect(self.prev_question)
         
         self.next_btn = QPushButton("下一题")
-        self.next_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 5px;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #0b7dda;
-            }
-        """)
+        self.next_btn.setObjectName("nextButton")
         self.next_btn.clicked.connect(self.next_question)
         
         self.show_answer_btn = QPushButton("查看答案")
-        self.show_answer_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #FF9800;
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 5px;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #e68900;
-            }
-        """)
+        self.show_answer_btn.setObjectName("answerButton")
         self.show_answer_btn.clicked.connect(self.toggle_answer)
         
         self.auto_play_btn = QPushButton("自动轮播")
-        self.auto_play_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #9C27B0;
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 5px;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #7b1fa2;
-            }
-        """)
+        self.auto_play_btn.setObjectName("autoPlayButton")
         self.auto_play_btn.clicked.connect(self.toggle_auto_play)
         
+        self.review_btn = QPushButton("智能复习")
+        self.review_btn.setObjectName("reviewButton")
+        self.review_btn.clicked.connect(self.toggle_review_mode)
+        
         control_layout.addWidget(self.prev_btn)
         control_layout.addWidget(self.next_btn)
         control_layout.addWidget(self.show_answer_btn)
         control_layout.addWidget(self.auto_play_btn)
+        control_layout.addWidget(self.review_btn)
         
         main_layout.addLayout(control_layout)
         
         # 关闭按钮（添加到内容容器中）
         close_btn = QPushButton("关闭")
-        close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #f44336;
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 5px;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #da190b;
-            }
-        """)
+        close_btn.setObjectName("closeButton")
         close_btn.clicked.connect(self.close)
-        main_layout.addWidget(close_btn)
+        
+        # 统计面板（按题目和科目的正确率、用时）
+        self.stats_label = QLabel()
+        self.stats_label.setWordWrap(True)
+        self.stats_label.setTextFormat(Qt.TextFormat.PlainText)
+        self.stats_label.setObjectName("statsPanel")
+        self.stats_label.hide()
+        main_layout.addWidget(self.stats_label)
+        
+        self.stats_btn = QPushButton("统计")
+        self.stats_btn.setObjectName("statsButton")
+        self.stats_btn.clicked.connect(self.toggle_stats)
+        
+        self.theme_btn = QPushButton(self.theme_name)
+        self.theme_btn.setObjectName("themeButton")
+        self.theme_btn.setToolTip("切换主题")
+        self.theme_btn.clicked.connect(self.switch_theme)
+        
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self.stats_btn)
+        bottom_layout.addWidget(self.theme_btn)
+        bottom_layout.addWidget(close_btn, 1)
+        main_layout.addLayout(bottom_layout)
         
         # 将内容容器添加到滚动区域
         scroll_area.setWidget(content_widget)
@@ -366,9 +492,33 @@ class FloatingWindow(QWidget):
         window_layout.setContentsMargins(0, 0, 0, 0)
         window_layout.addWidget(scroll_area)
         
-        # 显示第一题
-        if self.questions:
-            self.show_question(0)
+        # Ctrl+→ 跳过正在朗读的片段
+        skip_shortcut = QShortcut(QKeySequence("Ctrl+Right"), self)
+        skip_shortcut.activated.connect(self.skip_segment)
+        
+        # Ctrl+Shift+T 导出跟踪记录（FUND_EXAM_TRACE=1 启动时）
+        if tracing.ENABLED:
+            trace_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self)
+            trace_shortcut.activated.connect(tracing.dump)
+        
+        # Ctrl+Shift+L 在统计面板中显示/隐藏事件循环延迟（诊断信息）
+        diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+L"), self)
+        diagnostics_shortcut.activated.connect(self.toggle_diagnostics)
+        
+        # 题目排版缓存（空闲时预排前后几道题）
+        self.render_cache = RenderCache(self.question_label, self.option_buttons['A'].text_label, parent=self)
+        
+        # 加载状态（第一道题加载完成后替换）
+        self.counter_label.setText("加载中...")
+        self.question_label.setText("题目加载中...")
+    
+    def switch_theme(self):
+        """切换到下一个主题（只更换应用样式表，不重建界面）"""
+        self.theme_name = next_theme(self.theme_name)
+        self.theme = apply_theme(QApplication.instance(), self.theme_name)
+        self.theme_btn.setText(self.theme_name)
+        save_theme_name(self.theme_name)
+        self.update()
     
     def setup_window(self):
         """设置窗口属性"""
@@ -388,13 +538,6 @@ class FloatingWindow(QWidget):
         # 确保窗口始终置顶
         self.raise_()
         self.activateWindow()
-        
-        self.setStyleSheet("""
-            QWidget {
-                background-color: rgba(240, 240, 240, 0.95);
-                border-radius: 10px;
-            }
-        """)
     
     def showEvent(self, event):
         """窗口显示事件，确保窗口置顶"""
@@ -406,10 +549,11 @@ class FloatingWindow(QWidget):
     
     def paintEvent(self, event):
         """绘制窗口边框"""
+        startup_profile.mark('first_paint')
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setBrush(QBrush(QColor(240, 240, 240, 245)))
-        painter.setPen(QPen(QColor(200, 200, 200, 255), 2))
+        painter.setBrush(QBrush(QColor(*self.theme['frame_fill'])))
+        painter.setPen(QPen(QColor(*self.theme['frame_pen']), 2))
         painter.drawRoundedRect(1, 1, self.width() - 2, self.height() - 2, 10, 10)
     
     def mousePressEvent(self, event):
@@ -424,50 +568,50 @@ class FloatingWindow(QWidget):
             self.move(event.globalPosition().toPoint() - self.drag_position)
             event.accept()
     
+    @tracing.traced('show_question')
     def show_question(self, index: int):
         """显示指定题目"""
-        if not self.questions or index < 0 or index >= len(self.questions):
-            return
-        
-        self.current_index = index
-        question = self.questions[index]
-        
-        # 验证题目数据格式
-        if not isinstance(question, dict):
-            print(f"警告: 题目 {index} 数据格式错误，跳过")
+        question = self.bank.go_to(index)
+        if question is None:
             return
+        startup_profile.mark('first_question')
+        self.render_question(question, index)
+        self.answer_graded = False
+        self.question_shown_at = time.monotonic()
+        self.refresh_stats()
+        self.prefetch_neighbours()
         
+        # 自动轮播逻辑
+        if self.auto_play.running:
+            self.auto_play_show()
+        else:
+            self.answer_label.hide()
+            self.show_answer_btn.setText("查看答案")
+            self.stop_speech()
+    
+    def render_question(self, question, index: int):
+        """显示题目、选项和已有的选择（不改变朗读和轮播状态）"""
         # 更新计数器
-        self.counter_label.setText(f"题目 {index + 1} / {len(self.questions)} (ID: {question.get('id', 'N/A')})")
-        
-        # 显示题目（自动换行，高度自适应）
-        self.question_label.setText(question.get('title', ''))
-        # 调整 QTextEdit 的高度以适应内容
-        doc = self.question_label.document()
-        doc.setTextWidth(self.question_label.viewport().width())
-        height = int(doc.size().height()) + 20  # 加一些边距
-        self.question_label.setMinimumHeight(max(height, 50))
-        
-        # 显示选项 - 添加类型检查
-        options = question.get('options', {})
-        if not isinstance(options, dict):
-            print(f"警告: 题目 {index} (ID: {question.get('id', 'N/A')}) 的 options 格式错误，期望字典但得到 {type(options).__name__}")
-            # 如果 options 不是字典，跳过该题目，跳转到下一题
-            if index + 1 < len(self.questions):
-                QTimer.singleShot(100, lambda: self.show_question(index + 1))
-            return
+        self.update_counter()
+        
+        # 显示题目（换入已排好版的文档，高度自适应）
+        rendered = self.render_cache.get(question, pin=True)
+        self.question_label.setDocument(rendered.document)
+        self.question_label.setMinimumHeight(rendered.height)
         
-        for opt in ['A', 'B', 'C', 'D']:
+        # 显示选项（格式已在题库加载时校验）
+        for opt in OPTION_KEYS:
             option_widget = self.option_buttons[opt]
-            if opt in options and isinstance(options[opt], str):
-                option_widget.setText(f"{opt}. {options[opt]}")
+            if opt in rendered.options:
+                option_widget.set_prepared_text(rendered.options[opt], rendered.option_heights[opt])
                 option_widget.setVisible(True)
             else:
                 option_widget.setVisible(False)
         
-        # 恢复选择
-        if index in self.user_answers:
-            selected = self.user_answers[index]
+        # 恢复选择（恢复时触发的选中信号不计入复习评分）
+        self.restoring_selection = True
+        selected = self.bank.answer_for(index)
+        if selected is not None:
             if selected in self.option_buttons:
                 self.option_buttons[selected].setChecked(True)
         else:
@@ -475,66 +619,172 @@ class FloatingWindow(QWidget):
             for btn in self.option_buttons.values():
                 btn.setChecked(False)
             self.option_group.setExclusive(True)
+        self.restoring_selection = False
+    
+    def prefetch_neighbours(self, radius: int = 3):
+        """事件循环空闲时预排当前题前后 radius 道题"""
+        bank = self.bank
+        count = len(bank)
+        if count <= 1:
+            return
+        current = bank.current_index
+        positions = []
+        for step in range(1, radius + 1):
+            for pos in ((current + step) % count, (current - step) % count):
+                if pos != current and pos not in positions:
+                    positions.append(pos)
+        self.render_cache.prefetch(bank[pos] for pos in positions)
+    
+    def update_counter(self):
+        """更新题目计数器"""
+        question = self.bank.current
+        if question is not None:
+            prefix = "[复习] " if self.review_mode else ""
+            self.counter_label.setText(
+                f"{prefix}题目 {self.bank.current_index + 1} / {len(self.bank)} (ID: {question.id})"
+            )
+    
+    def on_search_changed(self, text: str):
+        """搜索框内容变化：停止输入 SEARCH_DEBOUNCE_MS 后再检索"""
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        self.search_timer.start()
+    
+    def run_search(self):
+        """按搜索框内容重新检索并跳到第一个结果"""
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        text = self.search_input.text().strip()
+        if not text:
+            self.search_status.setText("")
+            return
+        if self.search_index is None:
+            self.search_status.setText("索引建立中...")
+            return
         
-        # 自动轮播逻辑
-        if self.auto_play_enabled:
-            self.show_answer()
-            QTimer.singleShot(300, self.speak_question)
-        else:
-            self.answer_label.hide()
-            self.show_answer_btn.setText("查看答案")
-            if self.tts:
-                try:
-                    self.tts.stop()
-                except:
-                    pass
+        positions = (self.bank.position_of_record(r) for r in self.search_index.search(text))
+        self.search_hits = [pos for pos in positions if pos is not None]
+        if not self.search_hits:
+            self.search_status.setText("无结果")
+            return
+        self.next_search_hit()
+    
+    def next_search_hit(self):
+        """跳到下一个搜索结果"""
+        if not self.search_hits:
+            return
+        self.search_hit_cursor = (self.search_hit_cursor + 1) % len(self.search_hits)
+        self.search_status.setText(f"{self.search_hit_cursor + 1}/{len(self.search_hits)}")
+        self.save_current_selection()
+        self.show_question(self.search_hits[self.search_hit_cursor])
     
     def on_option_selected(self, option: str):
-        """记录用户选择"""
-        self.user_answers[self.current_index] = option
+        """记录用户选择并写入答题记录
+
+        每次显示题目时的第一次选择计入统计和复习评分，之后改选只记入历史。
+        """
+        self.bank.record_answer(self.bank.current_index, option)
+        question = self.bank.current
+        if self.restoring_selection or question is None:
+            return
+        correct = option == question.answer
+        graded = not self.answer_graded
+        elapsed = time.monotonic() - self.question_shown_at
+        if self.answer_store is not None:
+            self.answer_store.record(question.id, option, correct, elapsed=elapsed,
+                                     graded=graded, subject=question.subject)
+        if not graded:
+            return
+        self.answer_graded = True
+        self.stats.record(question.id, question.subject, correct, elapsed)
+        if self.scheduler is not None:
+            self.scheduler.review(question.id, correct)
+        self.refresh_stats()
+    
+    def toggle_stats(self):
+        """显示/隐藏统计面板"""
+        if self.stats_label.isVisible():
+            self.stats_label.hide()
+        else:
+            self.stats_label.show()
+            self.refresh_stats()
+    
+    def refresh_stats(self):
+        """统计面板可见时更新内容（直接读取汇总结果，不扫描历史）"""
+        if not self.stats_label.isVisible():
+            return
+        question = self.bank.current
+        lines = self.stats.summary_lines(question.id if question is not None else None)
+        lines.extend(self.auto_play.summary_lines())
+        if self.diagnostics_visible and self.lag_monitor is not None:
+            lines.extend(self.lag_monitor.summary_lines())
+        self.stats_label.setText("\n".join(lines))
+    
+    def toggle_diagnostics(self):
+        """显示/隐藏诊断信息（同时写出 lag_monitor.json）"""
+        if self.lag_monitor is None:
+            print("卡顿诊断未开启（设置 FUND_EXAM_LAG_MONITOR=1 后重新启动）")
+            return
+        self.diagnostics_visible = not self.diagnostics_visible
+        if self.diagnostics_visible:
+            self.lag_monitor.dump()
+            self.stats_label.show()
+        self.refresh_stats()
     
     def prev_question(self):
         """上一题"""
         self.save_current_selection()
-        if self.current_index > 0:
-            self.show_question(self.current_index - 1)
-        else:
-            self.show_question(len(self.questions) - 1)
+        self.show_question(self.bank.prev_index())
     
     def next_question(self):
-        """下一题"""
+        """下一题（复习模式下由复习调度器选择，自动轮播同样适用）"""
         self.save_current_selection()
-        if self.current_index < len(self.questions) - 1:
-            self.show_question(self.current_index + 1)
+        index = None
+        if self.review_mode and self.scheduler is not None:
+            index = self.scheduler.next_position(self.bank)
+        self.show_question(self.bank.next_index() if index is None else index)
+    
+    def toggle_review_mode(self):
+        """切换出题顺序：题库顺序 / 间隔重复复习"""
+        self.review_mode = not self.review_mode
+        self.review_btn.setText("退出复习" if self.review_mode else "智能复习")
+        set_state(self.review_btn, 'active', self.review_mode)
+        if self.review_mode:
+            self.next_question()
         else:
-            self.show_question(0)
+            self.update_counter()
     
     def save_current_selection(self):
         """保存当前选择"""
         for opt, btn in self.option_buttons.items():
             if btn.isChecked():
-                self.user_answers[self.current_index] = opt
+                self.bank.record_answer(self.bank.current_index, opt)
                 break
     
+    @tracing.traced('show_answer')
     def show_answer(self):
         """显示答案"""
-        if not self.questions or self.current_index >= len(self.questions):
+        question = self.bank.current
+        if question is None:
             return
         
-        question = self.questions[self.current_index]
-        answer = question.get('answer', '')
-        analysis = question.get('analysis', '')
+        # 答案和解析部分来自排版缓存，只有 "您的选择" 一行随作答变化
+        rendered = self.render_cache.get(question)
+        answer = question.answer
         user_selected = next((opt for opt, btn in self.option_buttons.items() if btn.isChecked()), None)
         
-        answer_text = f"<b>正确答案：{answer}</b><br>"
+        answer_text = rendered.answer_head
         if user_selected:
             if user_selected == answer:
                 answer_text += f"<span style='color: green;'>✓ 您的选择：{user_selected} (正确)</span><br><br>"
             else:
                 answer_text += f"<span style='color: red;'>✗ 您的选择：{user_selected} (错误)</span><br><br>"
         
-        if analysis:
-            answer_text += f"<b>解析：</b><br>{analysis}"
+        answer_text += rendered.answer_tail
+        if user_selected:
+            set_state(self.answer_label, 'result', 'correct' if user_selected == answer else 'wrong')
+        else:
+            set_state(self.answer_label, 'result', 'none')
         
         self.answer_label.setText(answer_text)
         self.answer_label.show()
@@ -552,94 +802,240 @@ class FloatingWindow(QWidget):
         else:
             self.show_answer()
     
-    def speak_question(self):
-        """朗读题目（修复版）"""
-        if not self.tts:
+    def ensure_tts(self) -> bool:
+        """创建语音引擎（只在第一次朗读时执行），返回是否可用
+
+        上次选定的引擎和语音缓存在磁盘上，命中时不再枚举引擎、扫描语音。
+        """
+        if self.tts_initialized:
+            return self.tts is not None
+        self.tts_initialized = True
+        started = time.perf_counter()
+        try:
+            # 强制使用macOS原生引擎（需在加载语音模块之前设置）
+            os.environ["QT_TTS_USE_NATIVE_SPEECHSYNTHESIZER"] = "1"
+            from PyQt6.QtTextToSpeech import QTextToSpeech
+            
+            choice = load_tts_choice()
+            engine = choice.get('engine')
+            if engine:
+                self.tts = QTextToSpeech(engine, self)
+                if self.tts.state() == QTextToSpeech.State.Error:
+                    # 缓存的引擎已不可用，重新选择
+                    self.tts.deleteLater()
+                    self.tts = None
+                    choice = {}
+            if self.tts is None:
+                engines = QTextToSpeech.availableEngines()
+                print(f"检测到的语音引擎列表: {engines}")
+                # 优先选择darwin引擎（macOS原生）
+                engine = "darwin" if "darwin" in engines else engines[0]
+                self.tts = QTextToSpeech(engine, self)
+            print(f"成功加载语音引擎: {engine}")
+            
+            voices = self.tts.availableVoices()
+            voice = next((v for v in voices if v.name() == choice.get('voice')), None)
+            if voice is None and voices:
+                # 优先选择中文语音，否则使用第一个
+                voice = next((v for v in voices if "chinese" in v.name().lower()), voices[0])
+            if voice is not None:
+                self.tts.setVoice(voice)
+                print(f"使用语音: {voice.name()}")
+            if choice.get('engine') != engine or (voice is not None and choice.get('voice') != voice.name()):
+                save_tts_choice(engine, voice.name() if voice is not None else '')
+            
+            # 语音参数（中文适配）
+            self.tts.setRate(-0.1)  # 稍慢语速
+            self.tts.setPitch(0.0)
+            self.tts.setVolume(1.0)
+            
+            # 状态监听
+            self.tts.stateChanged.connect(self.on_tts_state_changed)
+        except Exception as e:
+            print(f"语音引擎初始化失败: {str(e)}")
+            print("将无法使用语音朗读功能，但其他功能正常")
+            self.tts = None
+            return False
+        
+        # 朗读音频缓存：片段准备好后在后台合成为文件，命中时直接播放，不再实时合成
+        from audio_cache import open_audio_cache
+        self.audio_cache = open_audio_cache(rate=self.tts.rate())
+        if self.audio_cache is not None:
+            from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
+            self.audio_output = QAudioOutput(self)
+            self.player = QMediaPlayer(self)
+            self.player.setAudioOutput(self.audio_output)
+            self.player.mediaStatusChanged.connect(self.on_media_status_changed)
+            self.speech_queue.on_prepare = self.audio_cache.request
+            # 之前准备的片段没有送去合成，重新准备
+            self.speech_queue.clear()
+            print(f"朗读音频缓存: {self.audio_cache.engine}，已缓存 {len(self.audio_cache)} 个片段")
+        print(f"语音引擎初始化用时 {(time.perf_counter() - started) * 1000:.0f} 毫秒")
+        return True
+    
+    @tracing.traced('speak_question')
+    def speak_question(self) -> bool:
+        """朗读题目，返回是否开始朗读"""
+        if not self.ensure_tts():
             print("语音引擎不可用，无法朗读")
-            if self.auto_play_enabled:
-                QTimer.singleShot(3000, self.next_question)
-            return
+            return False
         
-        if not self.questions or self.current_index >= len(self.questions):
-            return
+        question = self.bank.current
+        if question is None:
+            return False
         
-        question = self.questions[self.current_index]
-        title = question.get('title', '')
-        answer = question.get('answer', '')
-        analysis = question.get('analysis', '')
-        options = question.get('options', {})
-        
-        # 构建朗读文本
-        text = f"题目：{title}。"
-        if options:
-            text += "选项："
-            for opt in ['A', 'B', 'C', 'D']:
-                if opt in options:
-                    if opt == answer:
-                        text += f"<b>{options[opt]}</b>。"
-        # if analysis:
-        #     text += f"解析：{analysis}。"
-        
-        # 简化朗读调用（避免复杂属性）
+        # 先读题干第一句，其余片段在每段读完后依次送入
+        first = self.speech_queue.start(question)
+        self.cached_audio = None
+        if self.audio_cache is not None and first is not None:
+            segments = self.speech_queue.segments
+            paths = self.audio_cache.lookup_all(segments)
+            if paths is not None:
+                self.cached_audio = dict(zip(segments, paths))
+        started = self.say_segment(first)
+        self.prefetch_speech()
+        return started
+    
+    @tracing.traced('say_segment')
+    def say_segment(self, segment) -> bool:
+        """朗读一个片段（整题都已缓存时播放缓存文件），返回是否成功"""
+        if segment is None:
+            return False
+        path = self.cached_audio.get(segment) if self.cached_audio else None
         try:
-            self.is_speaking = True
-            self.tts.say(text)
+            # 等引擎进入 Speaking 后才认为本段开始，之前收到的 Ready 属于被打断的上一段
+            self.is_speaking = False
+            if path is not None:
+                self.player.setSource(QUrl.fromLocalFile(str(path)))
+                self.player.play()
+            else:
+                self.tts.say(segment)
         except Exception as e:
             print(f"朗读失败: {e}")
-            if self.auto_play_enabled:
-                QTimer.singleShot(3000, self.next_question)
+            self.speech_queue.stop()
+            return False
+        return True
+    
+    def on_segment_finished(self):
+        """一段读完：送入下一段；整题读完（或朗读失败）时自动轮播进入停顿"""
+        if not self.speech_queue.active:
+            return
+        segment = self.speech_queue.next()
+        if segment is not None:
+            if self.say_segment(segment):
+                return
+            gap = 'no_speech'
+        else:
+            gap = 'after_speech'
+        if self.auto_play.state == SPEAKING:
+            self.auto_play_wait(gap)
+    
+    def skip_segment(self):
+        """跳过正在朗读的片段（停止后引擎回到 Ready，由状态回调送入下一段）"""
+        if not (self.tts and self.speech_queue.active):
+            return
+        if self.player is not None and self.player.playbackState() == self.player.PlaybackState.PlayingState:
+            # 停止播放不会产生 EndOfMedia，直接送入下一段
+            self.player.stop()
+            self.on_segment_finished()
+            return
+        try:
+            self.tts.stop()
+        except Exception as e:
+            print(f"跳过失败: {e}")
+    
+    def stop_speech(self):
+        """停止朗读并丢弃剩余片段"""
+        self.speech_queue.stop()
+        self.cached_audio = None
+        if self.player is not None:
+            self.player.stop()
+        if self.tts:
+            try:
+                self.tts.stop()
+            except:
+                pass
+    
+    def prefetch_speech(self):
+        """朗读期间准备好下一题的片段（复习模式下下一题由调度器决定，跳过）"""
+        if not self.review_mode and self.bank:
+            self.speech_queue.prepare(self.bank[self.bank.next_index()])
+    
+    def on_media_status_changed(self, status):
+        """缓存音频播放结束：送入下一段；文件无法播放时改用语音引擎"""
+        if status == self.player.MediaStatus.EndOfMedia:
+            self.on_segment_finished()
+        elif status == self.player.MediaStatus.InvalidMedia and self.speech_queue.active:
+            print(f"缓存音频无法播放: {self.player.errorString()}")
+            # 本题剩余片段也改用语音引擎
+            self.cached_audio = None
+            self.tts.say(self.speech_queue.current)
     
     def on_tts_state_changed(self, state):
         """语音状态回调（简化版）"""
         try:
             if not self.tts:
                 return
+            tracing.instant('tts_state', state=getattr(state, 'name', state), speaking=self.is_speaking)
                 
-            if state == QTextToSpeech.State.Speaking:
+            if state == self.tts.State.Speaking:
                 self.is_speaking = True
-            elif state in [QTextToSpeech.State.Ready, QTextToSpeech.State.Paused]:
-                if self.is_speaking and self.auto_play_enabled:
+            elif state in [self.tts.State.Ready, self.tts.State.Paused]:
+                if self.is_speaking:
                     self.is_speaking = False
-                    QTimer.singleShot(500, self.next_question)
+                    self.on_segment_finished()
         except Exception as e:
             print(f"TTS状态错误: {e}")
             self.is_speaking = False
     
     def toggle_auto_play(self):
         """切换自动轮播"""
-        if self.auto_play_enabled:
-            self.auto_play_enabled = False
-            if self.tts:
-                try:
-                    self.tts.stop()
-                except:
-                    pass
-            self.auto_play_btn.setText("自动轮播")
-            self.auto_play_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #9C27B0;
-                    color: white;
-                    border: none;
-                    padding: 8px 15px;
-                    border-radius: 5px;
-                    font-size: 12px;
-                }
-            """)
+        if self.auto_play.running:
+            self.stop_auto_play()
         else:
-            self.auto_play_enabled = True
             self.auto_play_btn.setText("停止轮播")
-            self.auto_play_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #F44336;
-                    color: white;
-                    border: none;
-                    padding: 8px 15px;
-                    border-radius: 5px;
-                    font-size: 12px;
-                }
-            """)
-            self.show_answer()
-            QTimer.singleShot(300, self.speak_question)
+            set_state(self.auto_play_btn, 'active', True)
+            self.auto_play_show()
+    
+    def stop_auto_play(self):
+        """停止自动轮播（回到 idle）"""
+        self.auto_play_timer.stop()
+        self.auto_play.stop()
+        self.stop_speech()
+        self.auto_play_btn.setText("自动轮播")
+        set_state(self.auto_play_btn, 'active', False)
+        self.refresh_stats()
+    
+    def auto_play_show(self):
+        """自动轮播：显示当前题的答案并开始朗读（朗读不可用时直接停顿）"""
+        self.auto_play_timer.stop()
+        if self.bank.current is None:
+            # 没有可显示的题目（题库为空）
+            self.stop_auto_play()
+            return
+        self.auto_play.enter(SHOWING)
+        self.show_answer()
+        if self.speak_question():
+            self.auto_play.enter(SPEAKING)
+        else:
+            self.auto_play_wait('no_speech')
+    
+    def auto_play_wait(self, gap: str):
+        """进入停顿，由轮播定时器在停顿结束后翻页"""
+        self.auto_play_token = self.auto_play.enter(GAP)
+        self.auto_play_timer.start(int(self.auto_play.gap(gap) * 1000))
+    
+    def on_auto_play_timer(self):
+        """停顿结束：翻到下一题（期间状态已变化时丢弃）"""
+        current = self.auto_play.state == GAP and self.auto_play.is_current(self.auto_play_token)
+        tracing.instant('auto_play_timer', token=self.auto_play_token, current=current)
+        if not current:
+            return
+        self.auto_play.enter(ADVANCING)
+        self.next_question()
+        if self.auto_play.state == ADVANCING:
+            # 没有翻到任何题目（题库为空），回到 idle
+            self.stop_auto_play()
 
 
 def main():
@@ -647,6 +1043,7 @@ def main():
     app.setApplicationName("基金从业资格证答题")
     window = FloatingWindow()
     window.show()
+    tracing.install_signal_handler()
     sys.exit(app.exec())
 
 
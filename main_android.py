@@ -5,11 +5,15 @@
 基于 Kivy 框架开发
 """
 
-import json
-import random
+# 最先导入：以此为起点记录各启动阶段的耗时
+import startup_profile
+import tracing
+
 import os
-from pathlib import Path
-from typing import List, Dict
+import queue
+import threading
+import time
+from functools import lru_cache
 
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
@@ -17,6 +21,7 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.togglebutton import ToggleButton
+from kivy.uix.textinput import TextInput
 from kivy.uix.widget import Widget
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.stacklayout import StackLayout
@@ -25,17 +30,24 @@ from kivy.core.window import Window
 from kivy.utils import platform as kivy_platform
 from kivy.config import Config
 
-# Android TTS 需要使用 plyer 库
-try:
-    from plyer import tts
-    TTS_AVAILABLE = True
-except ImportError:
-    TTS_AVAILABLE = False
-    print("警告: plyer 未安装，语音功能不可用")
+from question_bank import BankLoader, QuestionBank, OPTION_KEYS, user_data_path
+from answer_stats import AnswerStats
+from answer_store import open_store
+from scheduler import REVIEW_STATE_NAME, ReviewScheduler
+from speech import SpeechQueue
+from lag_monitor import start_monitor
+from speech_timing import android_audio_probe, load_model, save_model
+
+# Android TTS 使用 plyer 库，第一次朗读时才导入（见 QuestionApp.ensure_tts）
+tts = None
+
+# 轮询音频播放状态的间隔（秒）
+SEGMENT_POLL_INTERVAL = 0.2
 
 
+@lru_cache(maxsize=None)
 def get_chinese_font():
-    """获取支持中文的字体路径"""
+    """获取支持中文的字体路径（第一次创建控件时查找，结果缓存）"""
     import os
     
     # kivy.utils.platform 是一个字符串，不是函数
@@ -111,15 +123,24 @@ def get_chinese_font():
     return None
 
 
-# 获取中文字体
-CHINESE_FONT = get_chinese_font()
-print(f"使用字体: {CHINESE_FONT}")
+startup_profile.mark('imports')
+
+# 事件循环心跳：每帧一次，按 60 帧/秒计算延迟
+LAG_HEARTBEAT_INTERVAL = 1 / 60
+# 长按“统计”按钮多久显示诊断信息（秒）
+DIAGNOSTICS_HOLD = 1.0
+# 朗读不可用时自动轮播每题停留的时间（秒）
+AUTO_ADVANCE_DELAY = 3
+# 检查题库文件是否被修改的间隔（秒）
+RELOAD_POLL_INTERVAL = 2.0
+# 搜索框停止输入多久后再检索（秒），连续输入时只检索最后一次
+SEARCH_DEBOUNCE = 0.15
 
 
 class OptionButton(BoxLayout):
-    """选项按钮组件"""
+    """选项按钮组件（创建一次，换题时只更新文本和状态）"""
     
-    def __init__(self, option_key, option_text, **kwargs):
+    def __init__(self, option_key, option_text='', group='options', **kwargs):
         super().__init__(**kwargs)
         self.option_key = option_key
         self.orientation = 'horizontal'
@@ -131,7 +152,7 @@ class OptionButton(BoxLayout):
         self.toggle = ToggleButton(
             text=option_key,
             size_hint_x=0.15,
-            group='options',
+            group=group,
             state='normal'
         )
         
@@ -143,7 +164,7 @@ class OptionButton(BoxLayout):
             valign='top',
             size_hint_x=0.85,
             size_hint_y=None,
-            font_name=CHINESE_FONT if CHINESE_FONT else None,
+            font_name=get_chinese_font(),
             color=(0, 0, 0, 1)  # 黑色文字，确保可见性
         )
         # 绑定文本大小变化，自动调整高度
@@ -165,6 +186,14 @@ class OptionButton(BoxLayout):
     
     def set_selected(self, selected):
         self.toggle.state = 'down' if selected else 'normal'
+    
+    def set_option(self, option_text):
+        """更换选项文本（复用控件，不重新创建）"""
+        self.text_label.text = option_text
+    
+    def prelayout(self):
+        """立即生成文本纹理并更新高度（在空闲帧中为下一题提前排版）"""
+        self.text_label.texture_update()
 
 
 class QuestionApp(App):
@@ -172,14 +201,54 @@ class QuestionApp(App):
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.questions: List[Dict] = []
-        self.current_index = 0
-        self.user_answers: Dict[int, str] = {}
+        self.bank = QuestionBank()
+        self.loader = None
+        self.load_queue = None
+        self.load_thread = None
+        
+        # 题库热重载：定时检查题库文件，修改后在后台重新加载并换入（见 hot_reload）
+        self.reloader = None
+        self.reloading = False
+        
+        # 全文检索
+        self.search_index = None
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        self.search_trigger = Clock.create_trigger(self.run_search, SEARCH_DEBOUNCE)
+        
+        # 间隔重复复习（review_mode 为 True 时由调度器决定下一题）
+        self.scheduler = None
+        self.review_mode = False
+        self.restoring_selection = False
+        self.answer_graded = False
+        
+        # 答题记录（SQLite，后台线程批量写入）和增量统计
+        self.answer_store = None
+        self.stats = AnswerStats()
+        self.stats_visible = False
+        self.diagnostics_visible = False
+        self.stats_pressed_at = 0.0
+        self.lag_monitor = None
+        self.question_shown_at = time.monotonic()
         self.auto_play_enabled = False
+        # 朗读不可用时的定时翻页（只保留一个，停止朗读或翻页时取消）
+        self.auto_advance_event = None
         self.is_speaking = False
+        # 朗读队列（按句分段）和当前片段结束的定时回调
+        self.speech_queue = SpeechQueue()
+        self.speech_event = None
+        # 朗读时长模型（按引擎保存）；Android 上可以轮询音频是否仍在播放作为完成信号
+        self.speech_engine_name = f"plyer-{kivy_platform}"
+        self.speech_timing = None
+        self.audio_probe = None
+        self.tts_initialized = False
+        self.segment_started = 0.0
+        self.segment_estimate = 0.0
+        self.segment_heard = False
     
     def build(self):
         """构建UI"""
+        print(f"使用字体: {get_chinese_font()}")
         # 设置窗口背景色
         Window.clearcolor = (0.95, 0.95, 0.95, 1)
         
@@ -200,7 +269,7 @@ class QuestionApp(App):
             size_hint_y=None,
             height='60dp',
             font_size='20sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None,
+            font_name=get_chinese_font(),
             bold=True,
             color=(0.2, 0.5, 0.8, 1),
             text_size=(None, None),
@@ -215,11 +284,33 @@ class QuestionApp(App):
             size_hint_y=None,
             height='30dp',
             font_size='12sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None,
+            font_name=get_chinese_font(),
             color=(0.4, 0.4, 0.4, 1)
         )
         main_layout.add_widget(self.counter_label)
         
+        # 搜索框（输入时实时跳到最相关的题目，回车跳到下一个结果）
+        search_layout = BoxLayout(orientation='horizontal', spacing=10, size_hint_y=None, height='40dp')
+        self.search_input = TextInput(
+            hint_text='搜索题目、选项或解析',
+            multiline=False,
+            font_size='14sp',
+            font_name=get_chinese_font() or 'Roboto',
+            size_hint_x=0.75
+        )
+        self.search_input.bind(text=self.on_search_text)
+        self.search_input.bind(on_text_validate=self.next_search_hit)
+        self.search_status = Label(
+            text='',
+            font_size='12sp',
+            font_name=get_chinese_font(),
+            color=(0.4, 0.4, 0.4, 1),
+            size_hint_x=0.25
+        )
+        search_layout.add_widget(self.search_input)
+        search_layout.add_widget(self.search_status)
+        main_layout.add_widget(search_layout)
+        
         # 题目内容区域（不滚动，自动换行）
         self.question_label = Label(
             text='加载中...',
@@ -227,7 +318,7 @@ class QuestionApp(App):
             halign='left',
             valign='top',
             font_size='16sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None,
+            font_name=get_chinese_font(),
             color=(0, 0, 0, 1),
             size_hint_y=None
         )
@@ -243,30 +334,42 @@ class QuestionApp(App):
         self.options_container.bind(minimum_height=self.options_container.setter('height'))
         main_layout.add_widget(self.options_container)
         
-        # 答案显示区域（不滚动，自动换行）
+        # 两组固定的选项控件轮换使用：一组显示当前题，另一组在空闲时为下一题排版
+        self.option_buttons = self._create_option_set('options_a')
+        self.spare_options = self._create_option_set('options_b')
+        self.spare_question_id = None
+        self.prelayout_trigger = Clock.create_trigger(self.prelayout_next, 0.1)
+        
+        # 答案显示区域（自动换行；超过窗口 40% 高度时在区域内滚动，高度为 0 时隐藏）
+        self.answer_scroll_view = ScrollView(
+            do_scroll_x=False,
+            do_scroll_y=True,
+            size_hint_y=None,
+            height=0
+        )
         self.answer_label = Label(
             text='',
             text_size=(Window.width - 40, None),
             halign='left',
             valign='top',
             font_size='14sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None,
+            font_name=get_chinese_font(),
             color=(0, 0, 0, 1),
             size_hint_y=None,
             markup=True
         )
         self.answer_label.bind(texture_size=self.answer_label.setter('size'))
-        self.answer_label.height = 0  # 初始隐藏
-        main_layout.add_widget(self.answer_label)
+        self.answer_scroll_view.add_widget(self.answer_label)
+        main_layout.add_widget(self.answer_scroll_view)
         
         # 控制按钮
-        controls_layout = GridLayout(cols=2, spacing=10, size_hint_y=None, height='50dp')
+        controls_layout = GridLayout(cols=2, spacing=10, size_hint_y=None, height='100dp')
         
         self.prev_btn = Button(
             text='上一题',
             background_color=(0.3, 0.7, 0.3, 1),
             font_size='14sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None
+            font_name=get_chinese_font()
         )
         self.prev_btn.bind(on_press=self.prev_question)
         
@@ -274,7 +377,7 @@ class QuestionApp(App):
             text='下一题',
             background_color=(0.2, 0.6, 0.9, 1),
             font_size='14sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None
+            font_name=get_chinese_font()
         )
         self.next_btn.bind(on_press=self.next_question)
         
@@ -282,7 +385,7 @@ class QuestionApp(App):
             text='查看答案',
             background_color=(1.0, 0.65, 0.0, 1),
             font_size='14sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None
+            font_name=get_chinese_font()
         )
         self.show_answer_btn.bind(on_press=self.toggle_answer)
         
@@ -290,124 +393,377 @@ class QuestionApp(App):
             text='自动轮播',
             background_color=(0.6, 0.2, 0.7, 1),
             font_size='14sp',
-            font_name=CHINESE_FONT if CHINESE_FONT else None
+            font_name=get_chinese_font()
         )
         self.auto_play_btn.bind(on_press=self.toggle_auto_play)
         
+        self.review_btn = Button(
+            text='智能复习',
+            background_color=(0.0, 0.59, 0.53, 1),
+            font_size='14sp',
+            font_name=get_chinese_font()
+        )
+        self.review_btn.bind(on_press=self.toggle_review_mode)
+        
+        self.stats_btn = Button(
+            text='统计',
+            background_color=(0.38, 0.49, 0.55, 1),
+            font_size='14sp',
+            font_name=get_chinese_font()
+        )
+        # 短按显示/隐藏统计，长按显示/隐藏诊断信息
+        self.stats_btn.bind(on_press=self.on_stats_pressed, on_release=self.on_stats_released)
+        
+        self.skip_btn = Button(
+            text='跳过本句',
+            background_color=(0.5, 0.5, 0.5, 1),
+            font_size='14sp',
+            font_name=get_chinese_font()
+        )
+        self.skip_btn.bind(on_press=self.skip_segment)
+        
         controls_layout.add_widget(self.prev_btn)
         controls_layout.add_widget(self.next_btn)
         controls_layout.add_widget(self.show_answer_btn)
         controls_layout.add_widget(self.auto_play_btn)
+        controls_layout.add_widget(self.review_btn)
+        controls_layout.add_widget(self.stats_btn)
+        controls_layout.add_widget(self.skip_btn)
         
         main_layout.add_widget(controls_layout)
         
+        # 统计面板（按题目和科目的正确率、用时；隐藏时文本为空）
+        self.stats_label = Label(
+            text='',
+            text_size=(Window.width - 40, None),
+            halign='left',
+            valign='top',
+            font_size='13sp',
+            font_name=get_chinese_font(),
+            color=(0.2, 0.2, 0.2, 1),
+            size_hint_y=None
+        )
+        self.stats_label.bind(texture_size=self.stats_label.setter('size'))
+        main_layout.add_widget(self.stats_label)
+        
         # 将主容器添加到滚动视图
         main_scroll.add_widget(main_layout)
         
-        # 加载题目数据
+        # 在后台线程加载题目数据（界面先显示"加载中..."）
+        self.counter_label.text = '加载中...'
         self.load_questions()
         
-        # 显示第一题
-        if self.questions:
-            try:
-                self.show_question(0)
-            except Exception as e:
-                print(f"显示题目时出错: {e}")
-                import traceback
-                traceback.print_exc()
+        # 事件循环延迟监控：每帧心跳 + 卡顿时采样调用栈
+        self.lag_monitor = start_monitor(LAG_HEARTBEAT_INTERVAL)
+        if self.lag_monitor is not None:
+            Clock.schedule_interval(self.lag_monitor.beat, 0)
+        startup_profile.mark('build')
         
         return main_scroll
     
+    @tracing.traced('load_questions')
     def load_questions(self):
-        """加载题目数据"""
-        json_path = Path(__file__).parent / "questions.json"
-        if json_path.exists():
+        """在后台线程加载题目数据，解析结果通过队列交给 Clock 回调"""
+        self.loader = BankLoader()
+        self.bank = self.loader.bank
+        self.scheduler = ReviewScheduler.load(user_data_path(REVIEW_STATE_NAME))
+        self.answer_store = open_store()
+        if self.answer_store is not None:
+            # 恢复上次的答案（按题目 ID，与出题顺序无关）
+            self.bank.user_answers.update(self.answer_store.latest_answers())
+            self.stats.load_rows(self.answer_store.question_stats())
+        self.load_queue = queue.Queue()
+        self.load_thread = threading.Thread(target=self._load_in_background, daemon=True)
+        self.load_thread.start()
+    
+    @tracing.traced('load_questions.worker')
+    def _load_in_background(self):
+        """后台线程：只做解析，不碰任何控件"""
+        bank = self.loader.open_compiled()
+        if bank is None:
+            for batch in self.loader.iter_batches():
+                tracing.instant('load_questions.batch', count=len(batch))
+                self.load_queue.put(('batch', batch))
+                Clock.schedule_once(self.drain_loaded_questions, 0)
+        self.load_queue.put(('done', bank))
+        Clock.schedule_once(self.drain_loaded_questions, 0)
+    
+    def drain_loaded_questions(self, dt):
+        """主线程：把后台解析出的题目按顺序加入题库"""
+        while True:
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        self.questions = data
-                    elif isinstance(data, dict) and 'questions' in data:
-                        self.questions = data['questions']
-                    else:
-                        self.questions = []
-                    
-                    # 过滤掉格式不正确的题目
-                    valid_questions = []
-                    for i, q in enumerate(self.questions):
-                        if isinstance(q, dict) and isinstance(q.get('options'), dict):
-                            valid_questions.append(q)
-                        else:
-                            print(f"警告: 跳过格式不正确的题目 {i} (ID: {q.get('id', 'N/A') if isinstance(q, dict) else 'N/A'})")
-                    
-                    self.questions = valid_questions
-                    print(f"成功加载 {len(self.questions)} 道有效题目")
-                    
-                    # 随机打乱题目
-                    if self.questions:
-                        random.shuffle(self.questions)
-            except Exception as e:
-                print(f"加载题目失败: {e}")
-                import traceback
-                traceback.print_exc()
-                self.questions = []
+                kind, payload = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == 'batch':
+                first = not self.bank
+                self.loader.apply(payload)
+                if first and self.bank:
+                    self.show_question(0)
+                continue
+            
+            self.loader.finish(payload)
+            if self.loader.bank is not self.bank:
+                self.bank = self.loader.bank
+                if self.bank:
+                    self.show_question(0)
+            if not self.bank:
+                self.counter_label.text = "没有可用的题目"
+                self.question_label.text = ""
+            self.scheduler.attach(self.bank.ids())
+            self.build_search_index()
+            self.watch_bank()
+            startup_profile.mark('bank_loaded')
+            startup_profile.report('android')
+        self.update_counter()
+    
+    def watch_bank(self):
+        """开始定时检查题库文件（只比较修改时间和大小）"""
+        from hot_reload import BankReloader
+        self.reloader = BankReloader(self.loader.path, shuffle=self.loader.shuffle)
+        Clock.schedule_interval(self.check_bank_changed, RELOAD_POLL_INTERVAL)
+    
+    def check_bank_changed(self, dt):
+        """题库文件有变化时在后台线程构建新快照"""
+        if self.reloading or not self.reloader.changed():
+            return
+        self.reloading = True
+        records = self.bank.records
+        order = self.bank.snapshot_order()
+        
+        def build():
+            snapshot = None
+            try:
+                snapshot = self.reloader.build(records, order)
+            finally:
+                Clock.schedule_once(lambda dt: self.on_bank_reloaded(snapshot), 0)
+        
+        threading.Thread(target=build, daemon=True).start()
+    
+    @tracing.traced('reload_bank.apply')
+    def on_bank_reloaded(self, snapshot):
+        """换入新快照，留在同一道题上（不打断朗读和自动轮播）"""
+        self.reloading = False
+        if snapshot is None:
+            return
+        current = self.bank.current
+        previous_id = current.id if current is not None else None
+        if not self.reloader.apply(self.bank, snapshot):
+            return
+        self.spare_question_id = None
+        self.speech_queue.clear()
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        self.scheduler.attach(snapshot.positions)
+        self.build_search_index()
+        current = self.bank.current
+        if current is None:
+            self.counter_label.text = "没有可用的题目"
+        elif current.id != previous_id:
+            self.show_question(self.bank.current_index)
+        elif current.id in snapshot.changed:
+            self.render_question(current, self.bank.current_index)
+            if self.answer_scroll_view.height != 0:
+                self.show_answer()
         else:
-            print(f"题目文件不存在: {json_path}")
-            self.questions = []
+            self.update_counter()
+        # 重新预排下一题的选项（原来的可能是修改前的题目）
+        self.prelayout_trigger()
+    
+    def build_search_index(self):
+        """在后台线程建立全文检索索引（题目记录只读，可跨线程访问）"""
+        self.search_index = None
+        records = self.bank.records
+        
+        def build():
+            from search_index import SearchIndex
+            try:
+                index = SearchIndex(records)
+            except ValueError:
+                # 建立期间题库已重新加载，旧的编译题库已关闭
+                return
+            # 建立期间题库已重新加载时丢弃（由新的建立任务替换）
+            if self.bank.records is records:
+                self.search_index = index
+        
+        threading.Thread(target=build, daemon=True).start()
+    
+    def on_search_text(self, instance, text):
+        """搜索框内容变化：停止输入 SEARCH_DEBOUNCE 秒后再检索"""
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        self.search_trigger.cancel()
+        self.search_trigger()
+    
+    def run_search(self, dt):
+        """按搜索框内容重新检索并跳到第一个结果"""
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        text = self.search_input.text.strip()
+        if not text:
+            self.search_status.text = ''
+            return
+        if self.search_index is None:
+            self.search_status.text = '索引建立中...'
+            return
+        
+        positions = (self.bank.position_of_record(r) for r in self.search_index.search(text))
+        self.search_hits = [pos for pos in positions if pos is not None]
+        if not self.search_hits:
+            self.search_status.text = '无结果'
+            return
+        self.next_search_hit(None)
+    
+    def next_search_hit(self, instance):
+        """跳到下一个搜索结果"""
+        if not self.search_hits:
+            return
+        self.search_hit_cursor = (self.search_hit_cursor + 1) % len(self.search_hits)
+        self.search_status.text = f"{self.search_hit_cursor + 1}/{len(self.search_hits)}"
+        self.show_question(self.search_hits[self.search_hit_cursor])
+    
+    def _create_option_set(self, group):
+        """创建一组选项控件（每个选项键一个，只绑定一次回调）"""
+        buttons = {}
+        for opt in OPTION_KEYS:
+            option_widget = OptionButton(opt, group=group)  # 不在这里添加 "A. " 前缀，在 OptionButton 中处理
+            option_widget.toggle.bind(state=self.on_option_selected)
+            buttons[opt] = option_widget
+        return buttons
+    
+    @staticmethod
+    def _fill_options(buttons, question):
+        """把题目选项填入一组控件，返回该题的选项键"""
+        options = dict(question.option_items())
+        for opt, option_widget in buttons.items():
+            option_widget.set_option(options.get(opt, ''))
+        return list(options)
+    
+    def prelayout_next(self, dt):
+        """空闲时把下一题的选项填入备用控件并生成纹理（复习模式下下一题不确定，跳过）"""
+        if self.review_mode or not self.bank:
+            return
+        question = self.bank[self.bank.next_index()]
+        if question.id == self.spare_question_id:
+            return
+        self.restoring_selection = True
+        for option_widget in self.spare_options.values():
+            option_widget.set_selected(False)
+        self.restoring_selection = False
+        for opt in self._fill_options(self.spare_options, question):
+            self.spare_options[opt].prelayout()
+        self.spare_question_id = question.id
     
+    def on_pause(self):
+        """切到后台时保存复习进度和答题记录（之后可能被系统直接结束）"""
+        if self.lag_monitor is not None:
+            self.lag_monitor.pause()
+            self.lag_monitor.dump()
+        self.save_review_state()
+        self.save_speech_timing()
+        tracing.dump()
+        if self.answer_store is not None:
+            self.answer_store.flush(1.0)
+        return True
+    
+    def on_resume(self):
+        """回到前台，恢复延迟监控"""
+        if self.lag_monitor is not None:
+            self.lag_monitor.resume()
+    
+    def on_stop(self):
+        """退出应用时停止后台加载，保存复习进度"""
+        if self.loader is not None:
+            self.loader.cancel()
+        if self.lag_monitor is not None:
+            self.lag_monitor.stop()
+            self.lag_monitor.dump()
+        self.save_review_state()
+        self.save_speech_timing()
+        tracing.dump()
+        if self.answer_store is not None:
+            self.answer_store.close()
+    
+    def save_review_state(self):
+        """保存复习进度"""
+        if self.scheduler is None:
+            return
+        try:
+            self.scheduler.save(user_data_path(REVIEW_STATE_NAME))
+        except Exception as e:
+            print(f"保存复习进度失败: {e}")
+    
+    def save_speech_timing(self):
+        """保存朗读时长模型"""
+        if self.speech_timing is None:
+            return
+        try:
+            save_model(self.speech_engine_name, self.speech_timing)
+        except Exception as e:
+            print(f"保存朗读时长模型失败: {e}")
+    
+    def update_counter(self):
+        """更新题目计数器"""
+        question = self.bank.current
+        if question is not None:
+            prefix = "[复习] " if self.review_mode else ""
+            self.counter_label.text = f"{prefix}题目 {self.bank.current_index + 1} / {len(self.bank)} (ID: {question.id})"
+    
+    @tracing.traced('show_question')
     def show_question(self, index: int):
         """显示指定题目"""
-        if not self.questions or index < 0 or index >= len(self.questions):
+        question = self.bank.go_to(index)
+        if question is None:
             return
+        startup_profile.mark('first_question')
+        self.render_question(question, index)
+        self.answer_graded = False
+        self.question_shown_at = time.monotonic()
+        self.refresh_stats()
+        self.prelayout_trigger()
         
-        self.current_index = index
-        question = self.questions[index]
-        
-        # 确保 question 是字典类型
-        if not isinstance(question, dict):
-            print(f"错误: 题目 {index} 不是字典类型: {type(question)}")
-            return
+        # 隐藏答案
+        self.hide_answer()
         
+        # 如果自动轮播开启，自动显示答案并开始朗读（先停掉上一题的朗读）
+        if self.auto_play_enabled:
+            self.stop_speech()
+            self.show_answer()
+            self.speak_question()
+        else:
+            self.stop_speech()
+    
+    def render_question(self, question, index: int):
+        """显示题目、选项和已有的选择（不改变朗读和轮播状态）"""
         # 更新计数器
-        question_id = question.get('id', 'N/A') if isinstance(question, dict) else 'N/A'
-        self.counter_label.text = f"题目 {index + 1} / {len(self.questions)} (ID: {question_id})"
+        self.update_counter()
         
         # 显示题目
-        question_title = question.get('title', '') if isinstance(question, dict) else ''
-        self.question_label.text = question_title
+        self.question_label.text = question.title
         self.question_label.text_size = (Window.width - 40, None)
         
-        # 清空并重建选项
+        # 选项：下一题已在空闲时排版好则交换两组控件，否则复用当前控件更新文本
+        # （选项格式已在题库加载时校验）
+        if question.id == self.spare_question_id:
+            self.option_buttons, self.spare_options = self.spare_options, self.option_buttons
+            keys = [opt for opt, _ in question.option_items()]
+        else:
+            keys = self._fill_options(self.option_buttons, question)
+        self.spare_question_id = None
         self.options_container.clear_widgets()
-        self.option_buttons = {}
-        
-        # 获取选项，确保是字典类型
-        options = question.get('options', {}) if isinstance(question, dict) else {}
-        # 如果 options 不是字典，尝试处理
-        if not isinstance(options, dict):
-            print(f"警告: 题目 {index} 的 options 格式不正确: {type(options)}, 值: {options}")
-            options = {}
-        
-        for opt in ['A', 'B', 'C', 'D']:
-            if opt in options and isinstance(options[opt], str):
-                option_widget = OptionButton(opt, options[opt])  # 不在这里添加 "A. " 前缀，在 OptionButton 中处理
-                option_widget.toggle.bind(state=self.on_option_selected)
-                self.option_buttons[opt] = option_widget
-                self.options_container.add_widget(option_widget)
-        
-        # 恢复用户之前的选择
-        if index in self.user_answers:
-            selected = self.user_answers[index]
+        for opt in keys:
+            self.options_container.add_widget(self.option_buttons[opt])
+        
+        # 恢复用户之前的选择（恢复时触发的回调不计入复习评分）
+        self.restoring_selection = True
+        for option_widget in self.option_buttons.values():
+            option_widget.set_selected(False)
+        selected = self.bank.answer_for(index)
+        if selected is not None:
             if selected in self.option_buttons:
                 self.option_buttons[selected].set_selected(True)
-        
-        # 隐藏答案
-        self.hide_answer()
-        
-        # 如果自动轮播开启，自动显示答案并开始朗读
-        if self.auto_play_enabled:
-            self.show_answer()
-            Clock.schedule_once(lambda dt: self.speak_question(), 0.3)
+        self.restoring_selection = False
     
     def on_option_selected(self, instance, state):
         """选项被选择时的回调"""
@@ -415,32 +771,96 @@ class QuestionApp(App):
             # 找到对应的选项键
             for opt, widget in self.option_buttons.items():
                 if widget.toggle == instance:
-                    self.user_answers[self.current_index] = opt
+                    self.bank.record_answer(self.bank.current_index, opt)
+                    self.record_event(opt)
                     break
     
+    def record_event(self, option: str):
+        """写入答题记录
+
+        每次显示题目时的第一次选择计入统计和复习评分，之后改选只记入历史。
+        """
+        question = self.bank.current
+        if self.restoring_selection or question is None:
+            return
+        correct = option == question.answer
+        graded = not self.answer_graded
+        elapsed = time.monotonic() - self.question_shown_at
+        if self.answer_store is not None:
+            self.answer_store.record(question.id, option, correct, elapsed=elapsed,
+                                     graded=graded, subject=question.subject)
+        if not graded:
+            return
+        self.answer_graded = True
+        self.stats.record(question.id, question.subject, correct, elapsed)
+        if self.scheduler is not None:
+            self.scheduler.review(question.id, correct)
+        self.refresh_stats()
+    
+    def on_stats_pressed(self, instance):
+        self.stats_pressed_at = time.monotonic()
+    
+    def on_stats_released(self, instance):
+        """短按切换统计面板，长按切换诊断信息"""
+        if time.monotonic() - self.stats_pressed_at >= DIAGNOSTICS_HOLD and self.lag_monitor is not None:
+            self.diagnostics_visible = not self.diagnostics_visible
+            if self.diagnostics_visible:
+                self.lag_monitor.dump()
+            self.stats_visible = True
+            self.refresh_stats()
+        else:
+            self.toggle_stats(instance)
+    
+    def toggle_stats(self, instance):
+        """显示/隐藏统计面板"""
+        self.stats_visible = not self.stats_visible
+        if self.stats_visible:
+            self.refresh_stats()
+        else:
+            self.stats_label.text = ''
+    
+    def refresh_stats(self):
+        """统计面板可见时更新内容（直接读取汇总结果，不扫描历史）"""
+        if not self.stats_visible:
+            return
+        question = self.bank.current
+        lines = self.stats.summary_lines(question.id if question is not None else None)
+        if self.diagnostics_visible and self.lag_monitor is not None:
+            lines.extend(self.lag_monitor.summary_lines())
+        self.stats_label.text = "\n".join(lines)
+    
     def prev_question(self, instance):
         """上一题"""
-        if self.current_index > 0:
-            self.show_question(self.current_index - 1)
-        else:
-            if self.questions:
-                self.show_question(len(self.questions) - 1)
+        if self.bank:
+            self.show_question(self.bank.prev_index())
     
     def next_question(self, instance):
-        """下一题"""
-        if self.current_index < len(self.questions) - 1:
-            self.show_question(self.current_index + 1)
+        """下一题（复习模式下由复习调度器选择，自动轮播同样适用）"""
+        if not self.bank:
+            return
+        index = None
+        if self.review_mode and self.scheduler is not None:
+            index = self.scheduler.next_position(self.bank)
+        self.show_question(self.bank.next_index() if index is None else index)
+    
+    def toggle_review_mode(self, instance):
+        """切换出题顺序：题库顺序 / 间隔重复复习"""
+        self.review_mode = not self.review_mode
+        self.review_btn.text = "退出复习" if self.review_mode else "智能复习"
+        if self.review_mode:
+            self.next_question(None)
         else:
-            self.show_question(0)
+            self.update_counter()
     
+    @tracing.traced('show_answer')
     def show_answer(self):
         """显示答案"""
-        if not self.questions or self.current_index >= len(self.questions):
+        question = self.bank.current
+        if question is None:
             return
         
-        question = self.questions[self.current_index]
-        answer = question.get('answer', '')
-        analysis = question.get('analysis', '')
+        answer = question.answer
+        analysis = question.analysis
         
         # 获取用户选择
         user_selected = None
@@ -462,6 +882,8 @@ class QuestionApp(App):
         
         self.answer_label.text = answer_text
         self.answer_label.text_size = (Window.width - 40, None)
+        # 立即重新排版，否则 texture_size 仍是上一题答案的尺寸
+        self.answer_label.texture_update()
         # 设置答案区域高度，允许滚动（最大高度为窗口的40%）
         max_height = Window.height * 0.4
         label_height = self.answer_label.texture_size[1] + 40 if self.answer_label.texture_size[1] else 0
@@ -480,56 +902,143 @@ class QuestionApp(App):
         else:
             self.hide_answer()
     
+    def ensure_tts(self) -> bool:
+        """导入 plyer 并准备朗读时长模型（只在第一次朗读时执行），返回是否可用"""
+        global tts
+        if self.tts_initialized:
+            return tts is not None
+        self.tts_initialized = True
+        try:
+            from plyer import tts as plyer_tts
+        except ImportError:
+            print("警告: plyer 未安装，语音功能不可用")
+            return False
+        tts = plyer_tts
+        self.speech_timing = load_model(self.speech_engine_name)
+        self.audio_probe = android_audio_probe()
+        return True
+    
+    @tracing.traced('speak_question')
     def speak_question(self):
         """朗读题目"""
-        if not TTS_AVAILABLE:
+        if not self.ensure_tts():
             print("TTS 不可用")
             if self.auto_play_enabled:
-                Clock.schedule_once(lambda dt: self.next_question(None), 3)
+                self.schedule_auto_advance()
             return
         
-        if not self.questions or self.current_index >= len(self.questions):
+        question = self.bank.current
+        if question is None:
             return
         
-        question = self.questions[self.current_index]
-        title = question.get('title', '')
-        answer = question.get('answer', '')
-        analysis = question.get('analysis', '')
-        options = question.get('options', {})
-        
-        # 构建朗读文本
-        text = f"题目：{title}。"
-        
-        if options:
-            text += "选项："
-            for opt in ['A', 'B', 'C', 'D']:
-                if opt in options:
-                    text += f"{opt}，{options[opt]}。"
-        
-        text += f"答案：{answer}。"
-        
-        if analysis:
-            text += f"解析：{analysis}。"
-        
-        # 使用 plyer TTS
+        # 先读题干第一句，其余片段在每段读完后依次送入
+        self.speak_segment(self.speech_queue.start(question))
+        self.prefetch_speech()
+    
+    @tracing.traced('speak_segment')
+    def speak_segment(self, segment):
+        """朗读一个片段，按估算时长（或音频播放结束）安排下一段"""
+        # 取消上一段还没到的结束回调，避免它在新片段（或新题目）上触发
+        if self.speech_event is not None:
+            self.speech_event.cancel()
+            self.speech_event = None
+        if segment is None:
+            return
         try:
             self.is_speaking = True
-            # plyer TTS 是同步的，需要估算时间
-            tts.speak(text)
-            # 估算朗读时间（粗略估计：每秒3-5个字，中文稍慢）
-            estimated_time = len(text) / 3  # 假设每秒3个字（中文）
-            Clock.schedule_once(self.on_speak_finished, estimated_time)
+            # plyer TTS 没有完成回调，按自校准的时长模型估算
+            self.segment_estimate = self.speech_timing.estimate(segment)
+            self.segment_started = time.monotonic()
+            self.segment_heard = False
+            tts.speak(segment)
+            if self.audio_probe is not None:
+                self.speech_event = Clock.schedule_interval(self.poll_segment, SEGMENT_POLL_INTERVAL)
+            else:
+                self.speech_event = Clock.schedule_once(self.on_segment_finished, self.segment_estimate)
         except Exception as e:
             print(f"朗读失败: {e}")
             self.is_speaking = False
+            self.speech_queue.stop()
             if self.auto_play_enabled:
-                Clock.schedule_once(lambda dt: self.next_question(None), 3)
+                self.schedule_auto_advance()
     
-    def on_speak_finished(self, dt):
-        """朗读完成回调"""
-        if self.is_speaking and self.auto_play_enabled:
-            self.is_speaking = False
-            Clock.schedule_once(lambda dt: self.next_question(None), 0.5)
+    def poll_segment(self, dt):
+        """轮询音频是否仍在播放：播放结束即为完成信号，同时用于校准时长模型"""
+        segment = self.speech_queue.current
+        elapsed = time.monotonic() - self.segment_started
+        try:
+            playing = self.audio_probe()
+        except Exception:
+            playing = False
+        if playing:
+            self.segment_heard = True
+            # 其他应用也在播放音频时收不到结束信号，最多等到估算时长的 2 倍
+            if elapsed < self.segment_estimate * 2:
+                return True
+        elif self.segment_heard:
+            if segment is not None:
+                self.speech_timing.observe(segment, elapsed)
+        elif elapsed < self.segment_estimate:
+            # 引擎还没开始出声
+            return True
+        self.speech_event = None
+        self.on_segment_finished(dt)
+        return False
+    
+    def on_segment_finished(self, dt):
+        """一段读完：送入下一段；整题读完时自动轮播立即切到下一题"""
+        self.speech_event = None
+        if not self.speech_queue.active:
+            return
+        tracing.instant('segment_finished', estimated=bool(dt))
+        if self.audio_probe is None and dt:
+            # 没有完成信号，按估算时长播完且用户没有跳过
+            self.speech_timing.observe_quiet(self.speech_queue.current)
+        segment = self.speech_queue.next()
+        if segment is not None:
+            self.speak_segment(segment)
+            return
+        self.is_speaking = False
+        if self.auto_play_enabled:
+            tracing.instant('auto_play_advance')
+            self.next_question(None)
+    
+    def skip_segment(self, instance):
+        """跳过正在朗读的片段（新片段会打断当前朗读）"""
+        if self.speech_event is not None:
+            self.speech_event.cancel()
+            if self.audio_probe is None and self.speech_queue.current is not None:
+                # 在估算时长之前跳过，多半是这段已经读完了
+                self.speech_timing.observe_skip(self.speech_queue.current,
+                                                time.monotonic() - self.segment_started)
+            self.on_segment_finished(0)
+    
+    def stop_speech(self):
+        """停止朗读并丢弃剩余片段"""
+        self.speech_queue.stop()
+        self.is_speaking = False
+        if self.speech_event is not None:
+            self.speech_event.cancel()
+            self.speech_event = None
+        if self.auto_advance_event is not None:
+            self.auto_advance_event.cancel()
+            self.auto_advance_event = None
+    
+    def schedule_auto_advance(self):
+        """朗读不可用时停留 AUTO_ADVANCE_DELAY 秒后翻页（替换之前未到的翻页）"""
+        if self.auto_advance_event is not None:
+            self.auto_advance_event.cancel()
+        self.auto_advance_event = Clock.schedule_once(self.on_auto_advance, AUTO_ADVANCE_DELAY)
+    
+    def on_auto_advance(self, dt):
+        self.auto_advance_event = None
+        if self.auto_play_enabled and self.bank:
+            self.next_question(None)
+    
+    def prefetch_speech(self):
+        """朗读期间准备好下一题的片段（复习模式下下一题由调度器决定，跳过）"""
+        if not self.review_mode and self.bank:
+            self.speech_queue.prepare(self.bank[self.bank.next_index()])
     
     def toggle_auto_play(self, instance):
         """切换自动轮播"""
@@ -537,13 +1046,14 @@ class QuestionApp(App):
             self.auto_play_enabled = False
             self.auto_play_btn.text = "自动轮播"
             self.auto_play_btn.background_color = (0.6, 0.2, 0.7, 1)
+            self.stop_speech()
             self.hide_answer()
         else:
             self.auto_play_enabled = True
             self.auto_play_btn.text = "停止轮播"
             self.auto_play_btn.background_color = (0.8, 0.2, 0.2, 1)
             self.show_answer()
-            Clock.schedule_once(lambda dt: self.speak_question(), 0.3)
+            self.speak_question()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基金从业资格证答题（终端版）
+
+不依赖 Qt / Kivy，在 SSH、tmux 或没有图形界面的机器上直接刷题。
+与桌面版、Android 版共用题库、答题记录、统计和复习进度。
+
+按键:
+    n / → / 空格  下一题        p / ←   上一题
+    1-4 / a-d     选择选项      v       查看/隐藏答案
+    /             搜索          N       下一个搜索结果
+    r             智能复习开/关 s       统计
+    ?             帮助          q       退出
+
+用法:
+    python3 main_terminal.py [题库] [--no-save] [--no-shuffle]
+
+--no-save 时不读写答题记录和复习进度（只在本次运行中记录）。
+标准输入不是终端时按行读取命令，每行一个按键（或 "/关键词"）。
+"""
+
+# 最先导入：以此为起点记录各启动阶段的耗时
+import startup_profile
+import tracing
+
+import os
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from question_bank import OPTION_KEYS, QuestionBank, default_bank_path, user_data_path
+from answer_stats import AnswerStats
+from scheduler import REVIEW_STATE_NAME, ReviewScheduler
+
+
+# 上次看到的题目 ID（下次启动时回到这道题）
+LAST_QUESTION_NAME = 'terminal_last.txt'
+
+CLEAR = '\x1b[H\x1b[2J'
+BOLD, DIM, GREEN, RED, RESET = '\x1b[1m', '\x1b[2m', '\x1b[32m', '\x1b[31m', '\x1b[0m'
+
+HELP = """按键:
+  n / → / 空格  下一题        p / ←   上一题
+  1-4 / a-d     选择选项      v       查看/隐藏答案
+  /             搜索          N       下一个搜索结果
+  r             智能复习开/关 s       统计
+  ?             帮助          q       退出"""
+
+_ARROWS = {'\x1b[C': 'right', '\x1b[D': 'left', '\x1bOC': 'right', '\x1bOD': 'left'}
+
+
+def display_width(text: str) -> int:
+    """终端显示宽度（全角字符占两列）"""
+    return sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+
+
+def wrap(text: str, width: int, indent: str = '') -> List[str]:
+    """按显示宽度折行"""
+    lines = []
+    for paragraph in text.splitlines() or ['']:
+        line, used = indent, display_width(indent)
+        for ch in paragraph:
+            w = 2 if unicodedata.east_asian_width(ch) in 'WF' else 1
+            if used + w > width and line.strip():
+                lines.append(line)
+                line, used = indent, display_width(indent)
+            line += ch
+            used += w
+        lines.append(line)
+    return lines
+
+
+def read_keys() -> Iterator[str]:
+    """逐个读取按键（终端原始模式）；不是终端时按行读取"""
+    if not sys.stdin.isatty():
+        for line in sys.stdin:
+            line = line.rstrip('\n')
+            yield line if line.startswith('/') else (line[:1] or ' ')
+        return
+
+    import termios
+    import tty
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        while True:
+            ch = os.read(fd, 8).decode('utf-8', 'ignore')
+            if not ch:
+                return
+            yield _ARROWS.get(ch, ch)
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+
+
+def read_line(prompt: str) -> str:
+    """读取一行输入（在原始模式下临时恢复行编辑）"""
+    if not sys.stdin.isatty():
+        return ''
+    import termios
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    cooked = termios.tcgetattr(fd)
+    cooked[3] |= termios.ICANON | termios.ECHO
+    termios.tcsetattr(fd, termios.TCSADRAIN, cooked)
+    try:
+        return input(prompt)
+    except EOFError:
+        return ''
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+
+
+class TerminalDrill:
+    """终端刷题界面"""
+
+    def __init__(self, bank: QuestionBank, save: bool = True, source: Optional[Path] = None,
+                 shuffle: bool = True):
+        self.bank = bank
+        self.save = save
+        self.show_answer = False
+        self.message = ''
+        self.stats = AnswerStats()
+        self.stats_visible = False
+        self.answer_graded = False
+        self.question_shown_at = time.monotonic()
+
+        # 全文检索（第一次搜索时建立）
+        self.search_index = None
+        self.search_hits: List[int] = []
+        self.search_hit_cursor = -1
+
+        # 间隔重复复习（每次作答都计入评分，review_mode 为 True 时由调度器决定下一题）
+        self.scheduler = (ReviewScheduler.load(user_data_path(REVIEW_STATE_NAME))
+                          if save else ReviewScheduler())
+        self.scheduler.attach(self.bank.ids())
+        self.review_mode = False
+
+        # 题库热重载：每次按键后检查题库文件是否被修改
+        self.reloader = None
+        if source is not None:
+            from hot_reload import BankReloader
+            self.reloader = BankReloader(source, shuffle=shuffle)
+
+        self.answer_store = None
+        if save:
+            from answer_store import open_store
+            self.answer_store = open_store()
+            if self.answer_store is not None:
+                self.bank.user_answers.update(self.answer_store.latest_answers())
+                self.stats.load_rows(self.answer_store.question_stats())
+            self.restore_position()
+
+    # ---- 持久化 ----
+
+    def restore_position(self):
+        """回到上次看到的题目"""
+        try:
+            question_id = user_data_path(LAST_QUESTION_NAME).read_text(encoding='utf-8').strip()
+        except OSError:
+            return
+        position = self.bank.position_of(question_id)
+        if position is not None:
+            self.bank.go_to(position)
+
+    def close(self):
+        """保存位置和复习进度，关闭答题记录"""
+        tracing.dump()
+        if not self.save:
+            return
+        question = self.bank.current
+        try:
+            if question is not None:
+                user_data_path(LAST_QUESTION_NAME).write_text(question.id, encoding='utf-8')
+            self.scheduler.save(user_data_path(REVIEW_STATE_NAME))
+        except Exception as e:
+            print(f"保存进度失败: {e}")
+        if self.answer_store is not None:
+            self.answer_store.close()
+
+    # ---- 显示 ----
+
+    @tracing.traced('render')
+    def render(self) -> str:
+        width = max(min(os.get_terminal_size(sys.stdout.fileno()).columns
+                        if sys.stdout.isatty() else 80, 100), 20)
+        question = self.bank.current
+        if question is None:
+            return "题库为空\n"
+        selected = self.bank.answer_for(self.bank.current_index)
+        mode = "  [智能复习]" if self.review_mode else ""
+        lines = [f"{DIM}第 {self.bank.current_index + 1}/{len(self.bank)} 题"
+                 f"{'  ' + question.subject if question.subject else ''}{mode}{RESET}", ""]
+        lines += [BOLD + line + RESET for line in wrap(question.title, width)]
+        lines.append("")
+        for opt, text in question.option_items():
+            marker = '●' if opt == selected else '○'
+            color = ''
+            if self.show_answer and opt == question.answer:
+                color = GREEN
+            elif self.show_answer and opt == selected:
+                color = RED
+            option_lines = wrap(f"{marker} {opt}. {text}", width, '')
+            lines += [color + line + (RESET if color else '') for line in option_lines]
+        if self.show_answer:
+            lines.append("")
+            lines.append(f"{BOLD}正确答案：{question.answer}{RESET}")
+            if selected:
+                lines.append(f"{GREEN}✓ 您的选择：{selected} (正确){RESET}" if selected == question.answer
+                             else f"{RED}✗ 您的选择：{selected} (错误){RESET}")
+            if question.analysis:
+                lines += wrap(f"解析：{question.analysis}", width)
+        if self.stats_visible:
+            lines.append("")
+            lines += [DIM + line + RESET for line in self.stats.summary_lines(question.id)]
+        lines.append("")
+        lines.append(self.message or f"{DIM}n 下一题  p 上一题  1-4 选择  v 答案  / 搜索  ? 帮助  q 退出{RESET}")
+        return CLEAR + "\n".join(lines) + "\n"
+
+    # ---- 操作 ----
+
+    @tracing.traced('show_question')
+    def show_question(self, index: int):
+        if self.bank.go_to(index) is None:
+            return
+        self.show_answer = False
+        self.answer_graded = False
+        self.question_shown_at = time.monotonic()
+
+    def next_question(self):
+        """下一题（复习模式下由复习调度器选择）"""
+        index = None
+        if self.review_mode:
+            index = self.scheduler.next_position(self.bank)
+        self.show_question(self.bank.next_index() if index is None else index)
+
+    def select(self, option: str):
+        """选择选项并写入答题记录
+
+        每次显示题目时的第一次选择计入统计和复习评分，之后改选只记入历史。
+        """
+        question = self.bank.current
+        if question is None or option not in question.options:
+            return
+        self.bank.record_answer(self.bank.current_index, option)
+        correct = option == question.answer
+        graded = not self.answer_graded
+        elapsed = time.monotonic() - self.question_shown_at
+        if self.answer_store is not None:
+            self.answer_store.record(question.id, option, correct, elapsed=elapsed,
+                                     graded=graded, subject=question.subject)
+        self.show_answer = True
+        if not graded:
+            return
+        self.answer_graded = True
+        self.stats.record(question.id, question.subject, correct, elapsed)
+        self.scheduler.review(question.id, correct)
+
+    def search(self, query: str):
+        """搜索并跳到第一个结果"""
+        query = query.strip()
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        if not query:
+            return
+        if self.search_index is None:
+            from search_index import SearchIndex
+            self.search_index = SearchIndex(self.bank.records)
+        for record in self.search_index.search(query, limit=50):
+            position = self.bank.position_of_record(record)
+            if position is not None:
+                self.search_hits.append(position)
+        if not self.search_hits:
+            self.message = f"没有找到 “{query}”"
+            return
+        self.next_search_hit()
+
+    def next_search_hit(self):
+        if not self.search_hits:
+            self.message = "没有搜索结果"
+            return
+        self.search_hit_cursor = (self.search_hit_cursor + 1) % len(self.search_hits)
+        self.show_question(self.search_hits[self.search_hit_cursor])
+        self.message = f"搜索结果 {self.search_hit_cursor + 1}/{len(self.search_hits)}（N 下一个）"
+
+    def check_reload(self):
+        """题库文件被修改时重新加载（停留在同一道题上，答案按 ID 保留）"""
+        if self.reloader is None or not self.reloader.changed():
+            return
+        snapshot = self.reloader.build(self.bank.records, self.bank.snapshot_order())
+        if snapshot is None or not self.reloader.apply(self.bank, snapshot):
+            return
+        self.search_index = None
+        self.search_hits = []
+        self.search_hit_cursor = -1
+        self.scheduler.attach(snapshot.positions)
+        self.message = snapshot.summary()
+
+    def toggle_review_mode(self):
+        """切换出题顺序：题库顺序 / 间隔重复复习"""
+        self.review_mode = not self.review_mode
+        self.message = (f"智能复习：待复习 {self.scheduler.due_count()} 道，新题 {self.scheduler.new_count} 道"
+                        if self.review_mode else "已退出智能复习")
+        if self.review_mode:
+            self.next_question()
+
+    def handle(self, key: str) -> bool:
+        """处理一个按键，返回 False 表示退出"""
+        self.message = ''
+        if key in ('q', '\x04'):
+            return False
+        if key in ('n', ' ', 'right', 'j'):
+            self.next_question()
+        elif key in ('p', 'left', 'k'):
+            self.show_question(self.bank.prev_index())
+        elif key in ('1', '2', '3', '4'):
+            self.select(OPTION_KEYS[int(key) - 1])
+        elif key.upper() in OPTION_KEYS and len(key) == 1 and key.islower():
+            self.select(key.upper())
+        elif key == 'v':
+            self.show_answer = not self.show_answer
+        elif key.startswith('/'):
+            self.search(key[1:] if len(key) > 1 else read_line("搜索: "))
+        elif key == 'N':
+            self.next_search_hit()
+        elif key == 'r':
+            self.toggle_review_mode()
+        elif key == 's':
+            self.stats_visible = not self.stats_visible
+        elif key == '?':
+            self.message = HELP
+        return True
+
+    def run(self):
+        out = sys.stdout
+        out.write(self.render())
+        out.flush()
+        startup_profile.mark('first_frame')
+        startup_profile.report('terminal')
+        try:
+            for key in read_keys():
+                if not self.handle(key):
+                    break
+                self.check_reload()
+                out.write(self.render())
+                out.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if '-h' in args or '--help' in args:
+        print(__doc__)
+        return 0
+    save = '--no-save' not in args
+    shuffle = '--no-shuffle' not in args
+    paths = [a for a in args if not a.startswith('--')]
+    tracing.install_signal_handler()
+    with tracing.span('load_questions'):
+        source = Path(paths[0]) if paths else default_bank_path()
+        bank = QuestionBank.load(source, shuffle=shuffle)
+    if not bank:
+        print("没有可用的题目")
+        return 1
+    TerminalDrill(bank, save=save, source=source, shuffle=shuffle).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
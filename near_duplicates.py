@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近似重复题目检测（MinHash + LSH）
+
+多个来源合并的题库里，同一道题常常换了 ID、改了几个字又出现一次。
+对 "题干 + 选项" 的字符 3-gram 计算 MinHash 签名（单次哈希分桶的
+one-permutation 变体，每个 shingle 只哈希一次），再按 LSH 分段:
+签名任意一段完全相同的题目才成为候选对，避免两两比较。
+
+候选对满足以下两点才视为重复:
+    签名估算的 Jaccard 相似度 >= threshold（默认 0.8）
+    正确答案对应的选项文本相同（"3个工作日" 和 "5个工作日" 这类题不会被合并）
+
+NearDuplicateFilter 是增量的，可以直接套在流式加载上。计算签名占去重的大部分时间，
+签名随编译题库保存（见 compiled_bank），重新编译时内容未变的题目直接取用。
+
+用法:
+    python3 near_duplicates.py [questions.json]      # 列出重复题目簇
+"""
+
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from question_bank import Question, DEFAULT_BANK_PATH, iter_questions
+
+
+SHINGLE_SIZE = 3
+BANDS = 8
+ROWS = 8
+NUM_BINS = BANDS * ROWS           # 64 个分桶，对应哈希值的高 6 位
+DEFAULT_THRESHOLD = 0.8
+
+_EMPTY = 0xFFFFFFFF
+_VALUE_MASK = (1 << 26) - 1
+
+
+def question_text(question: Question) -> str:
+    """参与比较的文本：题干 + 选项（去掉空白和标点）"""
+    text = question.title + ''.join(text for _, text in question.option_items())
+    return ''.join(ch for ch in text.lower() if ch.isalnum())
+
+
+def answer_text(question: Question) -> str:
+    """正确答案对应的选项文本（没有时用答案字母）"""
+    text = question.options.get(question.answer)
+    if isinstance(text, str):
+        return ''.join(ch for ch in text.lower() if ch.isalnum())
+    return question.answer
+
+
+def signature(text: str, shingle_size: int = SHINGLE_SIZE) -> Optional[array]:
+    """计算 MinHash 签名，文本为空时返回 None"""
+    if not text:
+        return None
+    if len(text) < shingle_size:
+        shingles = (text,)
+    else:
+        shingles = (text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1))
+
+    sig = array('I', [_EMPTY]) * NUM_BINS
+    for shingle in shingles:
+        h = (zlib.crc32(shingle.encode('utf-8')) * 0x9E3779B1) & 0xFFFFFFFF
+        b = h >> 26
+        v = h & _VALUE_MASK
+        if v < sig[b]:
+            sig[b] = v
+
+    # 空桶向右借用最近的非空桶（加上距离，避免不同空桶取值相同）
+    for b in range(NUM_BINS):
+        if sig[b] == _EMPTY:
+            for step in range(1, NUM_BINS):
+                v = sig[(b + step) % NUM_BINS]
+                if v != _EMPTY and v <= _VALUE_MASK:
+                    sig[b] = v + (step << 26)
+                    break
+    return sig
+
+
+def question_signature(question: Question) -> Optional[array]:
+    """题目的 MinHash 签名"""
+    return signature(question_text(question))
+
+
+def similarity(a: array, b: array) -> float:
+    """由签名估算 Jaccard 相似度"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+
+def _band_keys(sig: Optional[array]) -> List[bytes]:
+    """签名按 LSH 分段后的各段字节串"""
+    if sig is None:
+        return []
+    raw = sig.tobytes()
+    width = ROWS * sig.itemsize
+    return [raw[band * width:(band + 1) * width] for band in range(BANDS)]
+
+
+class NearDuplicateFilter:
+    """增量近似去重：依次检查题目，返回它重复的那道已保留题目的 ID"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD,
+                 signature_of: Optional[Callable[[Question], Optional[array]]] = None):
+        self.threshold = threshold
+        # 计算（或查找已保存的）题目签名
+        self.signature_of = signature_of or question_signature
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(BANDS)]
+        self._signatures: List[Optional[array]] = []
+        self._answers: List[str] = []
+        self._ids: List[str] = []
+        # 保留题目 ID -> 被判为重复的题目 ID 列表
+        self.clusters: Dict[str, List[str]] = {}
+
+    def check(self, question: Question) -> Optional[str]:
+        """重复时返回已保留题目的 ID；否则登记该题并返回 None"""
+        return self.check_signature(question.id, self.signature_of(question), answer_text(question))
+
+    def check_signature(self, question_id: str, sig: Optional[array], answer: str) -> Optional[str]:
+        """同 check()，使用预先计算（或缓存）的签名和答案文本"""
+        keys = _band_keys(sig)
+        if keys:
+            candidates = set()
+            for band, key in enumerate(keys):
+                candidates.update(self._buckets[band].get(key, ()))
+            for idx in sorted(candidates):
+                if (self._answers[idx] == answer
+                        and similarity(self._signatures[idx], sig) >= self.threshold):
+                    kept_id = self._ids[idx]
+                    self.clusters.setdefault(kept_id, []).append(question_id)
+                    return kept_id
+        self._add(question_id, sig, answer, keys)
+        return None
+
+    def register(self, question_id: str, sig: Optional[array], answer: str):
+        """登记一道已知与已登记题目都不重复的题目（不做比较）"""
+        self._add(question_id, sig, answer, _band_keys(sig))
+
+    def _add(self, question_id: str, sig: Optional[array], answer: str, keys: List[bytes]):
+        idx = len(self._ids)
+        self._signatures.append(sig)
+        self._answers.append(answer)
+        self._ids.append(question_id)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(idx)
+
+    @property
+    def signatures(self) -> List[Optional[array]]:
+        """已保留题目的签名（按登记顺序）"""
+        return self._signatures
+
+    @property
+    def duplicate_count(self) -> int:
+        """已跳过的重复题目数"""
+        return sum(len(ids) for ids in self.clusters.values())
+
+
+def drop_near_duplicates(questions: Iterable[Question],
+                         threshold: float = DEFAULT_THRESHOLD,
+                         dedup: Optional[NearDuplicateFilter] = None) -> Iterator[Question]:
+    """过滤近似重复的题目（保留先出现的），结束时打印汇总
+
+    传入 dedup 时使用它（可复用已保存的签名，结束后从 dedup.signatures 取保留题目的签名）。
+    """
+    if dedup is None:
+        dedup = NearDuplicateFilter(threshold)
+    for question in questions:
+        if dedup.check(question) is None:
+            yield question
+    if dedup.clusters:
+        print(f"跳过 {dedup.duplicate_count} 道近似重复题目（{len(dedup.clusters)} 组）")
+
+
+def find_clusters(questions: Iterable[Question],
+                  threshold: float = DEFAULT_THRESHOLD) -> Dict[str, List[str]]:
+    """找出近似重复的题目簇：保留题目 ID -> 重复题目 ID 列表"""
+    dedup = NearDuplicateFilter(threshold)
+    for question in questions:
+        dedup.check(question)
+    return dedup.clusters
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BANK_PATH
+    clusters = find_clusters(iter_questions(path))
+    for kept_id, duplicate_ids in clusters.items():
+        print(f"{kept_id}: {', '.join(duplicate_ids)}")
+    print(f"共 {len(clusters)} 组，{sum(len(ids) for ids in clusters.values())} 道重复题目")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+题库核心模块（不依赖任何界面框架）
+
+桌面版（PyQt6）和 Android 版（Kivy）共用同一套题目加载、校验、
+导航和答题记录逻辑，界面层只负责展示。
+"""
+
+import json
+import os
+import random
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+# 选项键（固定顺序）
+OPTION_KEYS = ('A', 'B', 'C', 'D')
+
+# 默认题库路径
+DEFAULT_BANK_PATH = Path(__file__).parent / "questions.json"
+
+# 用户数据目录（复习进度等），可用环境变量 FUND_EXAM_DATA 指定
+USER_DATA_DIR = Path(os.environ.get('FUND_EXAM_DATA') or Path.home() / '.fund_exam')
+
+
+class Question:
+    """单道题目（使用 __slots__ 减少内存占用）"""
+
+    __slots__ = ('id', 'title', 'options', 'answer', 'analysis', 'subject')
+
+    def __init__(self, id: str, title: str, options: Dict[str, str],
+                 answer: str = '', analysis: str = '', subject: str = ''):
+        self.id = id
+        self.title = title
+        self.options = options
+        self.answer = answer
+        self.analysis = analysis
+        # 科目（来自题目数据或分片题库的文件名/清单）
+        self.subject = subject
+
+    def option_items(self) -> Iterator:
+        """按 A-D 顺序返回有效选项 (键, 文本)"""
+        for opt in OPTION_KEYS:
+            text = self.options.get(opt)
+            if isinstance(text, str):
+                yield opt, text
+
+    def to_dict(self) -> Dict:
+        """转换回 JSON 字典格式"""
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'options': dict(self.options),
+            'answer': self.answer,
+            'analysis': self.analysis,
+        }
+        if self.subject:
+            data['subject'] = self.subject
+        return data
+
+    def __repr__(self):
+        return f"Question(id={self.id!r})"
+
+
+def parse_question(raw) -> Optional[Question]:
+    """转换一条原始题目数据，无法显示（不是字典或 options 不是字典）时返回 None
+
+    这里只做加载所需的最低限度检查，完整校验见 bank_lint.py。
+    """
+    if not isinstance(raw, dict) or not isinstance(raw.get('options'), dict):
+        return None
+    return Question(
+        id=str(raw.get('id', 'N/A')),
+        title=raw.get('title', '') or '',
+        options=raw['options'],
+        answer=raw.get('answer', '') or '',
+        analysis=raw.get('analysis', '') or '',
+        subject=raw.get('subject', '') or '',
+    )
+
+
+# 按行存储的题库扩展名（每行一道题的 JSON）
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+_WHITESPACE = ' \t\r\n'
+
+
+def _iter_json_array(f, buf: str, pos: int, chunk_size: int) -> Iterator:
+    """从 '[' 之后开始逐条解析 JSON 数组元素
+
+    元素之间必须恰好有一个逗号，']' 之后只能有空白，否则抛出 ValueError。
+    """
+    decoder = json.JSONDecoder()
+    eof = False
+    # 已读过的元素数；刚读过逗号时下一个必须是元素
+    count = 0
+    after_comma = False
+    while True:
+        # 跳过空白
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+        if pos >= len(buf):
+            raise ValueError("JSON 数组没有结束")
+        ch = buf[pos]
+        if count and not after_comma:
+            # 上一个元素之后只能是 ',' 或 ']'
+            if ch == ']':
+                _check_trailing(f, buf, pos + 1, chunk_size)
+                return
+            if ch != ',':
+                raise ValueError(f"JSON 数组第 {count} 个元素之后缺少逗号")
+            pos += 1
+            after_comma = True
+            continue
+        if ch == ']' and not after_comma:
+            _check_trailing(f, buf, pos + 1, chunk_size)
+            return
+        if ch in ',]':
+            raise ValueError(f"JSON 数组第 {count + 1} 个元素前有多余的逗号")
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+            # 元素恰好结束在缓冲区末尾时可能被截断（如数字），读入更多再解析
+            if end >= len(buf) and not eof:
+                raise json.JSONDecodeError("缓冲区不足", buf, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield item
+        count += 1
+        after_comma = False
+        pos = end
+        if pos > chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+def _check_trailing(f, buf: str, pos: int, chunk_size: int):
+    """数组结束后只能有空白"""
+    while True:
+        if buf[pos:].strip(_WHITESPACE):
+            raise ValueError("JSON 数组结束后还有多余的内容")
+        buf, pos = f.read(chunk_size), 0
+        if not buf:
+            return
+
+
+def iter_raw_questions(path: Path, chunk_size: int = 1 << 16) -> Iterator:
+    """逐条读取原始题目数据，无需先把整个文件解析完
+
+    支持 JSON 数组、JSONL（每行一道题）；{"questions": [...]} 格式需要整体解析。
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix in JSONL_SUFFIXES:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+
+        buf = f.read(chunk_size)
+        pos = 0
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos < len(buf) and buf[pos] == '[':
+            yield from _iter_json_array(f, buf, pos + 1, chunk_size)
+            return
+
+        data = json.loads(buf + f.read())
+        if isinstance(data, dict):
+            yield from data.get('questions', [])
+
+
+def read_raw_questions(path: Path) -> List:
+    """读取题库文件，兼容列表格式、{"questions": [...]} 格式和 JSONL"""
+    return list(iter_raw_questions(path))
+
+
+def report_skipped(skipped: int):
+    """打印跳过的格式错误题目数（不逐条打印）"""
+    if skipped:
+        print(f"警告: 跳过 {skipped} 道格式错误的题目（运行 bank_lint.py 查看详情）")
+
+
+def iter_questions(path: Path) -> Iterator[Question]:
+    """逐条读取并校验题目，格式错误的题目跳过，结束时打印跳过数"""
+    skipped = 0
+    for raw in iter_raw_questions(path):
+        question = parse_question(raw)
+        if question is None:
+            skipped += 1
+        else:
+            yield question
+    report_skipped(skipped)
+
+
+def load_questions_json(path: Path, dedup=None) -> List[Question]:
+    """解析并校验 JSON 题库文件（去掉近似重复的题目），出错时返回空列表
+
+    dedup 为近似去重过滤器，默认复用编译题库中保存的签名（见 compiled_bank）。
+    """
+    try:
+        raw_questions = read_raw_questions(path)
+    except Exception as e:
+        print(f"加载题目失败: {e}")
+        return []
+
+    from near_duplicates import drop_near_duplicates
+    if dedup is None:
+        from compiled_bank import near_duplicate_filter
+        dedup = near_duplicate_filter(path)
+    parsed = [q for q in map(parse_question, raw_questions) if q is not None]
+    report_skipped(len(raw_questions) - len(parsed))
+    questions = list(drop_near_duplicates(parsed, dedup=dedup))
+    print(f"成功加载 {len(questions)} 道有效题目（共 {len(raw_questions)} 道）")
+    return questions
+
+
+def close_records(records: Sequence[Question]):
+    """关闭持有文件的题目记录（编译题库），其他存储不需要关闭"""
+    close = getattr(records, 'close', None)
+    if close is not None:
+        close()
+
+
+def user_data_path(name: str) -> Path:
+    """用户数据文件路径（目录不存在时创建）"""
+    USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return USER_DATA_DIR / name
+
+
+def default_bank_path() -> Path:
+    """默认题库来源：存在分片目录 banks/ 时使用它，否则使用 questions.json"""
+    from sharded_bank import default_bank_source
+    return default_bank_source() or DEFAULT_BANK_PATH
+
+
+class QuestionBank:
+    """题库：题目记录 + 出题顺序 + ID 索引 + 当前位置 + 用户答案
+
+    题目记录可以是普通列表，也可以是按需解码的只读序列（见 compiled_bank、
+    columnar_bank），
+    打乱顺序时只重排位置数组，不移动题目记录本身。
+    """
+
+    def __init__(self, questions: Iterable[Question] = ()):
+        if isinstance(questions, Sequence) and not isinstance(questions, (list, tuple)):
+            self._records: Sequence[Question] = questions
+        else:
+            self._records = list(questions)
+        # 出题顺序：第 i 题对应的记录下标
+        self._order = array('I', range(len(self._records)))
+        # ID -> 位置 索引，首次按 ID 查询时再构建
+        self._positions: Optional[Dict[str, int]] = None
+        # 记录下标 -> 位置（出题顺序的逆映射），按需构建
+        self._record_positions: Optional[array] = None
+        self.current_index = 0
+        # 用户答案，按题目 ID 记录
+        self.user_answers: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None, shuffle: bool = True,
+             compiled: bool = True) -> 'QuestionBank':
+        """加载题库，出错时返回空题库
+
+        默认使用编译后的二进制题库（JSON 变化时自动重新编译），
+        二进制题库不可用时退回到直接解析 JSON 并转为列式存储。
+        path 为分片目录或清单文件时并行加载各分片（见 sharded_bank）。
+        """
+        json_path = Path(path) if path else default_bank_path()
+        if not json_path.exists():
+            print(f"题目文件不存在: {json_path}")
+            return cls()
+
+        bank = None
+        from sharded_bank import is_sharded_source, load_shards
+        if is_sharded_source(json_path):
+            from columnar_bank import ColumnarBank
+            bank = cls(ColumnarBank(load_shards(json_path)))
+        elif compiled:
+            try:
+                from compiled_bank import open_compiled
+                bank = cls(open_compiled(json_path))
+                print(f"成功加载 {len(bank)} 道有效题目（编译题库）")
+            except Exception as e:
+                print(f"编译题库不可用，直接解析 JSON: {e}")
+        if bank is None:
+            # 直接解析 JSON 时转为列式存储，避免每道题一个字典的内存开销
+            from columnar_bank import ColumnarBank
+            bank = cls(ColumnarBank(load_questions_json(json_path)))
+
+        if shuffle:
+            bank.shuffle()
+        return bank
+
+    def _id_at(self, record: int) -> str:
+        """获取指定记录的 ID（二进制题库无需解码整条记录）"""
+        id_at = getattr(self._records, 'id_at', None)
+        if id_at is not None:
+            return id_at(record)
+        return self._records[record].id
+
+    def _build_index(self) -> Dict[str, int]:
+        """构建 ID -> 位置 索引（重复 ID 以第一次出现为准）"""
+        if self._positions is None:
+            positions: Dict[str, int] = {}
+            for i, record in enumerate(self._order):
+                positions.setdefault(self._id_at(record), i)
+            self._positions = positions
+        return self._positions
+
+    # ---- 容器接口 ----
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, index: int) -> Question:
+        return self._records[self._order[index]]
+
+    def __iter__(self) -> Iterator[Question]:
+        records = self._records
+        return (records[i] for i in self._order)
+
+    def __bool__(self) -> bool:
+        return len(self._order) > 0
+
+    # ---- 查询 ----
+
+    def get(self, question_id: str) -> Optional[Question]:
+        """按 ID 获取题目"""
+        pos = self._build_index().get(str(question_id))
+        return self[pos] if pos is not None else None
+
+    def position_of(self, question_id: str) -> Optional[int]:
+        """按 ID 获取题目在当前顺序中的位置"""
+        return self._build_index().get(str(question_id))
+
+    def ids(self) -> Iterator[str]:
+        """按当前出题顺序返回题目 ID"""
+        return (self._id_at(record) for record in self._order)
+
+    @property
+    def records(self) -> Sequence[Question]:
+        """题目记录（题库文件顺序，供建立检索索引等使用）"""
+        return self._records
+
+    def position_of_record(self, record: int) -> Optional[int]:
+        """记录下标在当前出题顺序中的位置"""
+        if self._record_positions is None:
+            inverse = array('I', [0]) * len(self._records)
+            for i, rec in enumerate(self._order):
+                inverse[rec] = i
+            self._record_positions = inverse
+        if 0 <= record < len(self._record_positions):
+            return self._record_positions[record]
+        return None
+
+    def filter(self, predicate: Callable[[Question], bool]) -> 'QuestionBank':
+        """按条件筛选，返回新题库（共享题目对象和已有答案）"""
+        bank = QuestionBank(q for q in self if predicate(q))
+        bank.user_answers = {qid: opt for qid, opt in self.user_answers.items()
+                             if bank.position_of(qid) is not None}
+        return bank
+
+    def shuffle(self, rng: Optional[random.Random] = None):
+        """随机打乱题目顺序"""
+        (rng or random).shuffle(self._order)
+        self._positions = None
+        self._record_positions = None
+        self.current_index = 0
+
+    def append(self, question: Question, shuffle: bool = False,
+               rng: Optional[random.Random] = None):
+        """追加一道题（仅限列表存储的题库）
+
+        shuffle=True 时使用 inside-out Fisher–Yates，新题随机放到当前题之后的
+        任意位置，被换下的题移到末尾；已经显示过的位置保持不变。
+        """
+        if not isinstance(self._records, list):
+            raise TypeError("只读题库不能追加题目")
+        self._records.append(question)
+        i = len(self._order)
+        self._order.append(len(self._records) - 1)
+        if shuffle:
+            j = (rng or random).randint(min(self.current_index + 1, i), i)
+            self._order[i], self._order[j] = self._order[j], self._order[i]
+        self._positions = None
+        self._record_positions = None
+
+    def snapshot_order(self) -> array:
+        """出题顺序的副本（交给后台线程使用）"""
+        return array('I', self._order)
+
+    def replace_records(self, records: Sequence[Question], order: array, current_index: int,
+                        positions: Optional[Dict[str, int]] = None):
+        """换入新的题目记录和出题顺序（界面线程调用，答案按 ID 保留）
+
+        records 和 order 在后台构建好后一次换入，之后不再修改。
+        旧记录是编译题库时随即关闭（释放映射和文件句柄），仍在读取它的后台线程会得到 ValueError。
+        """
+        old = self._records
+        self._records = records
+        self._order = order
+        self._positions = positions
+        self._record_positions = None
+        self.current_index = current_index
+        if old is not records:
+            close_records(old)
+
+    def compact(self):
+        """把列表存储转为列式存储（出题顺序、当前位置和答案不变）"""
+        if isinstance(self._records, list):
+            from columnar_bank import ColumnarBank
+            self._records = ColumnarBank(self._records)
+
+    # ---- 导航 ----
+
+    @property
+    def current(self) -> Optional[Question]:
+        """当前题目"""
+        if 0 <= self.current_index < len(self._order):
+            return self[self.current_index]
+        return None
+
+    def go_to(self, index: int) -> Optional[Question]:
+        """跳转到指定位置，越界时返回 None 且不改变当前位置"""
+        if not self._order or index < 0 or index >= len(self._order):
+            return None
+        self.current_index = index
+        return self[index]
+
+    def next_index(self) -> int:
+        """下一题位置（到末尾时回到第一题）"""
+        if self.current_index < len(self._order) - 1:
+            return self.current_index + 1
+        return 0
+
+    def prev_index(self) -> int:
+        """上一题位置（在第一题时跳到最后一题）"""
+        if self.current_index > 0:
+            return self.current_index - 1
+        return max(len(self._order) - 1, 0)
+
+    # ---- 答题记录 ----
+
+    def record_answer(self, index: int, option: str):
+        """记录指定位置题目的用户选择"""
+        if 0 <= index < len(self._order):
+            self.user_answers[self._id_at(self._order[index])] = option
+
+    def answer_for(self, index: int) -> Optional[str]:
+        """获取指定位置题目的用户选择"""
+        if 0 <= index < len(self._order):
+            return self.user_answers.get(self._id_at(self._order[index]))
+        return None
+
+    def is_correct(self, index: int) -> Optional[bool]:
+        """用户选择是否正确，未作答时返回 None"""
+        selected = self.answer_for(index)
+        if selected is None:
+            return None
+        return selected == self[index].answer
+
+
+class BankLoader:
+    """增量加载器：尽快给出第一道题，其余题目分批追加
+
+    编译题库可用时一次打开即完成；否则逐条解析 JSON，
+    解析完成后转为列式存储并写入编译题库，供下次启动使用。
+
+    open_compiled() 和 iter_batches() 只做解析，可以在后台线程运行；
+    apply() 和 finish() 会修改题库，必须在界面线程调用。
+    start()/step() 是在同一线程内完成全部步骤的简便接口。
+    """
+
+    def __init__(self, path: Optional[Path] = None, shuffle: bool = True,
+                 batch_size: int = 200):
+        self.path = Path(path) if path else default_bank_path()
+        self.shuffle = shuffle
+        self.batch_size = batch_size
+        self.bank = QuestionBank()
+        self.done = False
+        self._batches: Optional[Iterator[List[Question]]] = None
+        self._cancelled = False
+        # 后台解析完成后构建好的列式存储，finish() 时换入题库
+        self._compacted = None
+
+    # ---- 后台线程 ----
+
+    def open_compiled(self) -> Optional[QuestionBank]:
+        """编译题库是最新的则直接打开，否则返回 None"""
+        if not self.path.exists():
+            print(f"题目文件不存在: {self.path}")
+            return QuestionBank()
+        from sharded_bank import is_sharded_source
+        if is_sharded_source(self.path):
+            return None
+        try:
+            from compiled_bank import compiled_path_for, is_up_to_date
+            if is_up_to_date(self.path, compiled_path_for(self.path)):
+                return QuestionBank.load(self.path, shuffle=self.shuffle)
+        except Exception as e:
+            print(f"编译题库不可用，直接解析 JSON: {e}")
+        return None
+
+    def iter_batches(self) -> Iterator[List[Question]]:
+        """逐批解析题目（第一批只含一道题，近似重复的题目跳过），
+        结束后准备列式存储并写入编译题库（连同去重签名，下次只需计算变化的题目）"""
+        from columnar_bank import ColumnarBank
+        from compiled_bank import near_duplicate_filter, pack_signatures
+        from near_duplicates import drop_near_duplicates
+        from sharded_bank import is_sharded_source, load_shards
+        if is_sharded_source(self.path):
+            # 分片在进程池中整体解析，完成后再分批交给界面
+            parsed = load_shards(self.path)
+            for start in range(0, len(parsed), self.batch_size):
+                if self._cancelled:
+                    return
+                yield parsed[start:start + self.batch_size]
+            self._compacted = ColumnarBank(parsed)
+            return
+
+        source_mtime_ns = self.path.stat().st_mtime_ns
+        dedup = near_duplicate_filter(self.path)
+        parsed: List[Question] = []
+        batch: List[Question] = []
+        limit = 1
+        try:
+            for question in drop_near_duplicates(iter_questions(self.path), dedup=dedup):
+                if self._cancelled:
+                    return
+                parsed.append(question)
+                batch.append(question)
+                if len(batch) >= limit:
+                    yield batch
+                    batch, limit = [], self.batch_size
+        except Exception as e:
+            print(f"加载题目失败: {e}")
+            if batch:
+                yield batch
+            return
+        if batch:
+            yield batch
+
+        print(f"成功加载 {len(parsed)} 道有效题目")
+        # 签名打包后（写入编译题库用）先释放去重索引，再构建列式存储
+        signatures = pack_signatures(dedup.signatures)
+        del dedup
+        # 记录下标就是解析顺序，与 apply() 追加的顺序一致
+        self._compacted = ColumnarBank(parsed)
+        try:
+            if self.path.stat().st_mtime_ns != source_mtime_ns:
+                return  # 加载期间文件被修改，不写缓存
+            from compiled_bank import compiled_path_for, file_digest, write_compiled
+            write_compiled(parsed, compiled_path_for(self.path),
+                           source_mtime_ns, file_digest(self.path), signatures)
+        except Exception as e:
+            print(f"写入编译题库失败: {e}")
+
+    def cancel(self):
+        """停止后台解析（可从任意线程调用）"""
+        self._cancelled = True
+
+    # ---- 界面线程 ----
+
+    def apply(self, batch: List[Question]):
+        """把一批题目追加到题库"""
+        for question in batch:
+            self.bank.append(question, shuffle=self.shuffle)
+
+    def finish(self, bank: Optional[QuestionBank] = None):
+        """加载结束：换入编译题库或列式存储（已有答案随之保留，换下的编译题库随即关闭）"""
+        if bank is not None:
+            bank.user_answers.update(self.bank.user_answers)
+            if self.bank.records is not bank.records:
+                close_records(self.bank.records)
+            self.bank = bank
+        elif self._compacted is not None and len(self._compacted) == len(self.bank._records):
+            close_records(self.bank._records)
+            self.bank._records = self._compacted
+        self._compacted = None
+        self._batches = None
+        self.done = True
+
+    # ---- 同线程接口 ----
+
+    def start(self) -> QuestionBank:
+        """开始加载，返回题库（此时至少已有第一道有效题，或加载已结束）"""
+        bank = self.open_compiled()
+        if bank is not None:
+            self.finish(bank)
+            return self.bank
+        self._batches = self.iter_batches()
+        self.step()
+        return self.bank
+
+    def step(self) -> bool:
+        """再加载一批题目，返回是否还有剩余"""
+        if self.done:
+            return False
+        batch = next(self._batches, None)
+        if batch is None:
+            self.finish()
+            return False
+        self.apply(batch)
+        return True
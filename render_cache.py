@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+桌面版（PyQt6）题目渲染缓存
+
+按题目 ID 缓存排版结果（LRU，容量固定）:
+    题干的 QTextDocument（已按当前宽度排好版）及其高度
+    各选项文本及按标签宽度测得的高度
+    答案区的 HTML（"您的选择" 一行随作答变化，显示时再拼接）
+
+事件循环空闲时（0 间隔 QTimer）逐题预排当前题前后若干道，
+翻页和自动轮播时直接换入排好的文档，不再重新排版。
+题干或选项区域宽度变化时整个缓存失效。
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QRect, Qt, QTimer
+from PyQt6.QtGui import QTextDocument
+from PyQt6.QtWidgets import QLabel, QTextEdit
+
+from question_bank import Question
+
+
+DEFAULT_CAPACITY = 64
+
+# 题干区域在文档高度之外的边距，与原先 show_question 中的计算一致
+_QUESTION_PADDING = 20
+_MIN_QUESTION_HEIGHT = 50
+_MIN_OPTION_HEIGHT = 25
+
+
+def answer_parts(question: Question) -> Tuple[str, str]:
+    """答案区 HTML 的固定部分：(正确答案, 解析)"""
+    head = f"<b>正确答案：{question.answer}</b><br>"
+    tail = f"<b>解析：</b><br>{question.analysis}" if question.analysis else ""
+    return head, tail
+
+
+class RenderedQuestion:
+    """一道题的排版结果"""
+
+    __slots__ = ('document', 'height', 'options', 'option_heights', 'answer_head', 'answer_tail')
+
+    def __init__(self, document: QTextDocument, height: int, options: Dict[str, str],
+                 option_heights: Dict[str, int], answer_head: str, answer_tail: str):
+        self.document = document
+        self.height = height
+        self.options = options
+        self.option_heights = option_heights
+        self.answer_head = answer_head
+        self.answer_tail = answer_tail
+
+
+class RenderCache(QObject):
+    """题目渲染缓存（只在界面线程使用）"""
+
+    def __init__(self, question_view: QTextEdit, option_label: QLabel,
+                 capacity: int = DEFAULT_CAPACITY, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.question_view = question_view
+        self.option_label = option_label
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, RenderedQuestion]" = OrderedDict()
+        self._widths: Optional[Tuple[int, int]] = None
+        # 正在显示的题目（其文档属于题干控件，不能淘汰）
+        self._pinned: Optional[str] = None
+        self._pinned_document: Optional[QTextDocument] = None
+        self._pending: Iterator[Question] = iter(())
+        self._idle = QTimer(self)
+        self._idle.setInterval(0)
+        self._idle.timeout.connect(self._prefetch_one)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _current_widths(self) -> Tuple[int, int]:
+        return (self.question_view.viewport().width(),
+                self.option_label.contentsRect().width())
+
+    def _check_widths(self):
+        """宽度变化时清空缓存"""
+        widths = self._current_widths()
+        if widths != self._widths:
+            self.clear()
+            self._widths = widths
+
+    def clear(self):
+        """清空缓存（正在显示的文档由题干控件继续使用）"""
+        for question_id, entry in self._entries.items():
+            if question_id != self._pinned:
+                entry.document.deleteLater()
+        self._entries.clear()
+
+    def _render(self, question: Question) -> RenderedQuestion:
+        question_width, option_width = self._widths
+        doc = QTextDocument(self)
+        doc.setDefaultFont(self.question_view.font())
+        doc.setPlainText(question.title)
+        doc.setTextWidth(question_width)
+        height = max(int(doc.size().height()) + _QUESTION_PADDING, _MIN_QUESTION_HEIGHT)
+
+        metrics = self.option_label.fontMetrics()
+        margins = self.option_label.height() - self.option_label.contentsRect().height()
+        options: Dict[str, str] = {}
+        option_heights: Dict[str, int] = {}
+        for opt, text in question.option_items():
+            label = f"{opt}. {text}"
+            options[opt] = label
+            rect = metrics.boundingRect(QRect(0, 0, max(option_width, 1), 1 << 20),
+                                        Qt.TextFlag.TextWordWrap, label)
+            option_heights[opt] = max(rect.height() + margins, _MIN_OPTION_HEIGHT)
+
+        head, tail = answer_parts(question)
+        return RenderedQuestion(doc, height, options, option_heights, head, tail)
+
+    def _store(self, question_id: str, entry: RenderedQuestion):
+        self._entries[question_id] = entry
+        if len(self._entries) <= self.capacity:
+            return
+        old_id = next((qid for qid in self._entries if qid != self._pinned), None)
+        if old_id is not None:
+            self._entries.pop(old_id).document.deleteLater()
+
+    def get(self, question: Question, pin: bool = False) -> RenderedQuestion:
+        """获取排版结果（未缓存时立即排版）；pin=True 表示即将显示"""
+        self._check_widths()
+        entry = self._entries.get(question.id)
+        if entry is None:
+            self.misses += 1
+            entry = self._render(question)
+            self._store(question.id, entry)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(question.id)
+        if pin:
+            # 上一个显示的文档若已被清出缓存，换下后释放
+            old = self._pinned_document
+            cached = self._entries.get(self._pinned)
+            if old is not None and old is not entry.document and (cached is None or cached.document is not old):
+                old.deleteLater()
+            self._pinned = question.id
+            self._pinned_document = entry.document
+        return entry
+
+    def prefetch(self, questions: Iterable[Question]):
+        """在事件循环空闲时逐题预排（替换尚未完成的预排任务）"""
+        self._pending = iter(questions)
+        self._idle.start()
+
+    def _prefetch_one(self):
+        try:
+            question = next(self._pending)
+        except (StopIteration, IndexError):
+            self._idle.stop()
+            return
+        self._check_widths()
+        if question.id not in self._entries:
+            self._store(question.id, self._render(question))
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+间隔重复复习调度（SM-2）
+
+每道题一张卡片，记录难度系数（ease）、间隔、连续答对次数和下次到期时间。
+答对后间隔按 1 天、6 天、间隔 × ease 递增；答错后 10 分钟后重来并降低 ease。
+
+到期卡片放在按到期时间排序的最小堆里，取下一张为 O(log n)。
+卡片重新排期时直接压入新条目，旧条目在弹出时按到期时间比对后丢弃（惰性删除），
+堆中过期条目过多时整体重建。
+
+出题优先级：已到期的复习卡 > 新卡（按题库顺序）> 最早到期的复习卡（提前复习）。
+题库中已不存在的卡片保留进度但暂停排期，题目重新出现时恢复。
+"""
+
+import heapq
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+DAY = 86400.0
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# 答错后重新出现的间隔（天）
+RELEARN_INTERVAL = 10 * 60 / DAY
+
+# 复习进度文件名（保存在用户数据目录）
+REVIEW_STATE_NAME = 'review_state.json'
+
+# 答对 / 答错对应的 SM-2 评分（0-5）
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+
+class Card:
+    """单张复习卡片"""
+
+    __slots__ = ('id', 'ease', 'interval', 'reps', 'lapses', 'due')
+
+    def __init__(self, id: str, ease: float = INITIAL_EASE, interval: float = 0.0,
+                 reps: int = 0, lapses: int = 0, due: float = 0.0):
+        self.id = id
+        self.ease = ease
+        self.interval = interval    # 天
+        self.reps = reps            # 连续答对次数
+        self.lapses = lapses        # 累计答错次数
+        self.due = due              # 下次到期时间（Unix 时间戳）
+
+    def to_list(self) -> list:
+        return [self.id, self.ease, self.interval, self.reps, self.lapses, self.due]
+
+
+def sm2(card: Card, quality: int, now: float):
+    """按 SM-2 更新卡片"""
+    if quality < 3:
+        card.reps = 0
+        card.lapses += 1
+        card.interval = RELEARN_INTERVAL
+    else:
+        card.reps += 1
+        if card.reps == 1:
+            card.interval = 1.0
+        elif card.reps == 2:
+            card.interval = 6.0
+        else:
+            card.interval = card.interval * card.ease
+    card.ease = max(MIN_EASE, card.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    card.due = now + card.interval * DAY
+
+
+class ReviewScheduler:
+    """复习调度器"""
+
+    def __init__(self):
+        self._cards: Dict[str, Card] = {}
+        # (到期时间, 序号, 卡片 ID)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        # 还没复习过的卡片（按加入顺序轮换，复习后惰性删除）
+        self._new: deque = deque()
+        self._new_ids = set()
+        # 题库中已不存在的卡片（保留进度，不参与排期）
+        self._suspended: Dict[str, Card] = {}
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def card(self, card_id: str) -> Optional[Card]:
+        return self._cards.get(card_id)
+
+    def add_new(self, card_ids: Iterable[str]):
+        """登记新卡片（已存在的跳过），按给定顺序出题"""
+        for card_id in card_ids:
+            if card_id not in self._cards and card_id not in self._new_ids:
+                self._new.append(card_id)
+                self._new_ids.add(card_id)
+
+    def attach(self, card_ids: Iterable[str]):
+        """与题库同步：题库中没有的卡片暂停，新题目按给定顺序登记为新卡"""
+        card_ids = list(card_ids)
+        present = set(card_ids)
+        for card_id in [c for c in self._cards if c not in present]:
+            self._suspended[card_id] = self._cards.pop(card_id)
+        for card_id in [c for c in self._suspended if c in present]:
+            self._cards[card_id] = self._suspended.pop(card_id)
+        self._new = deque()
+        self._new_ids = set()
+        self.add_new(card_ids)
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(c.due, i, c.id) for i, c in enumerate(self._cards.values())]
+        heapq.heapify(self._heap)
+        self._seq = len(self._heap)
+
+    def _push(self, card: Card):
+        self._seq += 1
+        heapq.heappush(self._heap, (card.due, self._seq, card.id))
+        # 过期条目过多时重建堆
+        if len(self._heap) > 2 * len(self._cards) + 64:
+            self._rebuild_heap()
+
+    def _peek_review(self) -> Optional[Tuple[float, int, str]]:
+        """堆顶的有效条目（丢弃过期条目）"""
+        heap = self._heap
+        while heap:
+            due, _, card_id = heap[0]
+            card = self._cards.get(card_id)
+            if card is not None and card.due == due:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def review(self, card_id: str, correct: bool, now: Optional[float] = None) -> Card:
+        """记录一次作答并重新排期"""
+        now = time.time() if now is None else now
+        card = self._cards.get(card_id)
+        if card is None:
+            card = self._suspended.pop(card_id, None) or Card(card_id)
+            self._cards[card_id] = card
+            self._new_ids.discard(card_id)
+        sm2(card, QUALITY_CORRECT if correct else QUALITY_WRONG, now)
+        self._push(card)
+        return card
+
+    def next_card(self, now: Optional[float] = None, exclude: Optional[str] = None) -> Optional[str]:
+        """下一张要出的卡片 ID"""
+        now = time.time() if now is None else now
+        top = self._peek_review()
+        if top is not None and top[0] <= now and top[2] != exclude:
+            return top[2]
+
+        # 新卡：取队首并移到队尾（没作答就跳过的卡片之后还会轮到）
+        for _ in range(len(self._new)):
+            card_id = self._new.popleft()
+            if card_id not in self._new_ids:
+                continue
+            self._new.append(card_id)
+            if card_id != exclude:
+                return card_id
+
+        # 没有到期卡也没有新卡：提前复习最早到期的
+        if top is not None and top[2] != exclude:
+            return top[2]
+        if top is not None:
+            # 堆顶是当前卡片，看看第二早的
+            for due, _, card_id in heapq.nsmallest(8, self._heap):
+                card = self._cards.get(card_id)
+                if card_id != exclude and card is not None and card.due == due:
+                    return card_id
+        return None
+
+    def next_position(self, bank, now: Optional[float] = None) -> Optional[int]:
+        """题库（QuestionBank）中下一道要出的题目位置，不会是当前题"""
+        current = bank.current
+        card_id = self.next_card(now, exclude=current.id if current is not None else None)
+        return bank.position_of(card_id) if card_id is not None else None
+
+    def due_count(self, now: Optional[float] = None) -> int:
+        """当前已到期的复习卡数量"""
+        now = time.time() if now is None else now
+        return sum(1 for card in self._cards.values() if card.due <= now)
+
+    @property
+    def new_count(self) -> int:
+        """还没复习过的卡片数量"""
+        return len(self._new_ids)
+
+    # ---- 持久化 ----
+
+    def to_dict(self) -> Dict:
+        cards = list(self._cards.values()) + list(self._suspended.values())
+        return {'version': 1, 'cards': [card.to_list() for card in cards]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReviewScheduler':
+        scheduler = cls()
+        for item in data.get('cards', []):
+            card = Card(*item)
+            scheduler._cards[card.id] = card
+        scheduler._rebuild_heap()
+        return scheduler
+
+    def save(self, path: Path):
+        """保存复习进度（先写临时文件再替换）"""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ReviewScheduler':
+        """读取复习进度，文件不存在或损坏时返回空调度器"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            print(f"读取复习进度失败: {e}")
+            return cls()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+题目全文检索（字符二元组倒排索引）
+
+对题干、选项、解析建立字符二元组（bigram）倒排索引，中文无需分词。
+每个二元组的倒排表是有序的 array('I')，元素为 (记录下标 << 3) | 字段位:
+    1 = 题干    2 = 选项    4 = 解析
+查询时从最短的倒排表开始，用二分查找与其余倒排表求交集，
+再按 IDF × 字段权重排序；没有完全匹配时退回到部分匹配。
+
+输入时每个字都会查询一次，需要在 1 毫秒内返回，所以每次查询的工作量有上限:
+    长倒排表预先取出得分最高的一段（按字段权重、记录顺序），候选记录先从这一段取
+    最多检查 MAX_CANDIDATES 条候选记录，只与最短的 MAX_LISTS 个倒排表求交集
+    单个字的查询合并包含该字的最常见的几个二元组（预先建好字 -> 二元组的映射）
+常见词的结果超过上限时为近似排序。
+
+索引按记录下标（题库文件中的顺序）建立，与出题顺序无关，
+用 QuestionBank.position_of_record() 换算成当前位置。
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from question_bank import Question
+
+
+FIELD_TITLE = 1
+FIELD_OPTIONS = 2
+FIELD_ANALYSIS = 4
+
+# 命中字段的权重（题干最重要）
+FIELD_WEIGHTS = {FIELD_TITLE: 3.0, FIELD_OPTIONS: 2.0, FIELD_ANALYSIS: 1.0}
+_MASK_WEIGHTS = [
+    sum(w for bit, w in FIELD_WEIGHTS.items() if mask & bit) for mask in range(8)
+]
+
+# 部分匹配时最多合并的倒排表数量（从最短的开始）
+_PARTIAL_LISTS = 4
+
+# 倒排表超过该长度时预先取出得分最高的这么多条
+TOP_ITEMS = 64
+# 每个倒排表最多检查的候选记录数
+MAX_CANDIDATES = 128
+# 求交集时最多使用的倒排表数量（从最短的开始）
+MAX_LISTS = 4
+# 单个字的查询最多合并的二元组数量（取倒排表最长的）
+CHAR_GRAMS = 8
+
+
+def normalize(text: str) -> List[str]:
+    """统一大小写，按空白和标点切分成连续的文字片段"""
+    runs = []
+    start = None
+    text = text.lower()
+    for i, ch in enumerate(text):
+        if ch.isalnum():
+            if start is None:
+                start = i
+        elif start is not None:
+            runs.append(text[start:i])
+            start = None
+    if start is not None:
+        runs.append(text[start:])
+    return runs
+
+
+def bigrams(text: str) -> List[str]:
+    """文本的字符二元组（不跨越标点，去重，保持顺序）"""
+    seen = {}
+    for run in normalize(text):
+        for i in range(len(run) - 1):
+            seen.setdefault(run[i:i + 2], None)
+    return list(seen)
+
+
+class SearchIndex:
+    """二元组倒排索引"""
+
+    def __init__(self, records: Iterable[Question] = ()):
+        postings: Dict[str, List[int]] = {}
+        count = 0
+        for record, question in enumerate(records):
+            fields = (
+                (FIELD_TITLE, question.title),
+                (FIELD_OPTIONS, ' '.join(text for _, text in question.option_items())),
+                (FIELD_ANALYSIS, question.analysis),
+            )
+            masks: Dict[str, int] = {}
+            for bit, text in fields:
+                for gram in bigrams(text):
+                    masks[gram] = masks.get(gram, 0) | bit
+            for gram, mask in masks.items():
+                postings.setdefault(gram, []).append(record << 3 | mask)
+            count += 1
+
+        # 按记录顺序追加，倒排表天然有序
+        self._postings: Dict[str, array] = {
+            gram: array('I', items) for gram, items in postings.items()
+        }
+        self._count = count
+        del postings
+
+        # 长倒排表的高分段
+        self._top: Dict[str, array] = {
+            gram: _top_items(items, TOP_ITEMS)
+            for gram, items in self._postings.items() if len(items) > TOP_ITEMS
+        }
+        # 字 -> 包含它的最常见的二元组
+        char_grams: Dict[str, List[str]] = {}
+        for gram in self._postings:
+            for ch in set(gram):
+                char_grams.setdefault(ch, []).append(gram)
+        self._char_grams: Dict[str, List[str]] = {
+            ch: heapq.nlargest(CHAR_GRAMS, grams, key=lambda gram: len(self._postings[gram]))
+            for ch, grams in char_grams.items()
+        }
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def vocabulary_size(self) -> int:
+        """不同二元组的数量"""
+        return len(self._postings)
+
+    def _idf(self, postings: array) -> float:
+        return math.log(1 + self._count / len(postings))
+
+    def _length(self, gram: str) -> int:
+        items = self._postings.get(gram)
+        return len(items) if items is not None else 0
+
+    def _scan(self, gram: str) -> Iterator[int]:
+        """按检查顺序返回倒排表元素：先是高分段，再按记录顺序（跳过已返回的）"""
+        items = self._postings.get(gram, ())
+        top = self._top.get(gram)
+        if top is None:
+            yield from items
+            return
+        yield from top
+        seen = set(top)
+        for item in items:
+            if item not in seen:
+                yield item
+
+    def search(self, query: str, limit: int = 20) -> List[int]:
+        """按相关度返回记录下标（最多 limit 个，limit 不超过 TOP_ITEMS 时单个词的排序是精确的）"""
+        grams = bigrams(query)
+        if grams:
+            grams.sort(key=self._length)
+            scores = self._intersect(grams[:MAX_LISTS])
+            if not scores:
+                scores = self._union(grams)
+        else:
+            # 只有单个字：合并包含该字的常见二元组
+            grams = [gram for run in normalize(query) for gram in self._char_grams.get(run, ())]
+            if not grams:
+                return []
+            scores = self._union(grams)
+        return heapq.nlargest(limit, scores, key=lambda r: (scores[r], -r))
+
+    def _intersect(self, grams: List[str]) -> Dict[int, float]:
+        """所有二元组都命中的记录（grams 按倒排表长度升序）"""
+        if not self._length(grams[0]):
+            return {}
+        lists = [self._postings[gram] for gram in grams]
+        idfs = [self._idf(items) for items in lists]
+        rest = list(zip(lists[1:], idfs[1:]))
+        scores: Dict[int, float] = {}
+        for item in islice(self._scan(grams[0]), MAX_CANDIDATES):
+            record = item >> 3
+            score = idfs[0] * _MASK_WEIGHTS[item & 7]
+            for items, idf in rest:
+                found = _find(items, record)
+                if found is None:
+                    break
+                score += idf * _MASK_WEIGHTS[found & 7]
+            else:
+                scores[record] = score
+        return scores
+
+    def _union(self, grams: List[str]) -> Dict[int, float]:
+        """部分命中的记录（只合并前几个非空的倒排表）"""
+        scores: Dict[int, float] = {}
+        for gram in [gram for gram in grams if self._length(gram)][:_PARTIAL_LISTS]:
+            idf = self._idf(self._postings[gram])
+            for item in islice(self._scan(gram), MAX_CANDIDATES):
+                record = item >> 3
+                scores[record] = scores.get(record, 0.0) + idf * _MASK_WEIGHTS[item & 7]
+        return scores
+
+
+def _top_items(items: array, count: int) -> array:
+    """倒排表中得分最高的 count 条（字段权重从高到低，同权重按记录顺序）"""
+    masks: List[List[int]] = [[] for _ in range(8)]
+    for item in items:
+        bucket = masks[item & 7]
+        if len(bucket) < count:
+            bucket.append(item)
+    best = heapq.nsmallest(count, (item for bucket in masks for item in bucket),
+                           key=lambda item: (-_MASK_WEIGHTS[item & 7], item))
+    return array('I', best)
+
+
+def _find(items: array, record: int) -> Optional[int]:
+    """在有序倒排表中二分查找记录，返回对应元素"""
+    i = bisect_left(items, record << 3)
+    if i < len(items) and items[i] >> 3 == record:
+        return items[i]
+    return None
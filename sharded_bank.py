@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片题库（按科目拆分的多个题库文件）
+
+题库来源可以是:
+    题库目录      目录下每个 .json / .jsonl 文件是一个分片，文件名即科目名
+                  （例如 banks/法律法规.json、banks/私募股权.jsonl）
+    清单文件      *.manifest.json，格式为
+                  {"shards": [{"path": "法律法规.json", "subject": "法律法规"}, ...]}
+                  path 相对清单所在目录
+
+各分片在进程池中并行解析、校验，再按 ID 去重合并（先出现的优先），
+最后去掉跨分片的近似重复题目（见 near_duplicates）。合并结果连同去重签名
+写入来源旁的编译题库（banks.qbank、*.manifest.qbank），只用于下次加载时复用签名。
+"""
+
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from near_duplicates import NearDuplicateFilter, drop_near_duplicates
+from question_bank import JSONL_SUFFIXES, Question, iter_questions
+
+
+MANIFEST_SUFFIX = '.manifest.json'
+SHARD_SUFFIXES = ('.json',) + JSONL_SUFFIXES
+
+# 默认分片目录（存在且非空时优先于 questions.json）
+DEFAULT_SHARD_DIR = Path(__file__).parent / "banks"
+
+# (分片路径, 科目)
+Shard = Tuple[Path, str]
+
+
+def is_sharded_source(path: Path) -> bool:
+    """题库来源是否为分片目录或清单文件"""
+    path = Path(path)
+    return path.is_dir() or path.name.endswith(MANIFEST_SUFFIX)
+
+
+def resolve_shards(path: Path) -> List[Shard]:
+    """列出分片（目录按文件名排序，清单按书写顺序）"""
+    path = Path(path)
+    if path.is_dir():
+        return [
+            (p, p.stem) for p in sorted(path.iterdir())
+            if p.suffix in SHARD_SUFFIXES and not p.name.endswith(MANIFEST_SUFFIX)
+        ]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    shards = []
+    for entry in manifest.get('shards', []):
+        if isinstance(entry, str):
+            entry = {'path': entry}
+        shard_path = path.parent / entry['path']
+        shards.append((shard_path, entry.get('subject') or shard_path.stem))
+    return shards
+
+
+def parse_shard(shard: Shard) -> List[Question]:
+    """解析并校验一个分片（在工作进程中运行），题目没有科目时使用分片科目"""
+    shard_path, subject = shard
+    try:
+        questions = list(iter_questions(shard_path))
+    except Exception as e:
+        print(f"加载分片失败 {shard_path}: {e}")
+        return []
+    for question in questions:
+        if not question.subject:
+            question.subject = subject
+    print(f"分片 {shard_path.name}: {len(questions)} 道有效题目")
+    return questions
+
+
+def parse_shards(shards: List[Shard], max_workers: Optional[int] = None) -> List[List[Question]]:
+    """并行解析所有分片，结果顺序与分片顺序一致
+
+    只有一个分片或当前平台不支持多进程（如 Android）时逐个解析。
+    """
+    if len(shards) > 1 and max_workers != 1:
+        try:
+            # 进程池只在真正有多个分片时才导入（启动时不需要）
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(parse_shard, shards))
+        except Exception as e:
+            print(f"进程池不可用，改为逐个解析: {e}")
+    return [parse_shard(shard) for shard in shards]
+
+
+def merge_shards(results: List[List[Question]],
+                 dedup: Optional[NearDuplicateFilter] = None) -> List[Question]:
+    """按 ID 去重合并，再去掉跨分片的近似重复题目（都是先出现的优先）"""
+    return list(drop_near_duplicates(merge_by_id(results), dedup=dedup))
+
+
+def merge_by_id(results: List[List[Question]]) -> List[Question]:
+    """按 ID 去重合并（先出现的优先）"""
+    merged: List[Question] = []
+    seen = set()
+    duplicates = 0
+    for questions in results:
+        for question in questions:
+            if question.id in seen:
+                duplicates += 1
+                continue
+            seen.add(question.id)
+            merged.append(question)
+    if duplicates:
+        print(f"警告: 合并时跳过 {duplicates} 道 ID 重复的题目")
+    return merged
+
+
+def load_shards(path: Path, max_workers: Optional[int] = None) -> List[Question]:
+    """加载分片题库，返回合并后的题目列表"""
+    from compiled_bank import StoredSignatures, near_duplicate_filter
+    shards = resolve_shards(path)
+    dedup = near_duplicate_filter(path)
+    merged = merge_shards(parse_shards(shards, max_workers), dedup)
+    print(f"成功加载 {len(merged)} 道有效题目（{len(shards)} 个分片）")
+    stored = dedup.signature_of
+    if not (isinstance(stored, StoredSignatures) and stored.covers(len(merged))):
+        save_signatures(path, merged, dedup.signatures)
+    return merged
+
+
+def save_signatures(path: Path, questions: List[Question], signatures: List):
+    """把合并结果和去重签名写入来源旁的编译题库（不作为题库打开，只供下次复用签名）"""
+    try:
+        from compiled_bank import compiled_path_for, write_compiled
+        write_compiled(questions, compiled_path_for(path), signatures=signatures)
+    except Exception as e:
+        print(f"保存去重签名失败: {e}")
+
+
+def default_bank_source() -> Optional[Path]:
+    """默认分片目录存在且包含分片时返回它，否则返回 None"""
+    if DEFAULT_SHARD_DIR.is_dir() and resolve_shards(DEFAULT_SHARD_DIR):
+        return DEFAULT_SHARD_DIR
+    return None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+朗读分段（不依赖任何界面框架）
+
+把一道题拆成按句的朗读片段：先读题干，再逐个读选项、答案和解析。
+第一段很短，可以立即开始朗读；每段结束后再送入下一段，也可以跳过当前段。
+
+SpeechQueue 维护当前题目的片段和播放位置，并按题目 ID 缓存预先准备好的片段，
+自动轮播时在当前题朗读期间就准备好下一题。新准备的片段会交给 on_prepare
+（例如音频缓存的后台合成）。
+
+桌面版选定的语音引擎和语音保存在用户数据目录（tts.json），
+下次启动时直接使用，不再枚举引擎和扫描语音列表。
+"""
+
+import json
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from question_bank import Question, user_data_path
+
+
+# 句末标点（片段在这些字符之后切分）
+SENTENCE_ENDINGS = '。！？；!?;'
+# 单个片段的最大长度，过长的句子按逗号再切
+MAX_SEGMENT_CHARS = 60
+
+TTS_CHOICE_NAME = 'tts.json'
+
+_MARKUP = re.compile(r'<[^>]*>|\[/?[a-z]+(?:=[^\]]*)?\]')
+_SPACES = re.compile(r'\s+')
+_SENTENCE = re.compile(r'[^%s]*[%s]+|[^%s]+$' % ((re.escape(SENTENCE_ENDINGS),) * 3))
+
+
+def load_tts_choice() -> Dict[str, str]:
+    """上次选定的语音引擎和语音（{'engine': ..., 'voice': ...}），没有时返回空字典"""
+    try:
+        with open(user_data_path(TTS_CHOICE_NAME), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {key: data[key] for key in ('engine', 'voice') if isinstance(data.get(key), str)}
+
+
+def save_tts_choice(engine: str, voice: str):
+    """保存选定的语音引擎和语音"""
+    try:
+        with open(user_data_path(TTS_CHOICE_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'engine': engine, 'voice': voice}, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"保存语音引擎选择失败: {e}")
+
+
+def clean_text(text: str) -> str:
+    """去掉 HTML / Kivy 标记，合并空白"""
+    return _SPACES.sub(' ', _MARKUP.sub('', text)).strip()
+
+
+def split_sentences(text: str, max_chars: int = MAX_SEGMENT_CHARS) -> List[str]:
+    """按句切分，过长的句子再按逗号切分"""
+    segments = []
+    for sentence in _SENTENCE.findall(clean_text(text)):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(mark, 0, max_chars) for mark in '，,、')
+            cut = cut + 1 if cut > 0 else max_chars
+            segments.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            segments.append(sentence)
+    return segments
+
+
+def question_segments(question: Question, all_options: bool = True,
+                      with_analysis: bool = True) -> List[str]:
+    """一道题的朗读片段
+
+    all_options=False 时只读正确答案对应的选项文本（桌面版的读法）。
+    """
+    title = split_sentences(question.title) or ['']
+    segments = [f"题目：{title[0]}"] + title[1:]
+    if all_options:
+        options = [f"{opt}，{clean_text(text)}。" for opt, text in question.option_items()]
+        if options:
+            options[0] = "选项：" + options[0]
+            segments.extend(options)
+        segments.append(f"答案：{question.answer}。")
+    else:
+        answer_text = question.options.get(question.answer)
+        if isinstance(answer_text, str):
+            segments.append(f"答案：{clean_text(answer_text)}。")
+    if with_analysis and question.analysis:
+        analysis = split_sentences(question.analysis)
+        if analysis:
+            segments.append(f"解析：{analysis[0]}")
+            segments.extend(analysis[1:])
+    return [segment for segment in segments if segment]
+
+
+class SpeechQueue:
+    """朗读队列：当前题的片段和播放位置，以及预先准备的片段"""
+
+    def __init__(self, builder: Callable[[Question], List[str]] = question_segments,
+                 cache_size: int = 8,
+                 on_prepare: Optional[Callable[[List[str]], None]] = None):
+        self.builder = builder
+        self.cache_size = cache_size
+        self.on_prepare = on_prepare
+        self._prepared: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.segments: List[str] = []
+        self.position = -1
+        self.question_id: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        """是否有正在朗读的片段"""
+        return 0 <= self.position < len(self.segments)
+
+    @property
+    def current(self) -> Optional[str]:
+        return self.segments[self.position] if self.active else None
+
+    def prepare(self, question: Question) -> List[str]:
+        """准备（并缓存）一道题的片段"""
+        segments = self._prepared.get(question.id)
+        if segments is None:
+            segments = self._prepared[question.id] = self.builder(question)
+            while len(self._prepared) > self.cache_size:
+                self._prepared.popitem(last=False)
+            if self.on_prepare is not None:
+                self.on_prepare(segments)
+        else:
+            self._prepared.move_to_end(question.id)
+        return segments
+
+    def start(self, question: Question) -> Optional[str]:
+        """开始朗读一道题，返回第一段"""
+        self.segments = self.prepare(question)
+        self.question_id = question.id
+        self.position = 0
+        return self.current
+
+    def next(self) -> Optional[str]:
+        """当前段读完（或被跳过），返回下一段；全部读完返回 None"""
+        if not self.active:
+            return None
+        self.position += 1
+        return self.current
+
+    def stop(self):
+        """停止朗读（丢弃剩余片段）"""
+        self.position = -1
+        self.segments = []
+        self.question_id = None
+
+    def clear(self):
+        """清空预先准备的片段（题库变化时）"""
+        self._prepared.clear()
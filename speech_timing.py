@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+朗读时长估算（自校准）
+
+plyer 的 TTS 没有朗读完成回调，只能估算每段需要多长时间；
+Android 上另外轮询 AudioManager.isMusicActive()，能观察到朗读何时结束时
+直接用作完成信号（android_audio_probe）。
+时长按线性模型估算:
+    时长 = 基础 + 汉字数 × a + 字母数 × b + 数字数 × c + 逗号类停顿 × d + 句末停顿 × e
+
+系数用带遗忘因子的递推最小二乘（RLS）在线拟合:
+    observe()        得到真实时长（有完成信号时）
+    observe_skip()   用户在估算时间之前跳过：说明这段实际已经读完，
+                     以较低权重把时长往跳过时刻拉
+    observe_quiet()  没有完成信号、片段按估算时长播完且用户没有跳过：
+                     以很低的权重把时长往估算值拉，与跳过相互制衡
+给出的估算 = 均值 × (1 + 安全余量)，余量由完整观测的相对误差决定，
+使估算过短（下一段打断当前段）的情况只占少数；估算限制在先验的 0.5～2 倍之间。
+拟合结果按引擎分别保存在用户数据目录，下次启动继续使用。
+
+模拟引擎（SimulatedEngine）按给定语速和噪声生成"真实"时长，用来验证校准效果:
+    python3 speech_timing.py [题库] [--rounds N]
+"""
+
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+SPEECH_TIMING_NAME = 'speech_timing.json'
+
+SHORT_PAUSES = '，,、：:（）()“”"'
+LONG_PAUSES = '。！？；!?;'
+
+FEATURE_NAMES = ('base', 'han', 'letters', 'digits', 'short_pauses', 'long_pauses')
+
+# 先验系数（秒）：相当于中文约每秒 4 个字
+PRIOR_WEIGHTS = (0.3, 0.25, 0.08, 0.3, 0.15, 0.35)
+PRIOR_VARIANCE = 0.05
+# 遗忘因子：越接近 1 越依赖长期历史
+FORGETTING = 0.995
+# 跳过 / 无跳过播完作为观测的权重（相对完整观测）
+SKIP_WEIGHT = 0.3
+QUIET_WEIGHT = 0.01
+# 相对误差的先验方差，安全余量 = MARGIN_Z × 相对误差标准差
+PRIOR_RELATIVE_VARIANCE = 0.15 ** 2
+MARGIN_Z = 1.3
+# 估算相对先验的允许范围
+MIN_SCALE, MAX_SCALE = 0.5, 2.0
+# 估算时长的下限（秒），避免过短导致下一段打断当前段
+MIN_DURATION = 0.5
+
+
+def features(text: str) -> List[float]:
+    """朗读片段的特征向量（与 FEATURE_NAMES 对应）"""
+    han = letters = digits = short = long = 0
+    for ch in text:
+        if '一' <= ch <= '鿿':
+            han += 1
+        elif ch.isdigit():
+            digits += 1
+        elif ch.isalpha():
+            letters += 1
+        elif ch in SHORT_PAUSES:
+            short += 1
+        elif ch in LONG_PAUSES:
+            long += 1
+    return [1.0, han, letters, digits, short, long]
+
+
+class SpeechTimingModel:
+    """朗读时长模型（RLS 在线拟合）"""
+
+    def __init__(self, weights: Sequence[float] = PRIOR_WEIGHTS,
+                 covariance: Optional[List[List[float]]] = None, observations: int = 0,
+                 relative_variance: float = PRIOR_RELATIVE_VARIANCE):
+        n = len(FEATURE_NAMES)
+        self.weights = list(weights)
+        self.covariance = covariance or [
+            [PRIOR_VARIANCE if i == j else 0.0 for j in range(n)] for i in range(n)
+        ]
+        self.observations = observations
+        self.relative_variance = relative_variance
+
+    def mean(self, text: str) -> float:
+        """朗读时长的期望值（秒，限制在先验的 MIN_SCALE～MAX_SCALE 倍之间）"""
+        x = features(text)
+        prior = sum(w * v for w, v in zip(PRIOR_WEIGHTS, x))
+        value = sum(w * v for w, v in zip(self.weights, x))
+        return min(max(value, prior * MIN_SCALE), prior * MAX_SCALE)
+
+    @property
+    def margin(self) -> float:
+        return MARGIN_Z * self.relative_variance ** 0.5
+
+    def estimate(self, text: str) -> float:
+        """安排下一段之前等待的时长（秒，含安全余量）"""
+        return max(self.mean(text) * (1 + self.margin), MIN_DURATION)
+
+    def observe(self, text: str, duration: float, weight: float = 1.0):
+        """用一次观测到的真实时长更新系数"""
+        if duration <= 0:
+            return
+        if weight >= 1.0:
+            predicted = self.mean(text)
+            error = (duration - predicted) / predicted
+            self.relative_variance += (1 - FORGETTING) * 4 * (error * error - self.relative_variance)
+        self._update(features(text), duration, weight)
+
+    def observe_skip(self, text: str, elapsed: float):
+        """用户在估算结束前跳过：实际时长不超过 elapsed"""
+        if 0 < elapsed < self.estimate(text):
+            self._update(features(text), elapsed, SKIP_WEIGHT)
+
+    def observe_quiet(self, text: str):
+        """没有完成信号，片段按估算时长播完且用户没有跳过"""
+        self._update(features(text), self.estimate(text), QUIET_WEIGHT)
+
+    def _update(self, x: List[float], duration: float, weight: float):
+        P = self.covariance
+        n = len(x)
+        Px = [sum(P[i][j] * x[j] for j in range(n)) for i in range(n)]
+        # 权重较低的观测相当于噪声更大
+        denom = FORGETTING / weight + sum(x[i] * Px[i] for i in range(n))
+        gain = [v / denom for v in Px]
+        error = duration - sum(w * v for w, v in zip(self.weights, x))
+        self.weights = [w + g * error for w, g in zip(self.weights, gain)]
+        self.covariance = [
+            [(P[i][j] - gain[i] * Px[j]) / FORGETTING for j in range(n)] for i in range(n)
+        ]
+        self.observations += 1
+
+    def to_dict(self) -> Dict:
+        return {'weights': self.weights, 'covariance': self.covariance,
+                'observations': self.observations, 'relative_variance': self.relative_variance}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpeechTimingModel':
+        weights = data.get('weights')
+        covariance = data.get('covariance')
+        n = len(FEATURE_NAMES)
+        if not (isinstance(weights, list) and len(weights) == n
+                and isinstance(covariance, list) and len(covariance) == n):
+            return cls()
+        return cls(weights, covariance, int(data.get('observations', 0)),
+                   float(data.get('relative_variance', PRIOR_RELATIVE_VARIANCE)))
+
+
+def load_model(engine: str, path: Optional[Path] = None) -> SpeechTimingModel:
+    """读取某个引擎的时长模型，没有时使用先验"""
+    if path is None:
+        from question_bank import user_data_path
+        path = user_data_path(SPEECH_TIMING_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return SpeechTimingModel.from_dict(json.load(f).get(engine, {}))
+    except FileNotFoundError:
+        return SpeechTimingModel()
+    except Exception as e:
+        print(f"读取朗读时长模型失败: {e}")
+        return SpeechTimingModel()
+
+
+def save_model(engine: str, model: SpeechTimingModel, path: Optional[Path] = None):
+    """保存某个引擎的时长模型（保留其他引擎的模型）"""
+    if path is None:
+        from question_bank import user_data_path
+        path = user_data_path(SPEECH_TIMING_NAME)
+    path = Path(path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception:
+        data = {}
+    data[engine] = model.to_dict()
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def android_audio_probe() -> Optional[Callable[[], bool]]:
+    """Android 上返回"是否正在播放音频"的查询函数，其他平台返回 None"""
+    try:
+        from jnius import autoclass
+        activity = autoclass('org.kivy.android.PythonActivity').mActivity
+        context = autoclass('android.content.Context')
+        return activity.getSystemService(context.AUDIO_SERVICE).isMusicActive
+    except Exception:
+        return None
+
+
+# ---- 模拟引擎 ----
+
+class SimulatedEngine:
+    """按固定语速和随机噪声给出"真实"朗读时长的模拟引擎"""
+
+    def __init__(self, weights: Sequence[float] = (0.15, 0.21, 0.06, 0.42, 0.2, 0.45),
+                 noise: float = 0.08, seed: int = 0):
+        self.weights = weights
+        self.noise = noise
+        self.rng = random.Random(seed)
+
+    def duration(self, text: str) -> float:
+        exact = sum(w * v for w, v in zip(self.weights, features(text)))
+        return max(exact * (1 + self.rng.gauss(0, self.noise)), 0.1)
+
+
+class FixedRateModel:
+    """原先的固定估算（每秒 3 个字，不学习），作为对照"""
+
+    def estimate(self, text: str) -> float:
+        return len(text) / 3
+
+    def observe(self, text: str, duration: float, weight: float = 1.0):
+        pass
+
+    def observe_skip(self, text: str, elapsed: float):
+        pass
+
+    def observe_quiet(self, text: str):
+        pass
+
+
+def simulate(segments_per_question: List[List[str]], engine: SimulatedEngine, model,
+             rounds: int = 3, completion_signal: bool = True,
+             skip_rate: float = 0.5) -> List[Dict]:
+    """模拟自动轮播：每轮读完所有题目，返回每轮的统计
+
+    completion_signal=True 时引擎报告每段播完，下一段随即开始，每段占用真实时长，
+    模型也得到真实时长；否则每段占用估算的时长（估算过短时下一段会打断当前段，
+    过长会留下静音），只有用户在静音中按下跳过（概率 skip_rate）和无跳过播完两种信号。
+    统计平均误差、被打断的片段比例、平均静音和每小时题数。
+    """
+    results = []
+    for _ in range(rounds):
+        total_time = cut = silence = error = 0.0
+        count = 0
+        for segments in segments_per_question:
+            for text in segments:
+                estimate = model.estimate(text)
+                actual = engine.duration(text)
+                error += abs(estimate - actual)
+                count += 1
+                if completion_signal:
+                    total_time += actual
+                    model.observe(text, actual)
+                    continue
+                if estimate < actual:
+                    cut += 1
+                # 用户听完后经过一段反应时间在静音中按下跳过
+                skipped_at = actual + engine.rng.uniform(0.3, 1.0)
+                if skipped_at < estimate and engine.rng.random() < skip_rate:
+                    total_time += skipped_at
+                    silence += skipped_at - actual
+                    model.observe_skip(text, skipped_at)
+                else:
+                    total_time += estimate
+                    silence += max(estimate - actual, 0.0)
+                    model.observe_quiet(text)
+        results.append({
+            'segments': count,
+            'mean_abs_error': error / max(count, 1),
+            'cut_off_rate': cut / max(count, 1),
+            'mean_silence': silence / max(count, 1),
+            'questions_per_hour': len(segments_per_question) * 3600 / max(total_time, 1e-9),
+        })
+    return results
+
+
+def main():
+    from question_bank import DEFAULT_BANK_PATH, iter_questions
+    from speech import question_segments
+
+    args = sys.argv[1:]
+    rounds = 3
+    if '--rounds' in args:
+        i = args.index('--rounds')
+        rounds = int(args[i + 1])
+        del args[i:i + 2]
+    path = Path(args[0]) if args else DEFAULT_BANK_PATH
+    questions = [question_segments(q) for q in iter_questions(path)]
+
+    cases = (
+        ("固定估算（每秒 3 个字）", FixedRateModel(), False),
+        ("自校准（有完成信号）", SpeechTimingModel(), True),
+        ("自校准（仅跳过）", SpeechTimingModel(), False),
+    )
+    for label, model, completion_signal in cases:
+        print(f"{label}：")
+        stats = simulate(questions, SimulatedEngine(seed=1), model, rounds, completion_signal)
+        for i, item in enumerate(stats, 1):
+            print(f"  第 {i} 轮: 平均误差 {item['mean_abs_error']:.2f} 秒，"
+                  f"被打断 {item['cut_off_rate']:.0%}，平均静音 {item['mean_silence']:.2f} 秒，"
+                  f"每小时 {item['questions_per_hour']:.0f} 题")
+
+
+if __name__ == "__main__":
+    main()
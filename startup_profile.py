@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时分析
+
+设置环境变量 FUND_EXAM_PROFILE_STARTUP=1 启动程序时，各阶段（导入完成、窗口创建、
+首次绘制、显示第一题等）距离本模块导入的时间会打印出来，并追加到用户数据目录的
+startup_profile.jsonl；某个阶段比最近 10 次的中位数慢 50% 以上时给出警告。
+未开启时 mark() 只做一次判断。
+
+本模块应在入口文件中最先导入。查看历史记录:
+    python3 startup_profile.py
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+_START = time.perf_counter()
+
+ENABLED = os.environ.get('FUND_EXAM_PROFILE_STARTUP', '') not in ('', '0')
+
+STARTUP_PROFILE_NAME = 'startup_profile.jsonl'
+# 与最近若干次的中位数比较
+HISTORY_WINDOW = 10
+REGRESSION_RATIO = 1.5
+
+_marks: Dict[str, float] = {}
+_reported = False
+
+
+def mark(name: str):
+    """记录一个阶段完成的时间（每个阶段只记第一次）"""
+    if ENABLED and name not in _marks:
+        _marks[name] = time.perf_counter() - _START
+
+
+def _history(path) -> List[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+def _median(values: List[float]) -> float:
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def report(frontend: str):
+    """打印本次各阶段耗时，与历史比较后追加到记录文件（只执行一次）"""
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    from question_bank import user_data_path
+    path = user_data_path(STARTUP_PROFILE_NAME)
+    history = [item for item in _history(path) if item.get('frontend') == frontend][-HISTORY_WINDOW:]
+
+    print(f"启动耗时（{frontend}）:")
+    for name, seconds in _marks.items():
+        previous = [item['marks'][name] for item in history if name in item.get('marks', {})]
+        line = f"  {name:<16} {seconds * 1000:8.1f} 毫秒"
+        if previous:
+            median = _median(previous)
+            line += f"（最近中位数 {median * 1000:.1f} 毫秒）"
+            if seconds > median * REGRESSION_RATIO:
+                line += "  ⚠ 变慢"
+        print(line)
+
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'frontend': frontend, 'time': time.time(), 'marks': _marks},
+                               ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"保存启动耗时失败: {e}")
+
+
+def main():
+    from question_bank import user_data_path
+    history = _history(user_data_path(STARTUP_PROFILE_NAME))
+    if not history:
+        print("还没有启动耗时记录（设置 FUND_EXAM_PROFILE_STARTUP=1 后启动程序）")
+        return 1
+    frontends: Dict[str, List[Dict]] = {}
+    for item in history:
+        frontends.setdefault(item.get('frontend', '?'), []).append(item)
+    for frontend, items in frontends.items():
+        recent = items[-HISTORY_WINDOW:]
+        print(f"{frontend}（共 {len(items)} 次，最近 {len(recent)} 次的中位数）:")
+        names: Dict[str, List[float]] = {}
+        for item in recent:
+            for name, seconds in item.get('marks', {}).items():
+                names.setdefault(name, []).append(seconds)
+        for name, values in names.items():
+            print(f"  {name:<16} {_median(values) * 1000:8.1f} 毫秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
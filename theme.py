@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+桌面版（PyQt6）主题
+
+整个应用只安装一份样式表（QApplication.setStyleSheet），控件通过
+objectName 匹配各自的样式；运行时状态（自动轮播开/关、答对/答错等）
+用动态属性表示，切换状态时只对该控件重新 polish，不再传入新的样式表。
+
+每个主题的样式表由模板和配色生成一次后缓存，切换主题时直接安装。
+"""
+
+from string import Template
+from typing import Dict, List
+
+from PyQt6.QtWidgets import QApplication, QWidget
+
+from question_bank import user_data_path
+
+
+THEME_FILE_NAME = 'theme.txt'
+
+THEMES: Dict[str, Dict] = {
+    '浅色': {
+        'window_bg': 'rgba(240, 240, 240, 0.95)',
+        # paintEvent 绘制窗口外框用的 RGBA
+        'frame_fill': (240, 240, 240, 245),
+        'frame_pen': (200, 200, 200, 255),
+        'title_bg': 'rgba(70, 130, 180, 0.9)',
+        'text': '#000000',
+        'muted': '#666666',
+        'border': '#dddddd',
+        'panel_bg': 'rgba(255, 255, 255, 0.95)',
+        'input_bg': 'white',
+        'answer_bg': 'rgba(255, 250, 205, 0.9)',
+        'stats_bg': 'rgba(232, 245, 233, 0.9)',
+        'correct': '#2e7d32',
+        'wrong': '#c62828',
+        'prev': '#4CAF50', 'prev_hover': '#45a049',
+        'next': '#2196F3', 'next_hover': '#0b7dda',
+        'answer': '#FF9800', 'answer_hover': '#e68900',
+        'auto': '#9C27B0', 'auto_hover': '#7b1fa2', 'auto_active': '#F44336',
+        'review': '#009688', 'review_hover': '#00796b', 'review_active': '#00574b',
+        'stats': '#607D8B', 'stats_hover': '#455a64',
+        'close': '#f44336', 'close_hover': '#da190b',
+    },
+    '深色': {
+        'window_bg': 'rgba(43, 43, 43, 0.95)',
+        'frame_fill': (43, 43, 43, 245),
+        'frame_pen': (90, 90, 90, 255),
+        'title_bg': 'rgba(38, 70, 100, 0.95)',
+        'text': '#e8e8e8',
+        'muted': '#a0a0a0',
+        'border': '#555555',
+        'panel_bg': 'rgba(60, 60, 60, 0.95)',
+        'input_bg': '#3a3a3a',
+        'answer_bg': 'rgba(85, 75, 40, 0.9)',
+        'stats_bg': 'rgba(40, 70, 45, 0.9)',
+        'correct': '#81c784',
+        'wrong': '#e57373',
+        'prev': '#388E3C', 'prev_hover': '#2e7d32',
+        'next': '#1976D2', 'next_hover': '#1565c0',
+        'answer': '#EF6C00', 'answer_hover': '#e65100',
+        'auto': '#7B1FA2', 'auto_hover': '#6a1b9a', 'auto_active': '#C62828',
+        'review': '#00796B', 'review_hover': '#00695c', 'review_active': '#004d40',
+        'stats': '#546E7A', 'stats_hover': '#455a64',
+        'close': '#C62828', 'close_hover': '#b71c1c',
+    },
+}
+
+DEFAULT_THEME = '浅色'
+
+_STYLESHEET = Template("""
+QWidget {
+    background-color: $window_bg;
+    border-radius: 10px;
+    color: $text;
+}
+QScrollArea#contentScroll {
+    border: none;
+    background: transparent;
+}
+QLabel#titleBar {
+    background-color: $title_bg;
+    color: white;
+    padding: 8px;
+    border-radius: 5px;
+}
+QLabel#counterLabel, QLabel#searchStatus {
+    color: $muted;
+    font-size: 11px;
+}
+QLineEdit#searchInput {
+    background-color: $input_bg;
+    border: 1px solid $border;
+    border-radius: 5px;
+    padding: 4px 8px;
+    font-size: 12px;
+}
+QTextEdit#questionView {
+    background-color: $panel_bg;
+    border: 1px solid $border;
+    border-radius: 5px;
+    padding: 10px;
+    font-size: 13px;
+}
+QRadioButton#optionRadio::indicator {
+    width: 15px;
+    height: 15px;
+}
+QLabel#optionText {
+    font-size: 12px;
+    padding: 5px;
+    background: transparent;
+}
+QLabel#answerPanel {
+    background-color: $answer_bg;
+    border: 1px solid $border;
+    border-radius: 5px;
+    padding: 10px;
+    font-size: 12px;
+}
+QLabel#answerPanel[result="correct"] {
+    border: 2px solid $correct;
+}
+QLabel#answerPanel[result="wrong"] {
+    border: 2px solid $wrong;
+}
+QLabel#statsPanel {
+    background-color: $stats_bg;
+    border: 1px solid $border;
+    border-radius: 5px;
+    padding: 10px;
+    font-size: 12px;
+}
+QPushButton {
+    color: white;
+    border: none;
+    padding: 8px 15px;
+    border-radius: 5px;
+    font-size: 12px;
+}
+QPushButton#prevButton { background-color: $prev; }
+QPushButton#prevButton:hover { background-color: $prev_hover; }
+QPushButton#nextButton { background-color: $next; }
+QPushButton#nextButton:hover { background-color: $next_hover; }
+QPushButton#answerButton { background-color: $answer; }
+QPushButton#answerButton:hover { background-color: $answer_hover; }
+QPushButton#autoPlayButton { background-color: $auto; }
+QPushButton#autoPlayButton:hover { background-color: $auto_hover; }
+QPushButton#autoPlayButton[active="true"] { background-color: $auto_active; }
+QPushButton#reviewButton { background-color: $review; }
+QPushButton#reviewButton:hover { background-color: $review_hover; }
+QPushButton#reviewButton[active="true"] { background-color: $review_active; }
+QPushButton#statsButton, QPushButton#themeButton { background-color: $stats; }
+QPushButton#statsButton:hover, QPushButton#themeButton:hover { background-color: $stats_hover; }
+QPushButton#closeButton { background-color: $close; }
+QPushButton#closeButton:hover { background-color: $close_hover; }
+""")
+
+# 主题名 -> 生成好的样式表
+_compiled: Dict[str, str] = {}
+
+
+def theme_names() -> List[str]:
+    return list(THEMES)
+
+
+def stylesheet(name: str) -> str:
+    """主题对应的完整样式表（只生成一次）"""
+    sheet = _compiled.get(name)
+    if sheet is None:
+        sheet = _compiled[name] = _STYLESHEET.substitute(THEMES[name])
+    return sheet
+
+
+def apply_theme(app: QApplication, name: str) -> Dict:
+    """安装主题样式表，返回配色（未知主题使用默认主题）"""
+    if name not in THEMES:
+        name = DEFAULT_THEME
+    app.setStyleSheet(stylesheet(name))
+    return THEMES[name]
+
+
+def next_theme(name: str) -> str:
+    """下一个主题名（循环切换）"""
+    names = theme_names()
+    return names[(names.index(name) + 1) % len(names)] if name in names else DEFAULT_THEME
+
+
+def set_state(widget: QWidget, name: str, value) -> bool:
+    """设置动态属性并只对该控件重新应用样式，值未变化时什么都不做"""
+    if widget.property(name) == value:
+        return False
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    return True
+
+
+def load_theme_name() -> str:
+    """读取上次使用的主题"""
+    try:
+        name = user_data_path(THEME_FILE_NAME).read_text(encoding='utf-8').strip()
+    except OSError:
+        return DEFAULT_THEME
+    return name if name in THEMES else DEFAULT_THEME
+
+
+def save_theme_name(name: str):
+    """保存当前主题"""
+    try:
+        user_data_path(THEME_FILE_NAME).write_text(name, encoding='utf-8')
+    except OSError as e:
+        print(f"保存主题失败: {e}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量级跟踪（不依赖任何界面框架）
+
+设置环境变量 FUND_EXAM_TRACE=1 启动时开启。记录的事件写入固定大小的环形缓冲区
+（槽位由 itertools.count 分配，在 GIL 下是原子的，写入不加锁），
+满了之后覆盖最旧的事件；dump() 导出为 Chrome / Perfetto 的 trace-event JSON
+（chrome://tracing 或 ui.perfetto.dev 打开）。
+
+    @traced('show_question')        方法耗时（complete 事件）
+    with span('parse', n=100): ...  代码块耗时
+    instant('tts_state', state=s)   瞬时事件
+
+未开启时 traced() 直接返回原函数，span() 返回共享的空上下文，instant() 只判断一次，
+可以保留在发布版本中。
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ENABLED = os.environ.get('FUND_EXAM_TRACE', '') not in ('', '0')
+
+# 环形缓冲区容量（2 的幂）
+BUFFER_SIZE = 1 << 16
+_MASK = BUFFER_SIZE - 1
+
+# 事件: (类型 'X'/'i', 名称, 开始时间 ns, 时长 ns, 线程 ID, 参数)
+_buffer: List[Optional[tuple]] = [None] * BUFFER_SIZE if ENABLED else []
+_slots = itertools.count()
+_origin = time.perf_counter_ns()
+_clock = time.perf_counter_ns
+_thread_id = threading.get_native_id
+
+
+def _record(event: tuple):
+    _buffer[next(_slots) & _MASK] = event
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name: str, args: Dict):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        end = _clock()
+        _record(('X', self.name, self.start, end - self.start, _thread_id(), self.args))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **args):
+    """记录一个代码块的耗时"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def instant(name: str, **args):
+    """记录一个瞬时事件"""
+    if ENABLED:
+        _record(('i', name, _clock(), 0, _thread_id(), args))
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """装饰器：记录函数每次调用的耗时（未开启时返回原函数）"""
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = _clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = _clock()
+                _record(('X', label, start, end - start, _thread_id(), None))
+        return wrapper
+    return decorate
+
+
+def events() -> List[tuple]:
+    """缓冲区中的事件（按开始时间排序）"""
+    return sorted((e for e in _buffer if e is not None), key=lambda e: e[2])
+
+
+def to_trace_events() -> Dict:
+    """转换为 trace-event JSON 对象"""
+    pid = os.getpid()
+    trace = []
+    for kind, name, start, duration, tid, args in events():
+        event = {'name': name, 'ph': kind, 'ts': (start - _origin) / 1000, 'pid': pid, 'tid': tid}
+        if kind == 'X':
+            event['dur'] = duration / 1000
+        else:
+            event['s'] = 't'
+        if args:
+            event['args'] = {key: str(value) for key, value in args.items()}
+        trace.append(event)
+    for thread in threading.enumerate():
+        if thread.native_id is not None:
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread.native_id,
+                          'args': {'name': thread.name}})
+    return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+
+def dump(path: Optional[Path] = None) -> Optional[Path]:
+    """导出到文件（默认在用户数据目录 trace-时间.json），未开启时返回 None"""
+    if not ENABLED:
+        return None
+    if path is None:
+        from question_bank import user_data_path
+        path = user_data_path(time.strftime('trace-%Y%m%d-%H%M%S.json'))
+    path = Path(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(to_trace_events(), f, ensure_ascii=False)
+    print(f"跟踪记录已导出: {path}")
+    return path
+
+
+def install_signal_handler():
+    """收到 SIGUSR1 时导出（只在支持的平台、主线程中调用）"""
+    if not ENABLED:
+        return
+    try:
+        import signal
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump())
+    except (ImportError, AttributeError, ValueError):
+        pass